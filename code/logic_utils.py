@@ -5,8 +5,9 @@
 
 """Python infrastructure for our logic course."""
 
+import weakref
 from functools import wraps
-from typing import Any, Dict, Iterator, Set, Type, TypeVar
+from typing import Any, Dict, Hashable, Iterator, Optional, Set, Type, TypeVar
 
 T = TypeVar('T')
 
@@ -54,6 +55,45 @@ class frozendict(Dict[Any, Any]):
     __delattr__ = __delitem__ = __setattr__ = __setitem__ = clear = pop = \
                   popitem = setdefault = update
 
+class InternTable:
+    """A table of canonical instances of an immutable class, keyed by their
+    structure. The table only holds weak references to its instances, so an
+    instance is dropped from the table as soon as it is no longer used
+    elsewhere."""
+
+    def __init__(self) -> None:
+        self.__instances = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self.__instances)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """ Returns the canonical instance for the given key, or None if there
+        is no such instance. """
+        return self.__instances.get(key)
+
+    def add(self, key: Hashable, instance: Any) -> None:
+        """ Makes the given instance the canonical instance for the given
+        key. """
+        self.__instances[key] = instance
+
+__interning_enabled = False
+
+def is_interning() -> bool:
+    """Checks if hash-consing of formulae and terms is currently enabled."""
+    return __interning_enabled
+
+def set_interning(enabled: bool) -> bool:
+    """Enables or disables hash-consing of formulae and terms. While enabled,
+    constructing a formula or a term that is structurally equal to one that is
+    still alive returns that same object, so that equal formulae and terms
+    share their storage and compare by identity. Returns whether hash-consing
+    was enabled before the call."""
+    global __interning_enabled
+    previous = __interning_enabled
+    __interning_enabled = enabled
+    return previous
+
 class __prefix_with_index_sequence_generator:
     """ A generator for a sequence of the form 'z1', 'z2', 'z3', ..., where the
     prefix 'z' is customizable. """
@@ -85,7 +85,7 @@ def is_primitively_closed(sentences: AbstractSet[Formula]) -> bool:
 
     for relation_name, relation_arity in list(relations):
         for perm in power_set_dict[relation_arity]:
-            pos_formula = Formula(relation_name, perm)
+            pos_formula = Formula(relation_name, [Term(c) for c in perm])
             neg_formula = Formula('~', pos_formula)
             if not ((pos_formula in sentences) or (neg_formula in sentences)):
                 return False
@@ -761,7 +761,7 @@ from propositions.proofs import Proof as PropositionalProof, \
 from propositions.axiomatic_systems import AXIOMATIC_SYSTEM as \
     PROPOSITIONAL_AXIOMATIC_SYSTEM, \
     MP, I0, I1, D, I2, N, NI, NN, R
-from propositions.tautology import prove_tautology as \
+from propositions.tautology import prove_tautology_cached as \
     prove_propositional_tautology
 
 # Schema equivalents of the propositional-logic axioms for implication and
@@ -538,7 +538,7 @@ class Prover:
         inter_mapping = dict(zip(substitution_map.keys(), inter_mapping_vals))
         final_mapping = dict(zip(inter_mapping_vals, substitution_map.values()))
 
-        orig_formula = self._lines[line_number]
+        orig_formula = self._lines[line_number].formula
 
         curr_formula = orig_formula
         curr_step = line_number
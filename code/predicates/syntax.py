@@ -8,9 +8,11 @@
 from __future__ import annotations
 
 import re
-from typing import AbstractSet, Mapping, Optional, Sequence, Set, Tuple, Union
+from typing import AbstractSet, List, Mapping, Optional, Sequence, Set, Tuple, \
+    Union
 
-from logic_utils import fresh_variable_name_generator, frozen
+from logic_utils import InternTable, fresh_variable_name_generator, frozen, \
+    is_interning
 
 from propositions.syntax import Formula as PropositionalFormula, \
     is_variable as is_propositional_variable
@@ -25,6 +27,8 @@ L_BRACK = '('
 
 PREFIX_ERR_MSG = 'Not a valid prefix of a term'
 
+FORMULA_PREFIX_ERR_MSG = 'Not a valid prefix of a formula'
+
 
 class ForbiddenVariableError(Exception):
     """Raised by `Term.substitute` and `Formula.substitute` when a substituted
@@ -79,6 +83,11 @@ def is_function(s: str) -> bool:
     return s[0] >= 'f' and s[0] <= 't' and s.isalnum()
 
 
+_interned_terms = InternTable()
+
+_interned_formulas = InternTable()
+
+
 @frozen
 class Term:
     """An immutable first-order term in tree representation, composed from
@@ -93,6 +102,28 @@ class Term:
     root: str
     arguments: Optional[Tuple[Term, ...]]
 
+    def __new__(cls, root: Optional[str] = None,
+                arguments: Optional[Sequence[Term]] = None) -> Term:
+        """Allocates a `Term`, or returns the canonical term with the given root
+        and root arguments if hash-consing is enabled (see
+        `~logic_utils.set_interning`).
+
+        Parameters:
+            root: the root for the term tree.
+            arguments: the arguments to the root, if any.
+
+        Returns:
+            A new term, or an already initialized canonical one.
+        """
+        if root is None or not is_interning():
+            return super().__new__(cls)
+        key = (root, None if arguments is None else tuple(arguments))
+        term = _interned_terms.get(key)
+        if term is None:
+            term = super().__new__(cls)
+            _interned_terms.add(key, term)
+        return term
+
     def __init__(self, root: str,
                  arguments: Optional[Sequence[Term]] = None) -> None:
         """Initializes a `Term` from its root and root arguments.
@@ -102,15 +133,21 @@ class Term:
             arguments: the arguments to the root, if the root is a function
                 name.
         """
+        if getattr(self, '_hash', None) is not None:
+            # A canonical term returned by __new__ is already initialized
+            return
         if is_constant(root) or is_variable(root):
             assert arguments is None
             self.root = root
+            self._hash = hash(root)
         else:
             assert is_function(root)
             assert arguments is not None
             self.root = root
             self.arguments = tuple(arguments)
             assert len(self.arguments) > 0
+            self._hash = hash((root, self.arguments))
+        self._repr = None
 
     def __repr__(self) -> str:
         """Computes the string representation of the current term.
@@ -119,13 +156,39 @@ class Term:
             The standard string representation of the current term.
         """
         # Task 7.1
-        if is_constant(self.root) or is_variable(self.root):
-            return self.root
-        else:
-            repr = f'{self.root}({str(self.arguments[0])}'
-            for arg in self.arguments[1:]:
-                repr += f',{str(arg)}'
-            return f'{repr})'
+        if self._repr is None:
+            # The term is immutable, so the string is computed only once
+            object.__setattr__(self, '_repr', ''.join(self._repr_tokens()))
+        return self._repr
+
+    def _repr_tokens(self) -> List[str]:
+        """Computes the tokens of the standard string representation of the
+        current term, without recursion, reusing the cached representations of
+        subterms that were already computed.
+
+        Returns:
+            A list of strings whose concatenation is the standard string
+            representation of the current term.
+        """
+        tokens = []
+        pending = [self]
+        while len(pending) > 0:
+            node = pending.pop()
+            if type(node) is str:
+                tokens.append(node)
+            elif node._repr is not None:
+                tokens.append(node._repr)
+            elif is_function(node.root):
+                tokens.append(node.root)
+                tokens.append(L_BRACK)
+                pending.append(R_BRACK)
+                for i in range(len(node.arguments) - 1, 0, -1):
+                    pending.append(node.arguments[i])
+                    pending.append(COMMA)
+                pending.append(node.arguments[0])
+            else:
+                tokens.append(node.root)
+        return tokens
 
     def __eq__(self, other: object) -> bool:
         """Compares the current term with the given one.
@@ -137,7 +200,25 @@ class Term:
             ``True`` if the given object is a `Term` object that equals the
             current term, ``False`` otherwise.
         """
-        return isinstance(other, Term) and str(self) == str(other)
+        if self is other:
+            return True
+        if not isinstance(other, Term):
+            return False
+        pairs = [(self, other)]
+        # Pairs of shared subterms are compared only once
+        compared = set()
+        while len(pairs) > 0:
+            first, second = pairs.pop()
+            if first is second or (id(first), id(second)) in compared:
+                continue
+            compared.add((id(first), id(second)))
+            if first._hash != second._hash or first.root != second.root:
+                return False
+            if is_function(first.root):
+                if len(first.arguments) != len(second.arguments):
+                    return False
+                pairs.extend(zip(first.arguments, second.arguments))
+        return True
 
     def __ne__(self, other: object) -> bool:
         """Compares the current term with the given one.
@@ -152,7 +233,15 @@ class Term:
         return not self == other
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self._hash
+
+    def __reduce__(self) -> Tuple[type, Tuple]:
+        # Rebuild through the constructor, so that the hash is recomputed in
+        # the unpickling process and the term is interned there if enabled
+        if is_function(self.root):
+            return Term, (self.root, self.arguments)
+        else:
+            return Term, (self.root,)
 
     @staticmethod
     def parse_prefix(s: str) -> Tuple[Term, str]:
@@ -169,36 +258,10 @@ class Term:
             that entire name (and not just a part of it, such as ``'x1'``).
         """
         # Task 7.3.1
-
-        # Base case
-        if s == '':
-            return None, PREFIX_ERR_MSG
-        elif is_constant(s) or is_variable(s):
-            return Term(s), ''
-        elif s[0] == UNDERSCORE:
-            return Term(UNDERSCORE), s[1:]
-        elif 'f' <= s[0] <= 't':  # prefix is function
-            root, args, start_marker = '', [], 0
-            # finding the root of the function
-            for i, c in enumerate(s):
-                if c == L_BRACK:
-                    root, start_marker = s[0:i], i + 1
-                    break
-
-            arg, remainder = Term.parse_prefix(s[start_marker:])
-            while remainder[0] == COMMA:
-                args.append(arg)
-                arg, remainder = Term.parse_prefix(remainder[1:])
-            args.append(arg)
-            return Term(root, args), remainder[1:]
-        else:
-            valid_prefix_regex = '[a-zA-Z0-9]*'
-            p = re.compile(valid_prefix_regex)
-            result = p.search(s)
-            # Means we found something that matches the pattern:
-            if result != None:
-                prefix = result.group(0)
-                return Term(prefix), s[len(prefix):]
+        term, end = _parse_term_from(s, 0)
+        if term is None:
+            return None, end
+        return term, s[end:]
 
     @staticmethod
     def parse(s: str) -> Term:
@@ -212,7 +275,10 @@ class Term:
         """
 
         # Task 7.3.2
-        term, remainder = Term.parse_prefix(s)
+        term, end = _parse_term_from(s, 0)
+        assert term is not None, end
+        assert end == len(s), _parse_error(PREFIX_ERR_MSG, s, end,
+                                           'end of string')
         return term
 
     def constants(self) -> Set[str]:
@@ -413,6 +479,38 @@ class Formula:
     variable: Optional[str]
     predicate: Optional[Formula]
 
+    def __new__(cls, root: Optional[str] = None,
+                arguments_or_first_or_variable: Union[Sequence[Term], Formula,
+                                                      str, None] = None,
+                second_or_predicate: Optional[Formula] = None) -> Formula:
+        """Allocates a `Formula`, or returns the canonical formula with the
+        given root and root arguments, root operands, or root quantified
+        variable and predicate if hash-consing is enabled (see
+        `~logic_utils.set_interning`).
+
+        Parameters:
+            root: the root for the formula tree.
+            arguments_or_first_or_variable: the arguments to the the root, the
+                first operand to the root, or the variable name quantified by
+                the root.
+            second_or_predicate: the second operand to the root, or the
+                predicate quantified by the root, if any.
+
+        Returns:
+            A new formula, or an already initialized canonical one.
+        """
+        if root is None or not is_interning():
+            return super().__new__(cls)
+        if not isinstance(arguments_or_first_or_variable, (Formula, str)):
+            arguments_or_first_or_variable = \
+                tuple(arguments_or_first_or_variable)
+        key = (root, arguments_or_first_or_variable, second_or_predicate)
+        formula = _interned_formulas.get(key)
+        if formula is None:
+            formula = super().__new__(cls)
+            _interned_formulas.add(key, formula)
+        return formula
+
     def __init__(self, root: str,
                  arguments_or_first_or_variable: Union[Sequence[Term],
                                                        Formula, str],
@@ -431,6 +529,9 @@ class Formula:
                 a binary operator; the predicate quantified by the root, if the
                 root is a quantification.
         """
+        if getattr(self, '_hash', None) is not None:
+            # A canonical formula returned by __new__ is already initialized
+            return
         if is_equality(root) or is_relation(root):
             # Populate self.root and self.arguments
             assert second_or_predicate is None
@@ -459,6 +560,25 @@ class Formula:
                    second_or_predicate is not None
             self.root, self.variable, self.predicate = \
                 root, arguments_or_first_or_variable, second_or_predicate
+        self._hash = hash((self.root,) + self.__operands())
+        self._repr = None
+
+    def __operands(self) -> Tuple:
+        """Computes the operands of the root of the current formula.
+
+        Returns:
+            The arguments to the root, the operands of the root, or the
+            quantified variable name and predicate, according to the kind of
+            root of the current formula.
+        """
+        if is_equality(self.root) or is_relation(self.root):
+            return self.arguments
+        elif is_unary(self.root):
+            return self.first,
+        elif is_binary(self.root):
+            return self.first, self.second
+        else:
+            return self.variable, self.predicate
 
     def __repr__(self) -> str:
         """Computes the string representation of the current formula.
@@ -467,25 +587,55 @@ class Formula:
             The standard string representation of the current formula.
         """
         # Task 7.2
-        if is_constant(self.root) or is_variable(self.root):
-            return self.root
-        elif is_unary(self.root):
-            return f'~{str(self.first)}'
-        elif is_binary(self.root):
-            return f'({str(self.first)}{str(self.root)}{str(self.second)})'
-        elif is_equality(self.root):
-            return f'{str(self.arguments[0])}={str(self.arguments[1])}'
-        elif is_relation(self.root):
-            if self.arguments:
-                repr = f'{self.root}({str(self.arguments[0])}'
-                if self.arguments:
-                    for arg in self.arguments[1:]:
-                        repr += f',{str(arg)}'
-                    return f'{repr})'
+        if self._repr is None:
+            # The formula is immutable, so the string is computed only once
+            object.__setattr__(self, '_repr', ''.join(self._repr_tokens()))
+        return self._repr
+
+    def _repr_tokens(self) -> List[str]:
+        """Computes the tokens of the standard string representation of the
+        current formula, without recursion, reusing the cached representations
+        of subformulas that were already computed.
+
+        Returns:
+            A list of strings whose concatenation is the standard string
+            representation of the current formula.
+        """
+        tokens = []
+        pending = [self]
+        while len(pending) > 0:
+            node = pending.pop()
+            if type(node) is str:
+                tokens.append(node)
+            elif type(node) is Term:
+                tokens.append(str(node))
+            elif node._repr is not None:
+                tokens.append(node._repr)
+            elif is_unary(node.root):
+                tokens.append(node.root)
+                pending.append(node.first)
+            elif is_binary(node.root):
+                tokens.append(L_BRACK)
+                pending.extend((R_BRACK, node.second, node.root, node.first))
+            elif is_equality(node.root):
+                pending.extend((node.arguments[1], node.root,
+                                node.arguments[0]))
+            elif is_relation(node.root):
+                tokens.append(node.root)
+                tokens.append(L_BRACK)
+                pending.append(R_BRACK)
+                for i in range(len(node.arguments) - 1, 0, -1):
+                    pending.append(node.arguments[i])
+                    pending.append(COMMA)
+                if len(node.arguments) > 0:
+                    pending.append(node.arguments[0])
             else:
-                return f'{self.root}()'
-        elif is_quantifier(self.root):
-            return f'{str(self.root)}{str(self.variable)}[{str(self.predicate)}]'
+                tokens.append(node.root)
+                tokens.append(node.variable)
+                tokens.append('[')
+                pending.append(']')
+                pending.append(node.predicate)
+        return tokens
 
     def __eq__(self, other: object) -> bool:
         """Compares the current formula with the given one.
@@ -497,7 +647,34 @@ class Formula:
             ``True`` if the given object is a `Formula` object that equals the
             current formula, ``False`` otherwise.
         """
-        return isinstance(other, Formula) and str(self) == str(other)
+        if self is other:
+            return True
+        if not isinstance(other, Formula):
+            return False
+        pairs = [(self, other)]
+        # Pairs of shared subformulas are compared only once
+        compared = set()
+        while len(pairs) > 0:
+            first, second = pairs.pop()
+            if first is second or (id(first), id(second)) in compared:
+                continue
+            compared.add((id(first), id(second)))
+            if first._hash != second._hash or first.root != second.root:
+                return False
+            if is_equality(first.root) or is_relation(first.root):
+                # Terms are compared by their own structural comparison
+                if first.arguments != second.arguments:
+                    return False
+            elif is_unary(first.root):
+                pairs.append((first.first, second.first))
+            elif is_binary(first.root):
+                pairs.append((first.second, second.second))
+                pairs.append((first.first, second.first))
+            else:
+                if first.variable != second.variable:
+                    return False
+                pairs.append((first.predicate, second.predicate))
+        return True
 
     def __ne__(self, other: object) -> bool:
         """Compares the current formula with the given one.
@@ -512,7 +689,16 @@ class Formula:
         return not self == other
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self._hash
+
+    def __reduce__(self) -> Tuple[type, Tuple]:
+        # Rebuild through the constructor, so that the hash is recomputed in
+        # the unpickling process and the formula is interned there if enabled
+        operands = self.__operands()
+        if is_equality(self.root) or is_relation(self.root):
+            return Formula, (self.root, operands)
+        else:
+            return Formula, (self.root,) + operands
 
     @staticmethod
     def parse_prefix(s: str) -> Tuple[Formula, str]:
@@ -531,59 +717,10 @@ class Formula:
         """
 
         # Task 7.4.1
-        if is_quantifier(s[0]):
-            quantifier = s[0]
-            s = s[1:]
-            valid_prefix_regex = '[a-zA-Z0-9]*'
-            p = re.compile(valid_prefix_regex)
-            result = p.search(s)
-            # Means we found something that matches the pattern:
-            variable = result.group(0)
-            predicate, remainder = Formula.parse_prefix(s[len(variable) + 1:])
-            remainder = remainder[1:]
-            return Formula(quantifier, variable, predicate), remainder
-
-        # If the formula is of a binary operator, then it has to start with a '(':
-        elif s[0] == L_BRACK:
-            # ff and ff2 are the left and right hand sides of the formula, respectively
-            l_formula, remainder = Formula.parse_prefix(s[1:])
-            if is_binary(remainder[0]):
-                end_len = 1
-            elif is_binary(remainder[0:2]):
-                end_len = 2
-            root = remainder[:end_len]
-            r_formula, remainder = Formula.parse_prefix(remainder[end_len:])
-            remainder = remainder[1:]
-            return Formula(root, l_formula, r_formula), remainder
-
-        # If the formula is of a unary operator, then we only need to operate on the part that comes after the '~':
-        elif is_unary(s[0]):
-            formula, remainder = Formula.parse_prefix(s[1:])
-            return Formula(s[0], formula), remainder
-
-        # If the formula starts with 'F'...'T', then it's a relation (which is like the case of a function in "Term"),
-        # we'll   ---<==3, respectively
-        elif 'F' <= s[0] <= 'T':  # prefix is function
-            root, args, start_marker = '', [], 0
-            # finding the root of the function
-            for i, c in enumerate(s):
-                if c == L_BRACK:
-                    root, start_marker = s[0:i], i + 1
-                    break
-            if s[i + 1] == R_BRACK:
-                return Formula(root, []), s[i + 2:]
-            arg, remainder = Term.parse_prefix(s[start_marker:])
-            while remainder[0] == COMMA:
-                args.append(arg)
-                arg, remainder = Term.parse_prefix(remainder[1:])
-            args.append(arg)
-            return Formula(root, args), remainder[1:]
-
-        else:
-            l_formula, remainder = Term.parse_prefix(s)
-            root = remainder[0]
-            r_formula, remainder = Term.parse_prefix(remainder[1:])
-            return Formula(root, [l_formula, r_formula]), remainder
+        formula, end = _parse_formula_from(s, 0)
+        if formula is None:
+            return None, end
+        return formula, s[end:]
 
     @staticmethod
     def parse(s: str) -> Formula:
@@ -595,10 +732,13 @@ class Formula:
         Returns:
             A formula whose standard string representation is the given string.
         """
-        formula, remainder = Formula.parse_prefix(s)
+        # Task 7.4.2
+        formula, end = _parse_formula_from(s, 0)
+        assert formula is not None, end
+        assert end == len(s), _parse_error(FORMULA_PREFIX_ERR_MSG, s, end,
+                                           'end of string')
         return formula
 
-    # Task 7.4.2
 
     def constants(self) -> Set[str]:
         """Finds all constant names in the current formula.
@@ -853,3 +993,188 @@ class Formula:
                 l_arg = Formula.from_propositional_skeleton(skeleton.first, substitution_map)
                 r_arg = Formula.from_propositional_skeleton(skeleton.second, substitution_map)
                 return Formula(root, l_arg, r_arg)
+
+
+_NAME_PATTERN = re.compile('[a-zA-Z0-9]+|_')
+
+
+def _parse_error(message: str, s: str, position: int, expected: str) -> str:
+    """Formats a human-readable parsing error message.
+
+    Parameters:
+        message: the kind of error.
+        s: string that was being parsed.
+        position: offset in the given string at which parsing failed.
+        expected: description of what was expected at that offset.
+
+    Returns:
+        An error message stating the offset and what was expected there.
+    """
+    found = 'end of string' if position >= len(s) else repr(s[position])
+    return f'{message}: expected {expected} at offset {position}, found {found}'
+
+
+def _parse_term_from(s: str, position: int) -> Tuple[Union[Term, None],
+                                                      Union[int, str]]:
+    """Parses the term starting at the given offset of the given string, in a
+    single left-to-right pass and without recursion.
+
+    Parameters:
+        s: string to parse.
+        position: offset in the given string at which to start parsing.
+
+    Returns:
+        A pair of the parsed term and the offset just past it in the given
+        string, or of ``None`` and an error message stating the offset at which
+        no term could be parsed.
+    """
+    # Each pending entry is a pair of a function name and the arguments to it
+    # that were parsed so far
+    pending = []
+    while True:
+        match = _NAME_PATTERN.match(s, position)
+        if match is None:
+            return None, _parse_error(PREFIX_ERR_MSG, s, position, 'a term')
+        name = match.group()
+        if is_function(name):
+            position = match.end()
+            if not s.startswith(L_BRACK, position):
+                return None, _parse_error(PREFIX_ERR_MSG, s, position,
+                                          repr(L_BRACK))
+            pending.append((name, []))
+            position += 1
+            continue
+        if not (is_constant(name) or is_variable(name)):
+            return None, _parse_error(PREFIX_ERR_MSG, s, position, 'a term')
+        term = Term(name)
+        position = match.end()
+
+        # Complete every function invocation whose arguments are now all parsed
+        while len(pending) > 0:
+            function, arguments = pending[-1]
+            arguments.append(term)
+            if s.startswith(COMMA, position):
+                position += 1
+                break
+            elif s.startswith(R_BRACK, position):
+                pending.pop()
+                term = Term(function, arguments)
+                position += 1
+            else:
+                return None, _parse_error(PREFIX_ERR_MSG, s, position,
+                                          repr(COMMA) + ' or ' + repr(R_BRACK))
+        else:
+            return term, position
+
+
+def _parse_formula_from(s: str, position: int) -> Tuple[Union[Formula, None],
+                                                         Union[int, str]]:
+    """Parses the formula starting at the given offset of the given string, in
+    a single left-to-right pass and without recursion.
+
+    Parameters:
+        s: string to parse.
+        position: offset in the given string at which to start parsing.
+
+    Returns:
+        A pair of the parsed formula and the offset just past it in the given
+        string, or of ``None`` and an error message stating the offset at which
+        no formula could be parsed.
+    """
+    # Each pending entry is one of: a pair of a quantifier and its variable
+    # name, waiting for the predicate; '~', waiting for its operand; '(',
+    # waiting for the first operand of a binary operator; or a triple of '(',
+    # the first operand and the binary operator, waiting for the second operand
+    pending = []
+    length = len(s)
+    while True:
+        # Skip over prefix operators and quantifications
+        while position < length:
+            if is_unary(s[position]) or s[position] == L_BRACK:
+                pending.append((s[position],))
+                position += 1
+            elif is_quantifier(s[position]):
+                match = _NAME_PATTERN.match(s, position + 1)
+                if match is None or not is_variable(match.group()):
+                    return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s,
+                                              position + 1, 'a variable name')
+                if not s.startswith('[', match.end()):
+                    return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s,
+                                              match.end(), "'['")
+                pending.append((s[position], match.group()))
+                position = match.end() + 1
+            else:
+                break
+
+        # Parse a relation invocation or an equality
+        match = _NAME_PATTERN.match(s, position)
+        if match is not None and is_relation(match.group()):
+            relation = match.group()
+            position = match.end()
+            if not s.startswith(L_BRACK, position):
+                return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s, position,
+                                          repr(L_BRACK))
+            position += 1
+            arguments = []
+            if s.startswith(R_BRACK, position):
+                position += 1
+            else:
+                while True:
+                    term, position = _parse_term_from(s, position)
+                    if term is None:
+                        return None, position
+                    arguments.append(term)
+                    if s.startswith(R_BRACK, position):
+                        position += 1
+                        break
+                    if not s.startswith(COMMA, position):
+                        return None, _parse_error(
+                            FORMULA_PREFIX_ERR_MSG, s, position,
+                            repr(COMMA) + ' or ' + repr(R_BRACK))
+                    position += 1
+            formula = Formula(relation, arguments)
+        else:
+            left, position = _parse_term_from(s, position)
+            if left is None:
+                return None, position
+            if not s.startswith('=', position):
+                return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s, position,
+                                          "'='")
+            right, position = _parse_term_from(s, position + 1)
+            if right is None:
+                return None, position
+            formula = Formula('=', [left, right])
+
+        # Complete every pending construct whose operands are now all parsed
+        while len(pending) > 0:
+            top = pending[-1]
+            if is_unary(top[0]):
+                pending.pop()
+                formula = Formula(top[0], formula)
+            elif len(top) == 1:
+                for operator_length in (2, 1):
+                    operator = s[position:position + operator_length]
+                    if is_binary(operator):
+                        break
+                else:
+                    return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s,
+                                              position, 'a binary operator')
+                pending[-1] = (L_BRACK, formula, operator)
+                position += len(operator)
+                break
+            elif len(top) == 3:
+                if not s.startswith(R_BRACK, position):
+                    return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s,
+                                              position, repr(R_BRACK))
+                pending.pop()
+                formula = Formula(top[2], top[1], formula)
+                position += 1
+            else:
+                if not s.startswith(']', position):
+                    return None, _parse_error(FORMULA_PREFIX_ERR_MSG, s,
+                                              position, "']'")
+                pending.pop()
+                formula = Formula(top[0], top[1], formula)
+                position += 1
+        else:
+            return formula, position
@@ -5,6 +5,10 @@
 
 """Tests for the predicates.syntax module."""
 
+import pickle
+
+from logic_utils import set_interning
+
 from predicates.syntax import *
 
 def test_term_repr(debug=False):
@@ -358,13 +362,97 @@ def test_from_propositional_skeleton(debug=False):
                   'returned', formula)
         assert str(formula) == expected
 
+def test_parse_error_offset(debug=False):
+    for s, offset in [('', 0), ('f(x', 3), ('f(x,', 4), ('e', 0), ('g x', 1)]:
+        if debug:
+            print('Testing error offset of parsing a prefix of', s,
+                  'as a Term')
+        term, remainder = Term.parse_prefix(s)
+        assert term is None
+        assert 'offset ' + str(offset) + ',' in remainder, remainder
+    for s, offset in [('R(x', 3), ('(R(x)&R(y)', 10), ('Ax[R(x)', 7),
+                      ('A1[R(x)]', 1), ('(x=y=z)', 4), ('x', 1),
+                      ('(R(x)<->R(y))', 5)]:
+        if debug:
+            print('Testing error offset of parsing a prefix of', s,
+                  'as a Formula')
+        formula, remainder = Formula.parse_prefix(s)
+        assert formula is None
+        assert 'offset ' + str(offset) + ',' in remainder, remainder
+
+def test_parse_deeply_nested(debug=False):
+    n = 20000
+    s = 's(' * n + '0' + ')' * n
+    if debug:
+        print('Testing parsing of a term of length', len(s))
+    term = Term.parse(s)
+    for i in range(n):
+        term = term.arguments[0]
+    assert str(term) == '0'
+    s = '~Ax[' * n + 'R(x)' + ']' * n
+    if debug:
+        print('Testing parsing of a formula of length', len(s))
+    formula = Formula.parse(s)
+    for i in range(n):
+        formula = formula.first.predicate
+    assert str(formula) == 'R(x)'
+    for s in ['f(' * n + 'x,0' + ')' * n, 's(' * n + '0' + ')' * n]:
+        if debug:
+            print('Testing representation and equality of a term of length',
+                  len(s))
+        assert str(Term.parse(s)) == s
+        assert Term.parse(s) == Term.parse(s)
+    assert Term.parse('f(' * n + 'x,0' + ')' * n) != \
+           Term.parse('f(' * n + 'x,1' + ')' * n)
+    for s in ['~Ax[' * n + 'R(x)' + ']' * n,
+              '(R(x)->' * n + 'f(x)=0' + ')' * n,
+              '(Q()|' * n + 'R(' + 's(' * n + '0' + ')' * n + ',x)' + ')' * n]:
+        if debug:
+            print('Testing representation and equality of a formula of '
+                  'length', len(s))
+        assert str(Formula.parse(s)) == s
+        assert Formula.parse(s) == Formula.parse(s)
+    assert Formula.parse('~Ax[' * n + 'R(x)' + ']' * n) != \
+           Formula.parse('~Ax[' * n + 'R(y)' + ']' * n)
+
+def test_interning(debug=False):
+    previous = set_interning(True)
+    try:
+        for s in ['f(s(0),x)', 'plus(x,plus(y,z))', '_']:
+            if debug:
+                print('Testing interning of the term', s)
+            term = Term.parse(s)
+            assert Term.parse(s) is term
+            assert pickle.loads(pickle.dumps(term)) is term
+        for s in ['R(x,f(c))', '(Ax[x=y]->~Q())', 'Ex[(R(x)&R(x))]']:
+            if debug:
+                print('Testing interning of the formula', s)
+            formula = Formula.parse(s)
+            assert Formula.parse(s) is formula
+            assert pickle.loads(pickle.dumps(formula)) is formula
+        formula = Formula.parse('(R(f(x))|R(f(x)))')
+        assert formula.first is formula.second
+        assert formula.first.arguments[0] is Term.parse('f(x)')
+    finally:
+        set_interning(previous)
+    if debug:
+        print('Testing that terms are not interned by default')
+    term = Term.parse('f(x)')
+    assert Term.parse('f(x)') is not term
+    assert Term.parse('f(x)') == term
+    assert hash(Term.parse('f(x)')) == hash(term)
+
+
 def test_ex7(debug=False):
     test_term_repr(debug) 
     test_formula_repr(debug)
     test_term_parse_prefix(debug)
     test_term_parse(debug)
     test_formula_parse_prefix(debug)
+    test_parse_error_offset(debug)
     test_formula_parse(debug)
+    test_interning(debug)
+    test_parse_deeply_nested(debug)
     test_term_constants(debug)
     test_term_variables(debug)
     test_term_functions(debug)
@@ -0,0 +1,332 @@
+# (c) This file is part of the course
+# Mathematical Logic through Programming
+# by Gonczarowski and Nisan.
+# File name: propositions/bdd.py
+
+"""Reduced ordered binary decision diagrams (BDDs) of propositional formulae.
+
+A BDD node is identified by an integer, with ``0`` and ``1`` being the
+constant false and true nodes. Since all BDDs of a `BddManager` share their
+nodes and no two distinct nodes have the same variable and children, two
+formulae converted by the same manager are equivalent if and only if their
+nodes are the same integer.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from propositions.syntax import *
+from propositions.semantics import Model
+
+#: The node of the constant false function
+FALSE_NODE = 0
+
+#: The node of the constant true function
+TRUE_NODE = 1
+
+# The level of the constant nodes, below the level of any variable
+_CONSTANT_LEVEL = float('inf')
+
+# The if-then-else operands that compute each operator from the nodes `a` and
+# `b` of its operands and the node `not_b` of the negation of the second one
+_ITE_OPERANDS = {
+    '&': lambda a, b, not_b: (a, b, FALSE_NODE),
+    '|': lambda a, b, not_b: (a, TRUE_NODE, b),
+    '->': lambda a, b, not_b: (a, b, TRUE_NODE),
+    '+': lambda a, b, not_b: (a, not_b, b),
+    '<->': lambda a, b, not_b: (a, b, not_b),
+    '-&': lambda a, b, not_b: (a, not_b, TRUE_NODE),
+    '-|': lambda a, b, not_b: (a, FALSE_NODE, not_b),
+}
+
+
+class BddManager:
+    """A store of shared BDD nodes over an ordered list of variables.
+
+    Attributes:
+        variables: the variables of the manager, in the order in which they
+            are tested along every path of every BDD.
+    """
+    variables: List[str]
+
+    def __init__(self, variables: Iterable[str] = ()) -> None:
+        """Initializes a `BddManager` with the given variable order.
+
+        Parameters:
+            variables: initial variables of the manager, in order. Variables
+                of later converted formulae that are not among these are
+                appended to the order as they are encountered.
+        """
+        self.variables = []
+        self.__levels_of_variables: Dict[str, int] = {}
+        self.__levels: List[float] = [_CONSTANT_LEVEL, _CONSTANT_LEVEL]
+        self.__lows = [FALSE_NODE, TRUE_NODE]
+        self.__highs = [FALSE_NODE, TRUE_NODE]
+        # Maps each (level, low, high) triple to its node
+        self.__unique: Dict[Tuple[int, int, int], int] = {}
+        # Maps each computed if-then-else triple to its node
+        self.__computed: Dict[Tuple[int, int, int], int] = {}
+        for variable in variables:
+            self.__level_of(variable)
+
+    def __len__(self) -> int:
+        """Computes the number of nodes of the manager.
+
+        Returns:
+            The number of nodes of the manager, including the two constant
+            nodes.
+        """
+        return len(self.__levels)
+
+    def __level_of(self, variable: str) -> int:
+        level = self.__levels_of_variables.get(variable)
+        if level is None:
+            assert is_variable(variable)
+            level = len(self.variables)
+            self.variables.append(variable)
+            self.__levels_of_variables[variable] = level
+        return level
+
+    def __node(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.__unique.get(key)
+        if node is None:
+            node = len(self.__levels)
+            self.__levels.append(level)
+            self.__lows.append(low)
+            self.__highs.append(high)
+            self.__unique[key] = node
+        return node
+
+    def variable(self, variable: str) -> int:
+        """Computes the node of the given variable.
+
+        Parameters:
+            variable: variable whose node is to be computed.
+
+        Returns:
+            The node that is true exactly in models in which the given
+            variable is true.
+        """
+        return self.__node(self.__level_of(variable), FALSE_NODE, TRUE_NODE)
+
+    def ite(self, condition: int, then: int, otherwise: int) -> int:
+        """Computes the node of an if-then-else of the given nodes.
+
+        Parameters:
+            condition: node of the condition.
+            then: node whose value is taken where the condition holds.
+            otherwise: node whose value is taken where the condition does not
+                hold.
+
+        Returns:
+            The node that agrees with `then` in models where `condition` holds
+            and with `otherwise` in models where it does not.
+        """
+        levels, lows, highs = self.__levels, self.__lows, self.__highs
+        computed = self.__computed
+        results = []
+        # Each task is either a triple to compute, or a (level, key) pair to
+        # combine the two most recently computed cofactors of
+        tasks = [(condition, then, otherwise)]
+        while len(tasks) > 0:
+            task = tasks.pop()
+            if len(task) == 2:
+                level, key = task
+                low = results.pop()
+                high = results.pop()
+                node = self.__node(level, low, high)
+                computed[key] = node
+                results.append(node)
+                continue
+            f, g, h = task
+            if f == TRUE_NODE or g == h:
+                results.append(g)
+            elif f == FALSE_NODE:
+                results.append(h)
+            elif g == TRUE_NODE and h == FALSE_NODE:
+                results.append(f)
+            elif task in computed:
+                results.append(computed[task])
+            else:
+                level = min(levels[f], levels[g], levels[h])
+                cofactors = [(lows[n], highs[n]) if levels[n] == level
+                             else (n, n) for n in task]
+                tasks.append((level, task))
+                tasks.append(tuple(cofactor[0] for cofactor in cofactors))
+                tasks.append(tuple(cofactor[1] for cofactor in cofactors))
+        return results[0]
+
+    def negate(self, node: int) -> int:
+        """Computes the node of the negation of the given node.
+
+        Parameters:
+            node: node to negate.
+
+        Returns:
+            The node that is true exactly where the given node is false.
+        """
+        return self.ite(node, FALSE_NODE, TRUE_NODE)
+
+    def from_formula(self, formula: Formula) -> int:
+        """Converts the given formula to a node of the manager.
+
+        Parameters:
+            formula: formula to convert.
+
+        Returns:
+            The node that is true exactly in the models of the given formula.
+        """
+        nodes: Dict[Formula, int] = {}
+        pending = [formula]
+        while len(pending) > 0:
+            current = pending[-1]
+            if current in nodes:
+                pending.pop()
+                continue
+            root = current.root
+            if is_variable(root):
+                nodes[current] = self.variable(root)
+            elif is_constant(root):
+                nodes[current] = TRUE_NODE if root == 'T' else FALSE_NODE
+            elif current.first not in nodes:
+                pending.append(current.first)
+                continue
+            elif is_unary(root):
+                nodes[current] = self.negate(nodes[current.first])
+            elif current.second not in nodes:
+                pending.append(current.second)
+                continue
+            else:
+                first, second = nodes[current.first], nodes[current.second]
+                not_second = self.negate(second) \
+                    if root in {'+', '<->', '-&', '-|'} else None
+                nodes[current] = \
+                    self.ite(*_ITE_OPERANDS[root](first, second, not_second))
+            pending.pop()
+        return nodes[formula]
+
+    def is_equivalent(self, first: Formula, second: Formula) -> bool:
+        """Checks if the two given formulae are equivalent.
+
+        Parameters:
+            first: first formula to check.
+            second: second formula to check.
+
+        Returns:
+            ``True`` if the given formulae have the same value in every model,
+            ``False`` otherwise.
+
+        Examples:
+            >>> manager = BddManager()
+            >>> manager.is_equivalent(Formula.parse('(p->q)'),
+            ...                       Formula.parse('(~q->~p)'))
+            True
+        """
+        return self.from_formula(first) == self.from_formula(second)
+
+    def support(self, node: int) -> Set[str]:
+        """Finds the variables on which the given node depends.
+
+        Parameters:
+            node: node whose variables are to be found.
+
+        Returns:
+            The variables tested in the BDD of the given node.
+        """
+        seen = set()
+        pending = [node]
+        while len(pending) > 0:
+            current = pending.pop()
+            if current > TRUE_NODE and current not in seen:
+                seen.add(current)
+                pending.append(self.__lows[current])
+                pending.append(self.__highs[current])
+        return {self.variables[self.__levels[current]] for current in seen}
+
+    def count_models(self, node: int,
+                     variables: Optional[Iterable[str]] = None) -> int:
+        """Counts the models in which the given node is true.
+
+        Parameters:
+            node: node whose models are to be counted.
+            variables: variables of the models to count, which should contain
+                all variables on which the given node depends, or ``None`` to
+                count models over exactly those variables.
+
+        Returns:
+            The number of models over the given variables in which the given
+            node is true.
+        """
+        support = self.support(node)
+        variables = support if variables is None else set(variables)
+        assert support.issubset(variables)
+        levels, lows, highs = self.__levels, self.__lows, self.__highs
+        count = len(self.variables)
+
+        def level(n: int) -> int:
+            return count if n <= TRUE_NODE else levels[n]
+
+        # Maps each node to its number of models over the variables at and
+        # below its level
+        counts = {FALSE_NODE: 0, TRUE_NODE: 1}
+        pending = [node]
+        while len(pending) > 0:
+            current = pending[-1]
+            if current in counts:
+                pending.pop()
+                continue
+            low, high = lows[current], highs[current]
+            if low not in counts:
+                pending.append(low)
+            elif high not in counts:
+                pending.append(high)
+            else:
+                pending.pop()
+                counts[current] = \
+                    (counts[low] << (level(low) - level(current) - 1)) + \
+                    (counts[high] << (level(high) - level(current) - 1))
+        # Adjust the count over all the variables of the manager to a count
+        # over the given variables
+        total = counts[node] << level(node)
+        outside = len([variable for variable in self.variables
+                       if variable not in variables])
+        extra = len(variables.difference(self.variables))
+        return (total >> outside) << extra
+
+    def satisfying_model(self, node: int) -> Optional[Model]:
+        """Finds a model in which the given node is true.
+
+        Parameters:
+            node: node to satisfy.
+
+        Returns:
+            A model over exactly the variables on which the given node depends
+            in which it is true, or ``None`` if there is no such model.
+        """
+        if node == FALSE_NODE:
+            return None
+        model = {variable: False for variable in self.support(node)}
+        while node != TRUE_NODE:
+            variable = self.variables[self.__levels[node]]
+            if self.__lows[node] != FALSE_NODE:
+                node = self.__lows[node]
+            else:
+                model[variable] = True
+                node = self.__highs[node]
+        return model
+
+
+def is_equivalent(first: Formula, second: Formula) -> bool:
+    """Checks if the two given formulae are equivalent by comparing their BDDs.
+
+    Parameters:
+        first: first formula to check.
+        second: second formula to check.
+
+    Returns:
+        ``True`` if the given formulae have the same value in every model,
+        ``False`` otherwise.
+    """
+    return BddManager().is_equivalent(first, second)
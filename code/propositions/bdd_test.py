@@ -0,0 +1,42 @@
+# (c) This file is part of the course
+# Mathematical Logic through Programming
+# by Gonczarowski and Nisan.
+# File name: propositions/bdd_test.py
+
+"""Tests for the propositions.bdd module."""
+
+from propositions.syntax import *
+from propositions.semantics import *
+from propositions.operators import *
+from propositions.bdd import *
+from propositions.operators_test import many_fs
+
+def test_bdd(debug=False):
+    manager = BddManager()
+    for f in many_fs:
+        if debug:
+            print('Testing BDD equivalence of', f, 'to its conversions')
+        f = Formula.parse(f)
+        node = manager.from_formula(f)
+        assert (node == TRUE_NODE) == is_tautology(f)
+        assert (node == FALSE_NODE) == is_contradiction(f)
+        variables = sorted(f.variables().union({'w'}))
+        assert manager.count_models(node, variables) == \
+               sum(evaluate(f, model) for model in all_models(variables))
+        model = manager.satisfying_model(node)
+        if model is None:
+            assert node == FALSE_NODE
+        else:
+            assert evaluate(f, {**{v: False for v in f.variables()}, **model})
+        for convert in [to_not_and_or, to_not_and, to_nand, to_implies_not,
+                        to_implies_false]:
+            assert manager.from_formula(convert(f)) == node
+        assert manager.is_equivalent(Formula('~', f), Formula('-&', f, f))
+    assert not is_equivalent(Formula.parse('(p->q)'), Formula.parse('(q->p)'))
+
+def test_ex3(debug=False):
+    assert is_binary('+'), 'Change is_binary() before testing Chapter 3 tasks.'
+    test_bdd(debug)
+
+def test_all(debug=False):
+    test_ex3(debug)
@@ -5,6 +5,8 @@
 
 """Useful proof manipulation maneuvers in propositional logic."""
 
+from typing import Iterable, Iterator, Tuple
+
 from propositions.syntax import *
 from propositions.proofs import *
 from propositions.axiomatic_systems import *
@@ -40,7 +42,8 @@ def prove_corollary(antecedent_proof: Proof, consequent: Formula,
     lines = [line for line in antecedent_proof.lines]
     lines.append(Proof.Line(Formula('->', antecedent_proof.statement.conclusion, consequent), conditional, []))
     lines.append(Proof.Line(consequent, MP, [len(lines) - 2, len(lines) - 1]))
-    return Proof(statement, rules, lines)
+    return antecedent_proof.extended(
+        statement, rules, lines[len(antecedent_proof.lines):])
 
 
 def combine_proofs(antecedent1_proof: Proof, antecedent2_proof: Proof,
@@ -77,6 +80,29 @@ def combine_proofs(antecedent1_proof: Proof, antecedent2_proof: Proof,
                     Formula('->', antecedent2_proof.statement.conclusion, consequent))
     ).is_specialization_of(double_conditional)
     # Task 5.3b
+    return _combine_proofs(antecedent1_proof, antecedent2_proof, consequent,
+                           double_conditional)
+
+
+def _combine_proofs(antecedent1_proof: Proof, antecedent2_proof: Proof,
+                    consequent: Formula,
+                    double_conditional: InferenceRule) -> Proof:
+    """Combines the given proofs like `combine_proofs`, without checking them.
+
+    Parameters:
+        antecedent1_proof: proof of `antecedent1` that is known to be valid.
+        antecedent2_proof: proof of `antecedent2` from the same assumptions
+            and inference rules as `antecedent1_proof`, that is known to be
+            valid.
+        consequent: formula to prove.
+        double_conditional: assumptionless inference rule of which the
+            assumptionless inference rule with conclusion
+            ``'(``\ `antecedent1`\ ``->(``\ `antecedent2`\ ``->``\ `consequent`\ ``))'``
+            is a specialization.
+
+    Returns:
+        The proof returned by `combine_proofs` for the given arguments.
+    """
     statement = InferenceRule(antecedent1_proof.statement.assumptions, consequent)
     rules = antecedent1_proof.rules.union({double_conditional, MP})
     lines = [line for line in antecedent1_proof.lines]
@@ -90,7 +116,8 @@ def combine_proofs(antecedent1_proof: Proof, antecedent2_proof: Proof,
               antecedent2_proof.lines]
     lines.append(Proof.Line(f2, MP, [line_number - 1, line_number]))
     lines.append(Proof.Line(consequent, MP, [len(lines) - 2, len(lines) - 1]))
-    return Proof(statement, rules, lines)
+    return antecedent1_proof.extended(
+        statement, rules, lines[len(antecedent1_proof.lines):])
 
 
 def remove_assumption(proof: Proof) -> Proof:
@@ -118,6 +145,20 @@ def remove_assumption(proof: Proof) -> Proof:
     for rule in proof.rules:
         assert rule == MP or len(rule.assumptions) == 0
     # Task 5.4
+    return _remove_assumption(proof)
+
+
+def _remove_assumption(proof: Proof) -> Proof:
+    """Converts the given proof like `remove_assumption`, without checking it.
+
+    Parameters:
+        proof: proof that is known to be valid, with at least one assumption,
+            via some set of inference rules all of which have no assumptions
+            except perhaps `~propositions.axiomatic_systems.MP`.
+
+    Returns:
+        The proof returned by `remove_assumption` for the given proof.
+    """
     antecedent = proof.statement.assumptions[-1]
     consequent = proof.statement.conclusion
     statement = InferenceRule(proof.statement.assumptions[:-1], Formula(IMPLIES, antecedent, consequent))
@@ -196,6 +237,70 @@ def _deduction_I0(lines, antecendent, line):
     return 0
 
 
+def lines_without_assumption(lines: Iterable[Tuple[Proof.Line, int]],
+                             antecedent: Formula) -> \
+        Iterator[Tuple[Proof.Line, int]]:
+    """Converts the given lines of a proof that has the given formula as an
+    assumption, one by one, into the lines of the proof returned by
+    `remove_assumption` for it.
+
+    Parameters:
+        lines: pairs of the lines of a valid proof whose last assumption is the
+            given formula, via some set of inference rules all of which have no
+            assumptions except perhaps `~propositions.axiomatic_systems.MP`,
+            and of the number of times that later lines use each of them, as
+            returned by `~propositions.proofs.line_use_counts`.
+        antecedent: the assumption to remove.
+
+    Returns:
+        An iterator over pairs of the lines of the proof returned by
+        `remove_assumption` for the given proof and of their use counts. Only
+        the formula and new line index of each given line that is still used
+        by later given lines are stored, so the memory used is proportional to
+        the largest number of given lines that are in use at once, rather than
+        to the number of given lines.
+    """
+    # The formula, the index of the new line that proves the implication from
+    # the antecedent to that formula, and the remaining use count, of each
+    # given line that is still used by later given lines
+    live = {}
+    count = 0
+    for line_number, (line, uses) in enumerate(lines):
+        formula = line.formula
+        implication = Formula(IMPLIES, antecedent, formula)
+        if formula == antecedent:
+            yield Proof.Line(implication, I0, []), uses
+            count += 1
+        elif line.is_assumption() or not line.assumptions:
+            yield line, 1
+            yield Proof.Line(Formula(IMPLIES, formula, implication), I1, []), 1
+            yield Proof.Line(implication, MP, [count, count + 1]), uses
+            count += 3
+        else:
+            # The line is justified by MP from an antecedent line and a
+            # conditional line
+            first, second = line.assumptions
+            conditional = Formula(IMPLIES, antecedent, live[second][0])
+            distributed = Formula(
+                IMPLIES, Formula(IMPLIES, antecedent, live[first][0]),
+                implication)
+            yield Proof.Line(Formula(IMPLIES, conditional, distributed), D,
+                             []), 1
+            yield Proof.Line(distributed, MP, [live[second][1], count]), 1
+            yield Proof.Line(implication, MP,
+                             [live[first][1], count + 1]), uses
+            count += 3
+        if not line.is_assumption():
+            # Every line justified by MP releases its premises, including a
+            # line that rederives the antecedent and is replaced by I0
+            for i in line.assumptions:
+                live[i][2] -= 1
+                if live[i][2] == 0:
+                    del live[i]
+        if uses > 0:
+            live[line_number] = [formula, count - 1, uses]
+
+
 def proof_from_inconsistency(proof_of_affirmation: Proof,
                              proof_of_negation: Proof, conclusion: Formula) -> \
         Proof:
@@ -274,4 +379,5 @@ def prove_by_contradiction(proof: Proof) -> Proof:
     l_MP2 = Proof.Line(formula, MP, [len(lines) - 2, len(lines) - 1])
     lines.append(l_MP2)
 
-    return Proof(statement, rules, lines)
+    return proof_removed.extended(statement, rules,
+                                  lines[len(proof_removed.lines):])
@@ -205,6 +205,46 @@ def test_remove_assumption(debug=False):
         assert pp.rules.issubset(p.rules.union({MP,I0,I1,D}))
         assert pp.is_valid(), offending_line(pp)
 
+def test_lines_without_assumption(debug=False):
+    # Each block of lines rederives the antecedent p by MP, so its premises
+    # are used by the rederiving line only
+    q, p = Formula('q'), Formula('p')
+    qp = Formula('->', q, p)
+    lines = []
+    for i in range(50):
+        lines.extend([Proof.Line(q), Proof.Line(qp),
+                      Proof.Line(p, MP, [len(lines), len(lines) + 1])])
+    proof = Proof(InferenceRule([q, qp, p], p), {MP}, lines)
+    assert proof.is_valid()
+    if debug:
+        print('Testing lines_without_assumption on a proof of length',
+              len(lines), 'that rederives its last assumption')
+    generated = lines_without_assumption(
+        zip(proof.lines, line_use_counts(proof.lines)), p)
+    new_lines = []
+    for line, uses in generated:
+        new_lines.append(line)
+        # Only the premises of the current block are stored
+        assert len(generated.gi_frame.f_locals['live']) <= 2
+    assert [str(line) for line in new_lines] == \
+           [str(line) for line in remove_assumption(proof).lines]
+
+    from propositions.some_proofs import prove_and_commutativity
+    for proof in [prove_and_commutativity(), DISJUNCTION_ROTATION_PROOF]:
+        while any(r != MP and len(r.assumptions) > 0 for r in proof.rules):
+            rule = next(r for r in proof.rules
+                        if r != MP and len(r.assumptions) > 0)
+            proof = inline_proof(proof, prove_from_encoding(rule))
+        if debug:
+            print('Testing lines_without_assumption on:', proof)
+        pairs = list(lines_without_assumption(
+            zip(proof.lines, line_use_counts(proof.lines)),
+            proof.statement.assumptions[-1]))
+        new_lines = [line for line, _ in pairs]
+        assert [str(line) for line in new_lines] == \
+               [str(line) for line in remove_assumption(proof).lines]
+        assert [uses for _, uses in pairs] == line_use_counts(new_lines)
+
 def test_proof_from_inconsistency(debug=False):
     assumptions = (Formula.parse('(~~p->~~q)'), Formula.parse('p'),
                    Formula.parse('~q'))
@@ -262,6 +302,7 @@ def test_ex5(debug=False):
     test_prove_corollary(debug)
     test_combine_proofs(debug)
     test_remove_assumption(debug)
+    test_lines_without_assumption(debug)
     test_proof_from_inconsistency(debug)
     test_prove_by_contradiction(debug)
 
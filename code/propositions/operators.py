@@ -165,3 +165,44 @@ def to_implies_false(formula: Formula) -> Formula:
 
     formula = to_implies_not(formula)
     return formula.substitute_operators(sub_dict)
+
+
+def formula_size(formula: Formula, shared: bool = True) -> int:
+    """Computes the size of the given formula.
+
+    The conversion functions of this module share the conversions of operands
+    between all their occurrences in the converted formula, so the number of
+    distinct subformula objects of a converted formula is linear in that of
+    the given formula, even when its standard string representation is
+    exponentially long.
+
+    Parameters:
+        formula: formula to measure.
+        shared: whether to count each distinct subformula object once, rather
+            than once per occurrence as in the formula tree.
+
+    Returns:
+        The number of distinct subformula objects of the given formula if
+        `shared` is ``True``, or the number of nodes of its formula tree
+        otherwise.
+
+    Examples:
+        >>> p = Formula('p')
+        >>> formula = Formula('&', Formula('|', p, p), Formula('|', p, p))
+        >>> formula_size(formula, shared=False)
+        7
+        >>> formula_size(to_nand(Formula('~', Formula('~', p)))) <= 3
+        True
+    """
+    subformulae = formula.subformulae()
+    if shared:
+        return len(subformulae)
+    sizes = {}
+    for node in subformulae:
+        size = 1
+        if is_unary(node.root) or is_binary(node.root):
+            size += sizes[id(node.first)]
+        if is_binary(node.root):
+            size += sizes[id(node.second)]
+        sizes[id(node)] = size
+    return sizes[id(formula)]
@@ -8,6 +8,7 @@
 from propositions.syntax import *
 from propositions.semantics import *
 from propositions.operators import *
+from propositions.bdd import *
 
 many_fs = ['F', 'T', 'r', '~x', '(x+y)', '(x<->y)', '(x-&y)', '(x-|y)', '(x|y)',
            '(x->y)', '(x&y)', '(x&x)', '(p&q)', '(x|(y&z))', '~(~x|~(y|z))',
@@ -84,6 +85,23 @@ def test_to_implies_false(debug=False):
                str(ff) + ' contains wrong operators'
         assert is_tautology(Formula('<->', f, ff))
 
+def test_dag_translation(debug=False):
+    f = Formula('x0')
+    for i in range(1, 100):
+        f = Formula('<->' if i % 2 == 0 else '+', f, Formula('x' + str(i)))
+    manager = BddManager()
+    node = manager.from_formula(f)
+    for convert in [to_not_and_or, to_not_and, to_nand, to_implies_not,
+                    to_implies_false]:
+        if debug:
+            print('Testing that', convert.__name__,
+                  'of a nested formula with 100 variables is linear in size')
+        ff = convert(f)
+        assert formula_size(ff) <= 25 * formula_size(f)
+        assert formula_size(ff, shared=False) > 2 ** 100
+        assert manager.from_formula(ff) == node
+    assert formula_size(f, shared=False) == formula_size(f) == 199
+
 def test_ex3(debug=False):
     assert is_binary('+'), 'Change is_binary() before testing Chapter 3 tasks.'
     test_operators_defined(debug)
@@ -92,6 +110,7 @@ def test_ex3(debug=False):
     test_to_nand(debug)
     test_to_implies_not(debug)
     test_to_implies_false(debug)
+    test_dag_translation(debug)
 
 def test_all(debug=False):
     test_ex3(debug)
@@ -0,0 +1,185 @@
+# (c) This file is part of the course
+# Mathematical Logic through Programming
+# by Gonczarowski and Nisan.
+# File name: propositions/proof_cache.py
+
+"""A cache of proofs of tautologies for
+`~propositions.tautology.prove_tautology_cached`, keyed by their formulae up to
+the names of their variables.
+
+A formula is cached under its canonical form, in which its variables are
+renamed to ``'z1'``, ``'z2'``, ... by the order of their first occurrence, so
+that, e.g., ``'(z1->z1)'`` and ``'(z7->z7)'`` share a single cache entry. A
+cached proof of a canonical form is specialized into a proof of any formula
+with that canonical form.
+"""
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from propositions.syntax import *
+from propositions.proofs import *
+
+#: Default number of proofs that a `ProofCache` holds in memory
+PROOF_CACHE_CAPACITY = 256
+
+
+def canonical_form(formula: Formula) -> Tuple[Formula, Dict[str, Formula]]:
+    """Renames the variables of the given formula to ``'z1'``, ``'z2'``, ...,
+    by the order of their first occurrence in it.
+
+    Parameters:
+        formula: formula to rename the variables of.
+
+    Returns:
+        A pair of the renamed formula, and the specialization map from each of
+        its variables to the respective variable of the given formula.
+
+    Examples:
+        >>> canonical_form(Formula.parse('(q->(p->q))'))
+        ((z1->(z2->z1)), {'z1': q, 'z2': p})
+    """
+    renaming = {}
+    pending = [formula]
+    while len(pending) > 0:
+        current = pending.pop()
+        root = current.root
+        if is_variable(root):
+            if root not in renaming:
+                renaming[root] = Formula('z' + str(len(renaming) + 1))
+        elif is_binary(root):
+            pending.append(current.second)
+            pending.append(current.first)
+        elif is_unary(root):
+            pending.append(current.first)
+    return formula.substitute_variables(renaming), \
+        {renamed.root: Formula(variable)
+         for variable, renamed in renaming.items()}
+
+
+class ProofCache:
+    """A least-recently-used cache of proofs of tautologies in memory, which is
+    optionally backed by an sqlite database that persists across runs.
+
+    The proofs are keyed by the SHA-256 digests of the string representations
+    of the formulae that they prove, and stored in the database as the JSON
+    text of their encodings by `~propositions.proofs.encode_proof`.
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 capacity: int = PROOF_CACHE_CAPACITY) -> None:
+        """Initializes a `ProofCache`.
+
+        Parameters:
+            path: path of the sqlite database to back the cache with, which is
+                created if it does not exist, or ``None`` to only cache proofs
+                in memory.
+            capacity: maximum number of proofs to hold in memory.
+        """
+        self.__capacity = capacity
+        self.__proofs: OrderedDict[str, Proof] = OrderedDict()
+        self.__database = None
+        if path is not None:
+            self.__database = sqlite3.connect(path)
+            self.__database.execute('CREATE TABLE IF NOT EXISTS proofs '
+                                    '(key TEXT PRIMARY KEY, proof TEXT)')
+            self.__database.commit()
+
+    def __len__(self) -> int:
+        """Computes the number of proofs held in memory.
+
+        Returns:
+            The number of proofs held in memory by the cache.
+        """
+        return len(self.__proofs)
+
+    def close(self) -> None:
+        """Closes the database that backs the cache, if any."""
+        if self.__database is not None:
+            self.__database.close()
+            self.__database = None
+
+    @staticmethod
+    def __key(formula: Formula) -> str:
+        return hashlib.sha256(str(formula).encode()).hexdigest()
+
+    def get(self, formula: Formula) -> Optional[Proof]:
+        """Looks up a cached proof of the given formula.
+
+        Parameters:
+            formula: formula to look up.
+
+        Returns:
+            A cached valid assumptionless proof of the given formula, or
+            ``None`` if there is no such proof in the cache. A proof that is
+            read from the database but is not a valid proof of the given
+            formula is removed from it.
+        """
+        key = ProofCache.__key(formula)
+        proof = self.__proofs.get(key)
+        if proof is not None:
+            self.__proofs.move_to_end(key)
+            return proof
+        if self.__database is None:
+            return None
+        row = self.__database.execute('SELECT proof FROM proofs WHERE key = ?',
+                                      (key,)).fetchone()
+        if row is None:
+            return None
+        # The encoding is stored as JSON, which (unlike pickle) cannot run
+        # code when a tampered database is read, and the decoded proof is
+        # validated once, so that a stale or tampered row is never returned
+        try:
+            proof = decode_proof(json.loads(row[0]))
+        except (ValueError, TypeError, KeyError, IndexError, AssertionError):
+            proof = None
+        if proof is None or proof.statement != InferenceRule([], formula) or \
+                not proof.is_valid():
+            self.__database.execute('DELETE FROM proofs WHERE key = ?', (key,))
+            self.__database.commit()
+            return None
+        self.__remember(key, proof)
+        return proof
+
+    def put(self, proof: Proof) -> None:
+        """Caches the given proof.
+
+        Parameters:
+            proof: valid assumptionless proof to cache.
+        """
+        assert len(proof.statement.assumptions) == 0
+        key = ProofCache.__key(proof.statement.conclusion)
+        self.__remember(key, proof)
+        if self.__database is not None:
+            self.__database.execute(
+                'INSERT OR REPLACE INTO proofs VALUES (?, ?)',
+                (key, json.dumps(encode_proof(proof))))
+            self.__database.commit()
+
+    def __remember(self, key: str, proof: Proof) -> None:
+        self.__proofs[key] = proof
+        self.__proofs.move_to_end(key)
+        while len(self.__proofs) > self.__capacity:
+            self.__proofs.popitem(last=False)
+
+
+__proof_cache = ProofCache()
+
+
+def get_proof_cache() -> ProofCache:
+    """Returns the cache used by
+    `~propositions.tautology.prove_tautology_cached` by default."""
+    return __proof_cache
+
+
+def set_proof_cache(cache: ProofCache) -> ProofCache:
+    """Sets the cache used by `~propositions.tautology.prove_tautology_cached`
+    by default, e.g., to a cache backed by a database. Returns the cache that
+    was used before the call."""
+    global __proof_cache
+    previous = __proof_cache
+    __proof_cache = cache
+    return previous
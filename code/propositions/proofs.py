@@ -6,15 +6,26 @@
 """Proofs by deduction in propositional logic."""
 
 from __future__ import annotations
-from typing import AbstractSet, Iterable, FrozenSet, List, Mapping, Optional, \
-    Set, Tuple, Union
+from typing import AbstractSet, Callable, Dict, Iterable, Iterator, \
+    FrozenSet, List, Mapping, Optional, Sequence, Set, TextIO, Tuple, Union
 
-from logic_utils import frozen
+from logic_utils import frozen, frozendict
 
 from propositions.syntax import *
 
 SpecializationMap = Mapping[str, Formula]
 
+#: A compact picklable encoding of a proof (see `encode_proof`): the formulae
+#: of the proof as (root, first, second) triples of a root and indices of
+#: earlier formulae (or ``-1``), the rules as (assumptions, conclusion) pairs of
+#: formula indices, the statement as such a pair, and the lines as (formula,
+#: rule, assumptions) triples of a formula index, a rule index (or ``-1``) and
+#: line indices (or ``None``)
+EncodedProof = Tuple[Tuple[Tuple[str, int, int], ...],
+                     Tuple[Tuple[Tuple[int, ...], int], ...],
+                     Tuple[Tuple[int, ...], int],
+                     Tuple[Tuple[int, int, Optional[Tuple[int, ...]]], ...]]
+
 
 @frozen
 class InferenceRule:
@@ -69,7 +80,7 @@ class InferenceRule:
         return not self == other
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash((self.assumptions, self.conclusion))
 
     def __repr__(self) -> str:
         """Computes a string representation of the current inference rule.
@@ -168,18 +179,10 @@ class InferenceRule:
             in fact not a specialization of `general`.
         """
         # Task 4.5b
-        if is_variable(general.root):
-            return {general.root: specialization}
-        elif is_constant(general.root) and is_constant(specialization.root) and general.root == specialization.root:
-            return dict()
-        elif is_unary(general.root) and is_unary(specialization.root) and general.root == specialization.root:
-            return InferenceRule.formula_specialization_map(general.first, specialization.first)
-        elif is_binary(general.root) and is_binary(specialization.root) and general.root == specialization.root:
-            spec_map1 = InferenceRule.formula_specialization_map(general.first, specialization.first)
-            spec_map2 = InferenceRule.formula_specialization_map(general.second, specialization.second)
-            return InferenceRule.merge_specialization_maps(spec_map1, spec_map2)
-        else:
+        bindings = {}
+        if not _match(general, specialization, bindings, []):
             return None
+        return frozendict(bindings)
 
     def specialization_map(self, specialization: InferenceRule) -> \
             Union[SpecializationMap, None]:
@@ -196,14 +199,16 @@ class InferenceRule:
         # Task 4.5c
         if len(self.assumptions) != len(specialization.assumptions):
             return None
-        else:
-            spec_map = dict()
-            for i, assumption in enumerate(self.assumptions):
-                temp_map = InferenceRule.formula_specialization_map(assumption, specialization.assumptions[i])
-                spec_map = InferenceRule.merge_specialization_maps(spec_map, temp_map)
-            conc_map = InferenceRule.formula_specialization_map(self.conclusion, specialization.conclusion)
-            spec_map = InferenceRule.merge_specialization_maps(spec_map, conc_map)
-            return spec_map
+        # All formulae bind into a single map, which is frozen only once they
+        # all matched
+        bindings = {}
+        bound = []
+        for general, special in zip(self.assumptions + (self.conclusion,),
+                                    specialization.assumptions +
+                                    (specialization.conclusion,)):
+            if not _match(general, special, bindings, bound):
+                return None
+        return frozendict(bindings)
 
     def is_specialization_of(self, general: InferenceRule) -> bool:
         """Checks if the current inference rule is a specialization of the given
@@ -219,6 +224,51 @@ class InferenceRule:
         return general.specialization_map(self) is not None
 
 
+def _match(general: Formula, specialization: Formula,
+           bindings: Dict[str, Formula], bound: List[str]) -> bool:
+    """Matches the given formula against the given specialization of it,
+    without recursion, extending the given bindings of variables.
+
+    Parameters:
+        general: formula to match.
+        specialization: formula to match against.
+        bindings: mutable map from variables of `general` that were already
+            bound to the formulae they are bound to, extended in place with the
+            variables bound by the match.
+        bound: list to which the variables that are newly bound by the match
+            are appended, in the order in which they are bound.
+
+    Returns:
+        ``True`` if `specialization` is a specialization of `general` that is
+        consistent with the given bindings, ``False`` otherwise. If the match
+        fails, the given bindings are restored to their original state.
+    """
+    start = len(bound)
+    pairs = [(general, specialization)]
+    while len(pairs) > 0:
+        general, specialization = pairs.pop()
+        root = general.root
+        if is_variable(root):
+            value = bindings.get(root)
+            if value is None:
+                bindings[root] = specialization
+                bound.append(root)
+                continue
+            if value == specialization:
+                continue
+        elif root == specialization.root:
+            if is_binary(root):
+                pairs.append((general.second, specialization.second))
+            if not is_constant(root):
+                pairs.append((general.first, specialization.first))
+            continue
+        for variable in bound[start:]:
+            del bindings[variable]
+        del bound[start:]
+        return False
+    return True
+
+
 @frozen
 class Proof:
     """A frozen deductive proof, comprised of a statement in the form of an
@@ -250,6 +300,10 @@ class Proof:
         self.statement = statement
         self.rules = frozenset(rules)
         self.lines = tuple(lines)
+        # The validation certificate: the memoized verdict of each line (or
+        # None if not checked yet), and of the whole proof
+        self._line_verdicts = [None] * len(self.lines)
+        self._verdict = None
 
     @frozen
     class Line:
@@ -386,16 +440,21 @@ class Proof:
         """
         assert line_number < len(self.lines)
         # Task 4.6b
+        verdict = self._line_verdicts[line_number]
+        if verdict is not None:
+            return verdict
         line = self.lines[line_number]
         if line.is_assumption():
-            return line.formula in self.statement.assumptions
+            verdict = line.formula in self.statement.assumptions
         else:
             gate1 = line.rule in self.rules
-            inf_rule = self.rule_for_line(line_number)
-            gate2_a = (not line.assumptions) or (max(line.assumptions) < line_number)
-            gate2_b = inf_rule.is_specialization_of(line.rule)
-            gate2 = gate2_a and gate2_b
-            return gate1 and gate2
+            gate2_a = (not line.assumptions) or \
+                      (max(line.assumptions) < line_number)
+            verdict = gate1 and gate2_a and \
+                      self.rule_for_line(line_number).is_specialization_of(
+                          line.rule)
+        self._line_verdicts[line_number] = verdict
+        return verdict
 
     def is_valid(self) -> bool:
         """Checks if the current proof is a valid proof of its claimed statement
@@ -406,11 +465,290 @@ class Proof:
             statement via its inference rules, ``False`` otherwise.
         """
         # Task 4.6c
-        gate_lines = True
-        for i in range(len(self.lines)):
-            gate_lines *= self.is_line_valid(i)
-        gate_final = self.lines[-1].formula == self.statement.conclusion
-        return gate_lines and gate_final
+        if self._verdict is None:
+            # The verdict is memoized, as the proof is immutable
+            object.__setattr__(
+                self, '_verdict',
+                len(self.lines) > 0 and
+                self.lines[-1].formula == self.statement.conclusion and
+                all(self.is_line_valid(i) for i in range(len(self.lines))))
+        return self._verdict
+
+    def extended(self, statement: InferenceRule,
+                 rules: AbstractSet[InferenceRule],
+                 lines: Iterable[Proof.Line]) -> Proof:
+        """Constructs a proof whose lines are the lines of the current proof
+        followed by the given lines, carrying over the verdicts of the lines
+        of the current proof that were already found valid, so that validating
+        the constructed proof only checks the given lines.
+
+        Parameters:
+            statement: the statement for the constructed proof.
+            rules: the allowed rules for the constructed proof.
+            lines: the lines to append to the lines of the current proof.
+
+        Returns:
+            A proof of the given statement via the given rules, whose lines
+            are the lines of the current proof followed by the given lines.
+        """
+        proof = Proof(statement, rules, self.lines + tuple(lines))
+        for i, line in enumerate(self.lines):
+            # A valid line stays valid as long as its justification is still
+            # allowed: its formula is still an assumption, or its rule is
+            # still allowed
+            if self._line_verdicts[i] and \
+                    (line.formula in statement.assumptions
+                     if line.is_assumption() else line.rule in proof.rules):
+                proof._line_verdicts[i] = True
+        return proof
+
+    def iter_lines(self) -> Iterator[Proof.Line]:
+        """Iterates over the lines of the current proof.
+
+        Returns:
+            An iterator over the lines of the current proof, in order.
+        """
+        return iter(self.lines)
+
+
+class LazyProof(Proof):
+    """A proof whose lines are generated on demand by a recipe, rather than
+    stored.
+
+    The lines are materialized only when `lines` is accessed, and are
+    otherwise generated anew by each call to `iter_lines`, so that a proof too
+    large to hold in memory can still be consumed, or validated by `is_valid`,
+    as a stream.
+    """
+
+    def __init__(self, statement: InferenceRule,
+                 rules: AbstractSet[InferenceRule],
+                 generate_lines: Callable[[], Iterable[
+                     Union[Proof.Line, Tuple[Proof.Line, int]]]],
+                 with_use_counts: bool = False) -> None:
+        """Initializes a `LazyProof` from its statement, allowed inference
+        rules, and recipe for its lines.
+
+        Parameters:
+            statement: the statement for the proof.
+            rules: the allowed rules for the proof.
+            generate_lines: function that generates the lines for the proof
+                whenever it is called, or, if `with_use_counts` is ``True``,
+                pairs of each line and of the number of times that later lines
+                specify it as an assumption, as returned by `line_use_counts`.
+            with_use_counts: whether the generated lines are paired with their
+                use counts, which allows `is_valid` to check the proof in a
+                single pass over its lines.
+        """
+        # The attributes are set directly, as Proof.__setattr__ only allows
+        # assignment during Proof.__init__
+        object.__setattr__(self, 'statement', statement)
+        object.__setattr__(self, 'rules', frozenset(rules))
+        object.__setattr__(self, '_generate_lines', generate_lines)
+        object.__setattr__(self, '_with_use_counts', with_use_counts)
+        object.__setattr__(self, '_materialized_lines', None)
+        object.__setattr__(self, '_verdict', None)
+
+    @property
+    def lines(self) -> Tuple[Proof.Line, ...]:
+        """The lines of the proof, which are generated and stored on first
+        access."""
+        if self._materialized_lines is None:
+            lines = tuple(self.__generate_lines())
+            object.__setattr__(self, '_materialized_lines', lines)
+            object.__setattr__(self, '_stored_line_verdicts',
+                               [None] * len(lines))
+        return self._materialized_lines
+
+    @property
+    def _line_verdicts(self) -> List[Optional[bool]]:
+        self.lines
+        return self._stored_line_verdicts
+
+    def __generate_lines(self) -> Iterator[Proof.Line]:
+        if self._with_use_counts:
+            return (line for line, _ in self._generate_lines())
+        return iter(self._generate_lines())
+
+    def iter_lines(self) -> Iterator[Proof.Line]:
+        """Iterates over the lines of the current proof, generating them anew
+        unless they were already materialized.
+
+        Returns:
+            An iterator over the lines of the current proof, in order.
+        """
+        if self._materialized_lines is not None:
+            return iter(self._materialized_lines)
+        return self.__generate_lines()
+
+    def line_count(self) -> int:
+        """Counts the lines of the current proof without storing them.
+
+        Returns:
+            The number of lines of the current proof.
+        """
+        return sum(1 for _ in self.iter_lines())
+
+    def is_valid(self) -> bool:
+        """Checks if the current proof is a valid proof of its claimed statement
+        via its inference rules, storing only the formulae of lines that are
+        still referenced by later lines.
+
+        If the lines are generated with their use counts, they are checked in a
+        single pass. Otherwise, unless they were already materialized, they are
+        generated twice: once to compute the last use of each line by
+        `last_line_uses`, and once to check them.
+
+        Returns:
+            ``True`` if the current proof is a valid proof of its claimed
+            statement via its inference rules, ``False`` otherwise.
+        """
+        if self._verdict is None:
+            if self._materialized_lines is None and self._with_use_counts:
+                verdict = _is_valid_stream(self.statement, self.rules,
+                                           self._generate_lines(), True)
+            else:
+                last_uses = last_line_uses(self.iter_lines())
+                verdict = is_valid_line_stream(self.statement, self.rules,
+                                               self.iter_lines(), last_uses)
+            object.__setattr__(self, '_verdict', verdict)
+        return self._verdict
+
+
+def last_line_uses(lines: Iterable[Proof.Line]) -> List[int]:
+    """Computes the index of the last line that uses each of the given proof
+    lines.
+
+    Parameters:
+        lines: the lines of a proof.
+
+    Returns:
+        A list of the index of the last line among the given lines that
+        specifies each of them as one of its assumptions, or of the line itself
+        if there is no such line.
+    """
+    last_uses = []
+    for line_number, line in enumerate(lines):
+        last_uses.append(line_number)
+        if not line.is_assumption():
+            for i in line.assumptions:
+                if 0 <= i < line_number:
+                    last_uses[i] = line_number
+    return last_uses
+
+
+def line_use_counts(lines: Iterable[Proof.Line]) -> List[int]:
+    """Counts the uses of each of the given proof lines.
+
+    Parameters:
+        lines: the lines of a proof.
+
+    Returns:
+        A list of the number of times that each of the given lines is specified
+        as an assumption by later lines among the given lines.
+    """
+    counts = []
+    for line_number, line in enumerate(lines):
+        counts.append(0)
+        if not line.is_assumption():
+            for i in line.assumptions:
+                if 0 <= i < line_number:
+                    counts[i] += 1
+    return counts
+
+
+def is_valid_line_stream(statement: InferenceRule,
+                         rules: AbstractSet[InferenceRule],
+                         lines: Iterable[Proof.Line],
+                         last_uses: Optional[Sequence[int]] = None) -> bool:
+    """Checks if the given lines form a valid proof of the given statement via
+    the given inference rules, in a single pass over them.
+
+    Parameters:
+        statement: the statement of the proof to check.
+        rules: the allowed rules of the proof to check.
+        lines: the lines of the proof to check, in order.
+        last_uses: the index of the last line that uses each of the given
+            lines, as returned by `last_line_uses`, or ``None`` if unknown.
+            When given, the formula of each line is stored only until its last
+            use, and otherwise the formulae of all lines are stored.
+
+    Returns:
+        ``True`` if the given lines form a valid proof of the given statement
+        via the given inference rules, as checked by `Proof.is_valid`,
+        ``False`` otherwise.
+    """
+    if last_uses is None:
+        # Keep the formulae of all lines
+        return _is_valid_stream(statement, rules,
+                                ((line, -1) for line in lines))
+    return _is_valid_stream(statement, rules, zip(lines, last_uses))
+
+
+def _is_valid_stream(statement: InferenceRule,
+                     rules: AbstractSet[InferenceRule],
+                     lines: Iterable[Tuple[Proof.Line, int]],
+                     counted: bool = False) -> bool:
+    """Checks if the given lines form a valid proof of the given statement via
+    the given inference rules, in a single pass over them.
+
+    Parameters:
+        statement: the statement of the proof to check.
+        rules: the allowed rules of the proof to check.
+        lines: pairs of the lines of the proof to check, in order, and of the
+            index of the last line that uses each of them, or ``-1`` to never
+            discard its formula.
+        counted: whether the given lines are instead paired with the number of
+            times that later lines use each of them.
+
+    Returns:
+        ``True`` if the given lines form a valid proof of the given statement
+        via the given inference rules, ``False`` otherwise, including if some
+        line uses a line after the given last use of that line, or more times
+        than the given use count of that line.
+    """
+    assumptions = set(statement.assumptions)
+    # The formulae of the lines handled so far that may still be used, and the
+    # last uses or remaining use counts of those of them that are to be
+    # discarded
+    formulae = {}
+    expiries = {}
+    conclusion = None
+    for line_number, (line, last_use) in enumerate(lines):
+        if line.is_assumption():
+            if line.formula not in assumptions:
+                return False
+        else:
+            if line.rule not in rules or \
+                    any(i not in formulae for i in line.assumptions):
+                return False
+            premises = [formulae[i] for i in line.assumptions]
+            if not InferenceRule(premises, line.formula).is_specialization_of(
+                    line.rule):
+                return False
+            if counted:
+                for i in line.assumptions:
+                    if i not in expiries:
+                        return False
+                    expiries[i] -= 1
+                    if expiries[i] == 0:
+                        del formulae[i]
+                        del expiries[i]
+            else:
+                for i in set(line.assumptions):
+                    if expiries.get(i) == line_number:
+                        del formulae[i]
+                        del expiries[i]
+        if counted:
+            if last_use > 0:
+                formulae[line_number] = line.formula
+                expiries[line_number] = last_use
+        elif last_use < 0 or last_use > line_number:
+            formulae[line_number] = line.formula
+            if last_use >= 0:
+                expiries[line_number] = last_use
+        conclusion = line.formula
+    return conclusion is not None and conclusion == statement.conclusion
 
 
 # Chapter 5 tasks
@@ -532,10 +870,332 @@ def inline_proof(main_proof: Proof, lemma_proof: Proof) -> Proof:
         `lemma_proof`.
     """
     # Task 5.2b
-    i = 0
-    while (i < len(main_proof.lines)):
-        line = main_proof.lines[i]
-        if (not line.is_assumption()) and line.rule.is_specialization_of(lemma_proof.statement):
-            main_proof = inline_proof_once(main_proof, i, lemma_proof)
-        i = i + 1
-    return Proof(main_proof.statement, main_proof.rules.difference({lemma_proof.statement}), main_proof.lines)
+    assert lemma_proof.is_valid()
+    lemma = lemma_proof.statement
+    # The index of the first occurrence of each assumption of the lemma
+    assumption_indices = {}
+    for k, assumption in enumerate(lemma.assumptions):
+        assumption_indices.setdefault(assumption, k)
+    lines = []
+    # The index in the new lines of each line of the main proof handled so far
+    remap = []
+    for line_number, line in enumerate(main_proof.lines):
+        if line.is_assumption():
+            lines.append(line)
+        elif line.rule != lemma:
+            lines.append(Proof.Line(line.formula, line.rule,
+                                    [remap[i] for i in line.assumptions]))
+        else:
+            specialization_map = \
+                lemma.specialization_map(main_proof.rule_for_line(line_number))
+            # The index in the new lines of each line of the lemma proof: its
+            # assumptions are the lines that justify the inlined line, and its
+            # other lines are specialized into new lines
+            lemma_remap = []
+            for lemma_line in lemma_proof.lines:
+                if lemma_line.is_assumption():
+                    k = assumption_indices[lemma_line.formula]
+                    lemma_remap.append(remap[line.assumptions[k]])
+                    continue
+                lines.append(Proof.Line(
+                    lemma_line.formula.substitute_variables(
+                        specialization_map),
+                    lemma_line.rule,
+                    [lemma_remap[i] for i in lemma_line.assumptions]))
+                lemma_remap.append(len(lines) - 1)
+            if lemma_remap[-1] != len(lines) - 1:
+                # The conclusion of the lemma is one of its assumptions, so
+                # repeat the line that justifies it in place of the inlined
+                # line
+                lines.append(lines[lemma_remap[-1]])
+            remap.append(len(lines) - 1)
+            continue
+        remap.append(len(lines) - 1)
+    rules = main_proof.rules.union(lemma_proof.rules).difference({lemma})
+    return Proof(main_proof.statement, rules, lines)
+
+
+def compress_proof(proof: Proof) -> Proof:
+    """Removes the redundant lines of the given proof.
+
+    Parameters:
+        proof: valid proof to compress.
+
+    Returns:
+        A valid proof of the same statement via the same inference rules, whose
+        lines are the lines of the given proof that are needed to justify its
+        conclusion, in their original order, where every formula is justified
+        by only the first line of the given proof that justifies it.
+
+    Examples:
+        >>> proof = Proof(InferenceRule([Formula.parse('p')],
+        ...                             Formula.parse('p')),
+        ...               set(), [Proof.Line(Formula.parse('p')),
+        ...                       Proof.Line(Formula.parse('q')),
+        ...                       Proof.Line(Formula.parse('p'))])
+        >>> compress_proof(proof).lines
+        (p,)
+    """
+    lines = proof.lines
+    if len(lines) == 0:
+        return proof
+    # The index of the first line that justifies the formula of each line, so
+    # that lines that re-derive a formula are replaced by its first derivation
+    first_lines = {}
+    canonical = [first_lines.setdefault(line.formula, i)
+                 for i, line in enumerate(lines)]
+    # Mark the lines needed to justify the conclusion, all of which precede
+    # the first line that justifies it
+    needed = [False] * len(lines)
+    pending = [canonical[-1]]
+    while len(pending) > 0:
+        i = pending.pop()
+        if needed[i]:
+            continue
+        needed[i] = True
+        if not lines[i].is_assumption():
+            pending.extend(canonical[j] for j in lines[i].assumptions)
+    renumbered = {}
+    compressed = []
+    for i, line in enumerate(lines):
+        if not needed[i]:
+            continue
+        renumbered[i] = len(compressed)
+        if line.is_assumption():
+            compressed.append(line)
+        else:
+            compressed.append(Proof.Line(
+                line.formula, line.rule,
+                [renumbered[canonical[j]] for j in line.assumptions]))
+    return Proof(proof.statement, proof.rules, compressed)
+
+
+def encode_proof(proof: Proof) -> EncodedProof:
+    """Encodes the given proof compactly, for transferring it between
+    processes.
+
+    Parameters:
+        proof: proof to encode.
+
+    Returns:
+        The encoding of the given proof, in which every distinct formula of the
+        proof, including every distinct subformula, appears once.
+    """
+    formulae = []
+    indices = {}
+
+    def index(formula: Formula) -> int:
+        pending = [formula]
+        while len(pending) > 0:
+            current = pending[-1]
+            if current in indices:
+                pending.pop()
+                continue
+            root = current.root
+            first = second = -1
+            if is_unary(root) or is_binary(root):
+                if current.first not in indices:
+                    pending.append(current.first)
+                    continue
+                first = indices[current.first]
+            if is_binary(root):
+                if current.second not in indices:
+                    pending.append(current.second)
+                    continue
+                second = indices[current.second]
+            indices[current] = len(formulae)
+            formulae.append((root, first, second))
+            pending.pop()
+        return indices[formula]
+
+    def encode_rule(rule: InferenceRule) -> Tuple[Tuple[int, ...], int]:
+        return (tuple(index(assumption) for assumption in rule.assumptions),
+                index(rule.conclusion))
+
+    rules = list(proof.rules)
+    rule_indices = {rule: i for i, rule in enumerate(rules)}
+    encoded_rules = tuple(encode_rule(rule) for rule in rules)
+    statement = encode_rule(proof.statement)
+    lines = tuple((index(line.formula), -1, None) if line.is_assumption() else
+                  (index(line.formula), rule_indices[line.rule],
+                   line.assumptions)
+                  for line in proof.lines)
+    return tuple(formulae), encoded_rules, statement, lines
+
+
+def decode_proof(encoded: EncodedProof) -> Proof:
+    """Decodes the given encoding of a proof.
+
+    Parameters:
+        encoded: encoding of a proof, as returned by `encode_proof`.
+
+    Returns:
+        The encoded proof.
+
+    Examples:
+        >>> proof = Proof(InferenceRule([Formula.parse('p')],
+        ...                             Formula.parse('~~p')),
+        ...               {InferenceRule([], Formula.parse('(p->~~p)')),
+        ...                InferenceRule([Formula.parse('p'),
+        ...                               Formula.parse('(p->q)')],
+        ...                              Formula.parse('q'))},
+        ...               [Proof.Line(Formula.parse('p'))])
+        >>> decode_proof(encode_proof(proof)).statement
+        ['p'] ==> '~~p'
+    """
+    encoded_formulae, encoded_rules, encoded_statement, encoded_lines = encoded
+    formulae = []
+    for root, first, second in encoded_formulae:
+        formulae.append(Formula(root, formulae[first] if first >= 0 else None,
+                                formulae[second] if second >= 0 else None))
+
+    def decode_rule(rule: Tuple[Tuple[int, ...], int]) -> InferenceRule:
+        return InferenceRule([formulae[i] for i in rule[0]], formulae[rule[1]])
+
+    rules = [decode_rule(rule) for rule in encoded_rules]
+    lines = [Proof.Line(formulae[formula]) if rule < 0 else
+             Proof.Line(formulae[formula], rules[rule], assumptions)
+             for formula, rule, assumptions in encoded_lines]
+    return Proof(decode_rule(encoded_statement), rules, lines)
+
+
+def write_proof(proof: Proof, file: TextIO) -> None:
+    """Writes the given proof to the given text file, one proof line per file
+    line.
+
+    The first file line is the statement of the proof, and each of the
+    following file lines until an empty one is an allowed inference rule of the
+    proof, all as tab-separated conclusions followed by assumptions. Each of the
+    remaining file lines is a line of the proof, as the tab-separated formula of
+    the line, index of the last line that uses it (see `last_line_uses`), and,
+    if it is not an assumption line, the index of its inference rule among the
+    written ones and the comma-separated indices of its assumption lines.
+
+    Parameters:
+        proof: proof to write.
+        file: text file to write to.
+    """
+    rules = sorted(proof.rules, key=str)
+    rule_indices = {rule: i for i, rule in enumerate(rules)}
+    for rule in [proof.statement] + rules:
+        file.write('\t'.join(str(formula) for formula in
+                             (rule.conclusion,) + rule.assumptions) + '\n')
+    file.write('\n')
+    last_uses = last_line_uses(proof.iter_lines())
+    for line, last_use in zip(proof.iter_lines(), last_uses):
+        fields = [str(line.formula), str(last_use)]
+        if not line.is_assumption():
+            fields.append(str(rule_indices[line.rule]))
+            fields.append(','.join(str(i) for i in line.assumptions))
+        file.write('\t'.join(fields) + '\n')
+
+
+def _read_rule(record: str) -> InferenceRule:
+    fields = record.split('\t')
+    for field in fields:
+        if not Formula.is_formula(field):
+            raise ValueError('Malformed inference rule record: ' + repr(record))
+    formulae = [Formula.parse(field) for field in fields]
+    return InferenceRule(formulae[1:], formulae[0])
+
+
+def _read_index(field: str, record: str) -> int:
+    if not (field.isascii() and field.isdigit()):
+        raise ValueError('Malformed proof line record: ' + repr(record))
+    return int(field)
+
+
+def read_proof_lines(file: TextIO) -> \
+        Tuple[InferenceRule, FrozenSet[InferenceRule],
+              Iterator[Tuple[Proof.Line, int]]]:
+    """Reads a proof written by `write_proof` from the given text file, without
+    reading its lines ahead.
+
+    Parameters:
+        file: text file to read from.
+
+    Returns:
+        A triple of the statement of the read proof, its allowed inference
+        rules, and an iterator that reads its lines, which yields each line
+        with the index of the last line that uses it.
+
+    Raises:
+        ValueError: if a read file line is not of the form written by
+            `write_proof`, including if it specifies an inference rule index
+            that is out of range. Iterating over the read lines raises this
+            error when the offending file line is reached.
+    """
+    statement = _read_rule(file.readline().rstrip('\n'))
+    rules = []
+    for record in file:
+        record = record.rstrip('\n')
+        if record == '':
+            break
+        rules.append(_read_rule(record))
+
+    def read_lines() -> Iterator[Tuple[Proof.Line, int]]:
+        for record in file:
+            record = record.rstrip('\n')
+            fields = record.split('\t')
+            if len(fields) not in (2, 4) or \
+                    not Formula.is_formula(fields[0]):
+                raise ValueError('Malformed proof line record: ' +
+                                 repr(record))
+            formula = Formula.parse(fields[0])
+            last_use = _read_index(fields[1], record)
+            if len(fields) == 2:
+                yield Proof.Line(formula), last_use
+                continue
+            rule = _read_index(fields[2], record)
+            if rule >= len(rules):
+                raise ValueError('Out of range inference rule index: ' +
+                                 repr(record))
+            assumptions = [_read_index(i, record)
+                           for i in fields[3].split(',')] \
+                if fields[3] != '' else []
+            yield Proof.Line(formula, rules[rule], assumptions), last_use
+
+    return statement, frozenset(rules), read_lines()
+
+
+def read_proof(file: TextIO) -> Proof:
+    """Reads a proof written by `write_proof` from the given text file.
+
+    Parameters:
+        file: text file to read from.
+
+    Returns:
+        The read proof.
+    """
+    statement, rules, lines = read_proof_lines(file)
+    return Proof(statement, rules, [line for line, _ in lines])
+
+
+def is_valid_proof_file(file: TextIO) -> bool:
+    """Checks if the proof written by `write_proof` to the given text file is
+    valid, storing the formula of each line only until the last line that uses
+    it.
+
+    The file is read twice: once to compute the last uses of its lines, and
+    once to check its lines. The last uses written to the file are not trusted,
+    as an understated one would reject a valid proof, and an overstated one
+    would keep the formula of its line until the end.
+
+    Parameters:
+        file: seekable text file to read the proof from, from its start.
+
+    Returns:
+        ``True`` if the read proof is a valid proof of its claimed statement
+        via its inference rules, ``False`` otherwise, including if the file is
+        not of the form written by `write_proof`.
+    """
+    try:
+        start = file.tell()
+        _, _, lines = read_proof_lines(file)
+        last_uses = last_line_uses(line for line, _ in lines)
+        file.seek(start)
+        statement, rules, lines = read_proof_lines(file)
+        return _is_valid_stream(statement, rules,
+                                zip((line for line, _ in lines), last_uses))
+    except ValueError:
+        return False
@@ -5,6 +5,9 @@
 
 """Tests for the propositions.proofs module."""
 
+import io
+import pickle
+
 from logic_utils import frozendict
 
 from propositions.syntax import *
@@ -552,6 +555,40 @@ def offending_line(proof):
     return None
 
 
+def test_extended(debug=False):
+    proof = DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF
+    assert proof.is_valid()
+    statement = InferenceRule(proof.statement.assumptions,
+                              Formula.parse('((y|z)|x)'))
+    line = Proof.Line(Formula.parse('((y|z)|x)'), R3, [5])
+    extended = proof.extended(statement, proof.rules, [line])
+    if debug:
+        print('Testing validity of the following extended proof:\n' +
+              str(extended))
+    # The lines of the validated proof are not checked again
+    assert extended._line_verdicts == [True] * 6 + [None]
+    assert extended.is_valid()
+    assert extended.is_valid()
+    assert extended._line_verdicts == [True] * 7
+
+    for statement, rules in [
+            [InferenceRule([], Formula.parse('((y|z)|x)')), proof.rules],
+            [statement, {R3}]]:
+        extended = proof.extended(statement, rules, [line])
+        if debug:
+            print('Testing validity of the following extended proof:\n' +
+                  str(extended))
+        assert not extended.is_valid()
+
+    invalid = Proof(InferenceRule([], Formula.parse('((x|y)|z)')),
+                    proof.rules, proof.lines[:1])
+    assert not invalid.is_valid()
+    extended = invalid.extended(proof.statement, proof.rules, proof.lines[1:])
+    if debug:
+        print('Testing validity of the following extended proof:\n' +
+              str(extended))
+    assert extended.is_valid()
+
 def test_prove_specialization(debug=False):
     # Test instantiations of DISJUNCTION_COMMUTATIVITY_PROOF
     for instance_infix in [['(w|z)', '(z|w)'],
@@ -861,6 +898,218 @@ def test_inline_proof(debug=False):
     assert inlined_proof.is_valid(), offending_line(inlined_proof)
 
 
+def test_inline_proof_many_uses(debug=False):
+    # Commute '(x|y)' back and forth, via the commutativity lemma each time
+    uses = 2000
+    formulae = [Formula.parse('(x|y)'), Formula.parse('(y|x)')]
+    lines = [Proof.Line(formulae[0])]
+    for i in range(1, uses + 1):
+        lines.append(Proof.Line(formulae[i % 2], R3, [i - 1]))
+    main_proof = Proof(InferenceRule([formulae[0]], formulae[uses % 2]),
+                       {R3}, lines)
+    if debug:
+        print('Testing inlining a lemma used', uses, 'times')
+    lemma_proof = Proof(R3, DISJUNCTION_COMMUTATIVITY_PROOF.rules,
+                        DISJUNCTION_COMMUTATIVITY_PROOF.lines)
+    proof = inline_proof(main_proof, lemma_proof)
+    assert proof.statement == main_proof.statement
+    assert proof.rules == lemma_proof.rules
+    assert len(proof.lines) == 1 + 2 * uses
+    assert proof.is_valid()
+
+    # A lemma whose conclusion is one of its assumptions
+    lemma = InferenceRule([Formula.parse('p'), Formula.parse('q')],
+                          Formula.parse('p'))
+    lemma_proof = Proof(lemma, set(), [Proof.Line(Formula.parse('p'))])
+    main_proof = Proof(InferenceRule([formulae[0], formulae[1]], formulae[1]),
+                       {lemma},
+                       [Proof.Line(formulae[0]), Proof.Line(formulae[1]),
+                        Proof.Line(formulae[1], lemma, [1, 0])])
+    if debug:
+        print('Testing inlining a lemma that repeats an assumption')
+    proof = inline_proof(main_proof, lemma_proof)
+    assert proof.rules == set()
+    assert proof.is_valid()
+
+def test_compress_proof(debug=False):
+    # Commuting '(x|y)' back and forth re-derives the same two formulae
+    formulae = [Formula.parse('(x|y)'), Formula.parse('(y|x)')]
+    lines = [Proof.Line(formulae[0])]
+    for i in range(1, 11):
+        lines.append(Proof.Line(formulae[i % 2], R3, [i - 1]))
+    # A line that nothing uses
+    lines.insert(5, Proof.Line(Formula.parse('(~z|z)'), R2, []))
+    lines = [line if line.is_assumption() else
+             Proof.Line(line.formula, line.rule,
+                        [j + 1 if j >= 5 else j for j in line.assumptions])
+             for line in lines]
+    proof = Proof(InferenceRule([formulae[0]], formulae[0]), {R2, R3}, lines)
+    assert proof.is_valid()
+    if debug:
+        print('Testing compressing the following proof:\n' + str(proof))
+    compressed = compress_proof(proof)
+    assert compressed.statement == proof.statement
+    assert compressed.rules == proof.rules
+    assert compressed.lines == (lines[0],)
+    assert compressed.is_valid()
+
+    proof = Proof(InferenceRule([formulae[0]], formulae[1]), {R2, R3},
+                  lines[:-1])
+    assert proof.is_valid()
+    compressed = compress_proof(proof)
+    assert len(compressed.lines) == 2
+    assert compressed.lines[1].formula == formulae[1]
+    assert compressed.lines[1].assumptions == (0,)
+    assert compressed.is_valid()
+
+    for proof in [DISJUNCTION_COMMUTATIVITY_PROOF,
+                  DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF]:
+        if debug:
+            print('Testing compressing the following proof:\n' + str(proof))
+        compressed = compress_proof(proof)
+        assert [str(line) for line in compressed.lines] == \
+               [str(line) for line in proof.lines]
+
+def test_lazy_proof(debug=False):
+    proof = DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF
+    generated = []
+
+    def generate_lines():
+        generated.append(None)
+        return iter(proof.lines)
+
+    lazy = LazyProof(proof.statement, proof.rules, generate_lines)
+    if debug:
+        print('Testing a lazy proof of', lazy.statement)
+    assert lazy.line_count() == len(proof.lines)
+    assert last_line_uses(lazy.iter_lines()) == [1, 2, 3, 4, 5, 5]
+    assert lazy.is_valid()
+    assert lazy._materialized_lines is None
+    count = len(generated)
+    assert lazy.lines == proof.lines
+    assert lazy.is_line_valid(3)
+    assert list(lazy.iter_lines()) == list(proof.lines)
+    assert len(generated) == count + 1
+
+    # Lines that are generated with their use counts are checked in one pass
+    counts = line_use_counts(proof.lines)
+    assert counts == [1, 1, 1, 1, 1, 0]
+    generated.clear()
+    lazy = LazyProof(proof.statement, proof.rules,
+                     lambda: (generated.append(None) or
+                              zip(proof.lines, counts)),
+                     True)
+    assert lazy.is_valid()
+    assert len(generated) == 1
+    assert list(lazy.iter_lines()) == list(proof.lines)
+    lazy = LazyProof(proof.statement, proof.rules,
+                     lambda: zip(proof.lines, [1, 1, 0, 1, 1, 0]), True)
+    assert not lazy.is_valid()
+
+    # Invalid lines are found in a stream
+    lines = list(proof.lines)
+    for statement, rules, lines in [
+            [proof.statement, proof.rules, []],
+            [proof.statement, {R3}, lines],
+            [proof.statement, proof.rules, lines[:-1]],
+            [InferenceRule([], proof.statement.conclusion), proof.rules,
+             lines],
+            [proof.statement, proof.rules,
+             lines[:2] + [Proof.Line(lines[2].formula, R4, [2])] + lines[3:]],
+            [proof.statement, proof.rules,
+             lines[:2] + [Proof.Line(lines[3].formula, R3, [1])] +
+             lines[3:]]]:
+        if debug:
+            print('Testing validity of a lazy proof of', statement)
+        lazy = LazyProof(statement, rules, lambda lines=lines: lines)
+        assert not lazy.is_valid()
+        assert not is_valid_line_stream(statement, rules, lines)
+        assert not Proof(statement, rules, lines).is_valid()
+
+
+def test_write_proof(debug=False):
+    for proof in [DISJUNCTION_COMMUTATIVITY_PROOF,
+                  DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF,
+                  Proof(InferenceRule([], Formula.parse('(~p|p)')), {R2},
+                        [Proof.Line(Formula.parse('(~p|p)'), R2, [])])]:
+        file = io.StringIO()
+        write_proof(proof, file)
+        if debug:
+            print('Testing writing the following proof:\n' + str(proof) +
+                  'as:\n' + file.getvalue())
+        file.seek(0)
+        read = read_proof(file)
+        assert read.statement == proof.statement
+        assert read.rules == proof.rules
+        assert [str(line) for line in read.lines] == \
+               [str(line) for line in proof.lines]
+        file.seek(0)
+        assert is_valid_proof_file(file)
+
+    # Invalid proofs are found while reading them
+    file = io.StringIO()
+    write_proof(DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF, file)
+    records = file.getvalue().split('\n')
+    first = records.index('') + 1
+    assert records[first + 2].split('\t')[1] == '3'
+    for k, record in [
+            # A line proves a different formula
+            [first + 2, records[first + 2].replace('((z|x)|y)', '((x|z)|y)')],
+            # The proof ends before its conclusion
+            [first + 5, None],
+            # Malformed records
+            [first + 2, records[first + 2].replace('\t3\t', '\tx\t')],
+            [first + 2, records[first + 2].replace('\t3\t', '\t-3\t')],
+            [first + 2, records[first + 2].rsplit('\t', 1)[0]],
+            [first + 2, records[first + 2] + '\t1'],
+            [first + 2, records[first + 2].replace('((z|x)|y)', '((z|x)|')],
+            [first + 2, records[first + 2].replace('\t0\t1', '\t2\t1')],
+            [first + 2, records[first + 2].replace('\t0\t1', '\t-1\t1')],
+            [first + 2, records[first + 2].replace('\t0\t1', '\t0\t-1')],
+            [first + 2, records[first + 2].replace('\t0\t1', '\t0\t1,')],
+            [0, records[0] + '\t'],
+            [0, '']]:
+        tampered = records[:k] + ([] if record is None else [record]) + \
+            records[k + 1:]
+        if debug:
+            print('Testing validity of the proof written as:\n' +
+                  '\n'.join(tampered))
+        assert not is_valid_proof_file(io.StringIO('\n'.join(tampered)))
+
+    # The last uses written to the file are not trusted
+    for k, record in [
+            # A line is used after its claimed last use
+            [first + 2, records[first + 2].replace('\t3\t', '\t2\t')],
+            [first + 2, records[first + 2].replace('\t3\t', '\t0\t')],
+            # A line is claimed to be used after the last line
+            [first + 2, records[first + 2].replace('\t3\t', '\t99\t')]]:
+        tampered = records[:k] + [record] + records[k + 1:]
+        if debug:
+            print('Testing validity of the proof written as:\n' +
+                  '\n'.join(tampered))
+        assert is_valid_proof_file(io.StringIO('\n'.join(tampered)))
+
+
+def test_encode_proof(debug=False):
+    for proof in [DISJUNCTION_COMMUTATIVITY_PROOF,
+                  DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF,
+                  Proof(InferenceRule([], Formula.parse('(~p|p)')), {R2},
+                        [Proof.Line(Formula.parse('(~p|p)'), R2, [])])]:
+        if debug:
+            print('Testing encoding the following proof:\n' + str(proof))
+        encoded = encode_proof(proof)
+        assert pickle.loads(pickle.dumps(encoded)) == encoded
+        decoded = decode_proof(encoded)
+        assert decoded.statement == proof.statement
+        assert decoded.rules == proof.rules
+        assert [str(line) for line in decoded.lines] == \
+               [str(line) for line in proof.lines]
+        assert decoded.is_valid()
+    # Each distinct formula is encoded once
+    formulae = encode_proof(DISJUNCTION_RIGHT_ASSOCIATIVITY_PROOF)[0]
+    assert len(formulae) == len(set(formulae))
+
+
 def test_ex4(debug=False):
     test_variables(debug)
     test_specialize(debug)
@@ -870,12 +1119,18 @@ def test_ex4(debug=False):
     test_rule_for_line(debug)
     test_is_line_valid(debug)
     test_is_valid(debug)
+    test_extended(debug)
+    test_encode_proof(debug)
+    test_lazy_proof(debug)
+    test_write_proof(debug)
 
 
 def test_ex5(debug=False):
     test_prove_specialization(debug)
     test_inline_proof_once(debug)
     test_inline_proof(debug)
+    test_inline_proof_many_uses(debug)
+    test_compress_proof(debug)
 
 
 def test_all(debug=False):
@@ -0,0 +1,384 @@
+# (c) This file is part of the course
+# Mathematical Logic through Programming
+# by Gonczarowski and Nisan.
+# File name: propositions/sat.py
+
+"""Satisfiability checking of propositional formulae by conflict-driven clause
+learning.
+
+Clauses are lists of literals over variables numbered from zero, where the
+literal ``2*v`` stands for the variable ``v`` and the literal ``2*v+1`` stands
+for its negation, so that the negation of a literal ``l`` is ``l^1``.
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from propositions.syntax import *
+
+Clause = List[int]
+
+#: Number of conflicts in a unit of the (Luby) restart schedule
+RESTART_UNIT = 100
+
+#: Factor by which variable activities decay after each conflict
+ACTIVITY_DECAY = 0.95
+
+
+def tseitin_encoding(formulae: Iterable[Formula]) -> \
+        Tuple[int, List[Clause], Dict[str, int]]:
+    """Computes a set of clauses that is satisfiable if and only if all the
+    given formulae hold together, introducing a fresh clause variable per
+    distinct binary subformula (the Tseitin encoding).
+
+    Parameters:
+        formulae: formulae to encode.
+
+    Returns:
+        A triple of the number of clause variables, the clauses, and a map from
+        each variable of the given formulae to its clause variable. The
+        restrictions of the satisfying assignments of the clauses to the
+        clause variables of the formulae variables are exactly the models of
+        the formulae.
+    """
+    clauses = []
+    variables = {}
+    # Maps each subformula that was already encoded to the literal that holds
+    # exactly when the subformula does
+    literals = {}
+    counter = [0]
+
+    def new_variable() -> int:
+        counter[0] += 1
+        return counter[0] - 1
+
+    true = None
+    for formula in formulae:
+        pending = [formula]
+        while len(pending) > 0:
+            node = pending[-1]
+            if node in literals:
+                pending.pop()
+                continue
+            root = node.root
+            if is_variable(root):
+                if root not in variables:
+                    variables[root] = new_variable()
+                literals[node] = 2 * variables[root]
+            elif is_constant(root):
+                if true is None:
+                    true = 2 * new_variable()
+                    clauses.append([true])
+                literals[node] = true if root == 'T' else true ^ 1
+            elif node.first not in literals:
+                pending.append(node.first)
+                continue
+            elif is_unary(root):
+                literals[node] = literals[node.first] ^ 1
+            elif node.second not in literals:
+                pending.append(node.second)
+                continue
+            else:
+                first, second = literals[node.first], literals[node.second]
+                if root == '->':
+                    root, first = '|', first ^ 1
+                negate = root in {'-&', '-|', '<->'}
+                output = 2 * new_variable()
+                if root in {'&', '-&'}:
+                    clauses.extend([[output ^ 1, first], [output ^ 1, second],
+                                    [output, first ^ 1, second ^ 1]])
+                elif root in {'|', '-|'}:
+                    clauses.extend([[output ^ 1, first, second],
+                                    [output, first ^ 1], [output, second ^ 1]])
+                else:
+                    clauses.extend([[output ^ 1, first, second],
+                                    [output ^ 1, first ^ 1, second ^ 1],
+                                    [output, first ^ 1, second],
+                                    [output, first, second ^ 1]])
+                literals[node] = output ^ 1 if negate else output
+            pending.pop()
+        clauses.append([literals[formula]])
+    return counter[0], clauses, variables
+
+
+def _luby(i: int) -> int:
+    """Computes the given element of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1,
+    1, 2, 1, 1, 2, 4, 8, ...
+
+    Parameters:
+        i: index (starting from zero) of the element to compute.
+
+    Returns:
+        The computed element.
+    """
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i = i % size
+    return 2 ** exponent
+
+
+class CdclSolver:
+    """A conflict-driven clause-learning satisfiability solver, with two
+    watched literals per clause, VSIDS decision heuristic with phase saving,
+    first-UIP clause learning and Luby restarts."""
+
+    def __init__(self, variable_count: int, clauses: Iterable[Clause]) -> None:
+        """Initializes a `CdclSolver` over the given clauses.
+
+        Parameters:
+            variable_count: number of variables over which the clauses are
+                defined.
+            clauses: clauses to solve.
+        """
+        self.__variable_count = variable_count
+        # Value of each literal: 1 if true, 0 if false, -1 if unassigned
+        self.__values = [-1] * (2 * variable_count)
+        self.__levels = [0] * variable_count
+        self.__reasons: List[Optional[int]] = [None] * variable_count
+        self.__phases = [False] * variable_count
+        self.__activities = [0.0] * variable_count
+        self.__activity_increment = 1.0
+        self.__heap = [(0.0, v) for v in range(variable_count)]
+        self.__trail: List[int] = []
+        self.__level_starts: List[int] = []
+        self.__propagated = 0
+        self.__clauses: List[Clause] = []
+        self.__watches: List[List[int]] = \
+            [[] for _ in range(2 * variable_count)]
+        self.__inconsistent = False
+        for clause in clauses:
+            self.__add_input_clause(clause)
+
+    def __add_input_clause(self, clause: Clause) -> None:
+        literals = set(clause)
+        if any(literal ^ 1 in literals for literal in literals):
+            return
+        clause = [literal for literal in literals
+                  if self.__values[literal] != 0]
+        if len(clause) == 0:
+            self.__inconsistent = True
+        elif len(clause) == 1:
+            if self.__values[clause[0]] == -1:
+                self.__assign(clause[0], None)
+        elif all(self.__values[literal] == -1 for literal in clause):
+            self.__watch(clause)
+        # Otherwise some literal of the clause already holds at level zero
+
+    def __watch(self, clause: Clause) -> int:
+        index = len(self.__clauses)
+        self.__clauses.append(clause)
+        self.__watches[clause[0]].append(index)
+        self.__watches[clause[1]].append(index)
+        return index
+
+    def __assign(self, literal: int, reason: Optional[int]) -> None:
+        variable = literal >> 1
+        self.__values[literal] = 1
+        self.__values[literal ^ 1] = 0
+        self.__levels[variable] = len(self.__level_starts)
+        self.__reasons[variable] = reason
+        self.__trail.append(literal)
+
+    def __propagate(self) -> Optional[int]:
+        """Assigns every literal implied by unit propagation.
+
+        Returns:
+            The index of a clause all of whose literals are false, or ``None``
+            if there is no such clause.
+        """
+        values, clauses, watches, trail = \
+            self.__values, self.__clauses, self.__watches, self.__trail
+        while self.__propagated < len(trail):
+            false_literal = trail[self.__propagated] ^ 1
+            self.__propagated += 1
+            watching = watches[false_literal]
+            kept = 0
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+                # Keep the false watched literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                other = clause[0]
+                if values[other] == 1:
+                    watching[kept] = index
+                    kept += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != 0:
+                        clause[1], clause[k] = clause[k], false_literal
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    watching[kept] = index
+                    kept += 1
+                    if values[other] == 0:
+                        watching[kept:] = watching[i:]
+                        self.__propagated = len(trail)
+                        return index
+                    self.__assign(other, index)
+            del watching[kept:]
+        return None
+
+    def __analyze(self, conflict: int) -> Tuple[Clause, int]:
+        """Derives the first-UIP clause from the given conflict.
+
+        Parameters:
+            conflict: index of a clause all of whose literals are false.
+
+        Returns:
+            The learnt clause, whose first literal is its only literal
+            assigned at the current level and whose second literal (if any) is
+            assigned at the highest level among the rest, and that level.
+        """
+        level = len(self.__level_starts)
+        seen = set()
+        learnt = [-1]
+        pending = 0
+        literal = -1
+        position = len(self.__trail) - 1
+        clause = self.__clauses[conflict]
+        while True:
+            for other in clause:
+                variable = other >> 1
+                if other == literal or variable in seen or \
+                        self.__levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.__bump(variable)
+                if self.__levels[variable] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+            while self.__trail[position] >> 1 not in seen:
+                position -= 1
+            literal = self.__trail[position]
+            position -= 1
+            seen.remove(literal >> 1)
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.__clauses[self.__reasons[literal >> 1]]
+        learnt[0] = literal ^ 1
+        if len(learnt) == 1:
+            return learnt, 0
+        highest = max(range(1, len(learnt)),
+                      key=lambda k: self.__levels[learnt[k] >> 1])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.__levels[learnt[1] >> 1]
+
+    def __bump(self, variable: int) -> None:
+        self.__activities[variable] += self.__activity_increment
+        if self.__activities[variable] > 1e100:
+            self.__activities = [activity * 1e-100
+                                 for activity in self.__activities]
+            self.__activity_increment *= 1e-100
+            self.__heap = [(-self.__activities[v], v)
+                           for v in range(self.__variable_count)
+                           if self.__values[2 * v] == -1]
+            heapq.heapify(self.__heap)
+        elif self.__values[2 * variable] == -1:
+            heapq.heappush(self.__heap, (-self.__activities[variable],
+                                         variable))
+
+    def __backtrack(self, level: int) -> None:
+        if len(self.__level_starts) <= level:
+            return
+        start = self.__level_starts[level]
+        for literal in self.__trail[start:]:
+            variable = literal >> 1
+            self.__phases[variable] = literal & 1 == 0
+            self.__values[literal] = self.__values[literal ^ 1] = -1
+            self.__reasons[variable] = None
+            heapq.heappush(self.__heap, (-self.__activities[variable],
+                                         variable))
+        del self.__trail[start:]
+        del self.__level_starts[level:]
+        self.__propagated = len(self.__trail)
+        if len(self.__heap) > 4 * self.__variable_count + 1000:
+            self.__heap = [(-self.__activities[v], v)
+                           for v in range(self.__variable_count)
+                           if self.__values[2 * v] == -1]
+            heapq.heapify(self.__heap)
+
+    def __decide(self) -> Optional[int]:
+        """Pops the unassigned variable with the highest activity.
+
+        Returns:
+            The popped variable, or ``None`` if all variables are assigned.
+        """
+        heap = self.__heap
+        while len(heap) > 0:
+            activity, variable = heapq.heappop(heap)
+            if self.__values[2 * variable] == -1 and \
+                    -activity == self.__activities[variable]:
+                return variable
+        return None
+
+    def solve(self) -> Optional[List[bool]]:
+        """Searches for a satisfying assignment of the clauses.
+
+        Returns:
+            The value of each variable in a satisfying assignment of the
+            clauses, or ``None`` if the clauses are unsatisfiable.
+        """
+        if self.__inconsistent:
+            return None
+        conflicts = 0
+        restarts = 0
+        while True:
+            conflict = self.__propagate()
+            if conflict is not None:
+                if len(self.__level_starts) == 0:
+                    self.__inconsistent = True
+                    return None
+                learnt, level = self.__analyze(conflict)
+                self.__backtrack(level)
+                self.__assign(learnt[0], None if len(learnt) == 1
+                              else self.__watch(learnt))
+                self.__activity_increment /= ACTIVITY_DECAY
+                conflicts += 1
+                if conflicts >= RESTART_UNIT * _luby(restarts):
+                    conflicts = 0
+                    restarts += 1
+                    self.__backtrack(0)
+                continue
+            variable = self.__decide()
+            if variable is None:
+                return [self.__values[2 * v] == 1
+                        for v in range(self.__variable_count)]
+            self.__level_starts.append(len(self.__trail))
+            self.__assign(2 * variable + (0 if self.__phases[variable] else 1),
+                          None)
+
+
+def satisfying_model(formulae: Iterable[Formula]) -> \
+        Optional[Dict[str, bool]]:
+    """Searches for a model in which all the given formulae hold.
+
+    Parameters:
+        formulae: formulae to satisfy.
+
+    Returns:
+        A model over exactly the variables of the given formulae in which all
+        of them hold, or ``None`` if there is no such model.
+
+    Examples:
+        >>> satisfying_model([Formula.parse('(p->q)'), Formula.parse('p')])
+        {'p': True, 'q': True}
+        >>> satisfying_model([Formula.parse('(p&~p)')]) is None
+        True
+    """
+    variable_count, clauses, variables = tseitin_encoding(formulae)
+    values = CdclSolver(variable_count, clauses).solve()
+    if values is None:
+        return None
+    return {variable: values[variables[variable]]
+            for variable in sorted(variables)}
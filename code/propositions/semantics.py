@@ -5,10 +5,13 @@
 
 """Semantic analysis of propositional-logic constructs."""
 import itertools
-from typing import AbstractSet, Iterable, Iterator, List, Mapping
+import sys
+from typing import AbstractSet, Callable, Iterable, Iterator, List, Mapping, \
+    Optional, Sequence, TextIO, Tuple, Union
 
 from propositions.syntax import *
 from propositions.proofs import *
+from propositions.sat import satisfying_model
 
 NOT_OP = '~'
 NOR_OP = '-|'
@@ -25,6 +28,13 @@ PIPE = '|'
 
 Model = Mapping[str, bool]
 
+#: Number of rows that `write_truth_table` computes and writes at once
+TRUTH_TABLE_CHUNK_ROWS = 2 ** 14
+
+#: Formulae over at most this many variables are decided by computing their
+#: truth tables, and formulae over more variables by the SAT solver
+TRUTH_TABLE_MAX_VARIABLES = 12
+
 
 def is_model(model: Model) -> bool:
     """Checks if the given dictionary a model over some set of variables.
@@ -96,6 +106,277 @@ def evaluate(formula: Formula, model: Model) -> bool:
             return not (res_l or res_r)
 
 
+#: Python expression templates for evaluating each operator over the truth
+#: values of its operands, given as ``{0}`` and ``{1}``
+_BOOLEAN_TEMPLATES = {NOT_OP: 'not {0}', AND_OP: '{0} and {1}',
+                      OR_OP: '{0} or {1}', IMPLY_OP: 'not {0} or {1}',
+                      XOR_OP: '{0} != {1}', IFF_OP: '{0} == {1}',
+                      NAND_OP: 'not ({0} and {1})', NOR_OP: 'not ({0} or {1})',
+                      T_OP: 'True', F_OP: 'False'}
+
+
+def _straight_line_program(formula: Formula) -> List[Tuple[str, int, int]]:
+    """Flattens the given formula into a sequence of instructions, each
+    computing the value of one distinct subformula of the given formula from
+    the values computed by previous instructions.
+
+    Parameters:
+        formula: formula to flatten.
+
+    Returns:
+        A list of triples, one per distinct subformula of the given formula,
+        such that each subformula comes after its operands and the given
+        formula comes last. Each triple consists of the root of the subformula
+        and of the indices in the list of its first and second operands (or
+        ``-1`` for missing operands).
+    """
+    return _shared_straight_line_program([formula])[0]
+
+
+def _shared_straight_line_program(formulae: Iterable[Formula]) -> \
+        Tuple[List[Tuple[str, int, int]], List[int]]:
+    """Flattens the given formulae into a single sequence of instructions, as
+    `_straight_line_program` does for one formula, with each subformula that
+    is shared between several of the given formulae computed only once.
+
+    Parameters:
+        formulae: formulae to flatten.
+
+    Returns:
+        A pair of the list of instructions and of the index in it of each of
+        the given formulae. The instructions of each formula that are not
+        instructions of a previous formula come after those of all previous
+        formulae.
+    """
+    instructions = []
+    indices = {}
+    outputs = []
+    for formula in formulae:
+        pending = [formula]
+        while len(pending) > 0:
+            node = pending[-1]
+            if node in indices:
+                pending.pop()
+                continue
+            operands = [] if is_variable(node.root) or is_constant(node.root) \
+                else [node.first] if is_unary(node.root) \
+                else [node.first, node.second]
+            missing = [operand for operand in operands
+                       if operand not in indices]
+            if len(missing) > 0:
+                pending.extend(reversed(missing))
+                continue
+            pending.pop()
+            operand_indices = [indices[operand] for operand in operands] + \
+                              [-1, -1]
+            indices[node] = len(instructions)
+            instructions.append((node.root, operand_indices[0],
+                                 operand_indices[1]))
+        outputs.append(indices[formula])
+    return instructions, outputs
+
+
+def compile_formula(formula: Formula, variables: Optional[Sequence[str]] = None,
+                    bitmask: bool = False) -> \
+        Callable[[Union[Model, Sequence[bool], int]], bool]:
+    """Compiles the given formula into a Python function that calculates its
+    truth value in a given model. The function is built once, evaluates
+    without recursion or operator dispatch, and evaluates each distinct
+    subformula only once.
+
+    Parameters:
+        formula: formula to compile.
+        variables: the variables in the order in which the compiled function
+            is to receive their values, or ``None`` for the compiled function
+            to receive models.
+        bitmask: whether the compiled function is to receive the values of the
+            given variables as the bits of a single integer, the first variable
+            being the most significant bit, rather than as a sequence. The
+            integer ``i`` thus stands for the ``i``-th model in the order
+            returned by `all_models`\ ``(``\ `variables`\ ``)``.
+
+    Returns:
+        A function that calculates the truth value of the given formula,
+        given a model over (possibly a superset of) the variables of the
+        formula if `variables` is ``None``, or given the values of `variables`
+        (which must contain all the variables of the formula) as specified by
+        `bitmask` otherwise.
+
+    Examples:
+        >>> compile_formula(Formula.parse('(p->q)'), ['p', 'q'])([True, False])
+        False
+        >>> compile_formula(Formula.parse('(p->q)'), ['p', 'q'], True)(2)
+        False
+    """
+    assert variables is not None or not bitmask
+    if variables is not None:
+        positions = {variable: i for i, variable in enumerate(variables)}
+    code = ['def evaluate(model):']
+    for i, (root, first, second) in enumerate(_straight_line_program(formula)):
+        if not is_variable(root):
+            value = _BOOLEAN_TEMPLATES[root].format('r' + str(first),
+                                                    'r' + str(second))
+        elif variables is None:
+            value = 'model[' + repr(root) + ']'
+        else:
+            assert root in positions, root + ' is not in ' + str(variables)
+            if not bitmask:
+                value = 'model[' + str(positions[root]) + ']'
+            else:
+                shift = len(variables) - 1 - positions[root]
+                value = '(model >> ' + str(shift) + ') & 1 == 1'
+        code.append('    r' + str(i) + ' = ' + value)
+    code.append('    return r' + str(i))
+    namespace = {}
+    exec('\n'.join(code), namespace)
+    return namespace['evaluate']
+
+
+#: Bitwise implementation of each operator over truth tables given as integers,
+#: where ``mask`` has a set bit for every model
+_BITWISE_OPERATIONS = {
+    NOT_OP: lambda mask, first, second: mask ^ first,
+    AND_OP: lambda mask, first, second: first & second,
+    OR_OP: lambda mask, first, second: first | second,
+    IMPLY_OP: lambda mask, first, second: (mask ^ first) | second,
+    XOR_OP: lambda mask, first, second: first ^ second,
+    IFF_OP: lambda mask, first, second: mask ^ first ^ second,
+    NAND_OP: lambda mask, first, second: mask ^ (first & second),
+    NOR_OP: lambda mask, first, second: mask ^ (first | second),
+    T_OP: lambda mask, first, second: mask,
+    F_OP: lambda mask, first, second: 0}
+
+
+def variable_truth_table(variables: Sequence[str], variable: str,
+                         start: int = 0, stop: Optional[int] = None) -> int:
+    """Computes the truth table of the given variable over all models over the
+    given variables, or over a range of them, as a bitvector.
+
+    Parameters:
+        variables: variables over which the models are defined.
+        variable: one of the given variables.
+        start: index of the first model of the range, in the order returned
+            by `all_models`\ ``(``\ `variables`\ ``)``.
+        stop: index past the last model of the range, or ``None`` for the
+            number of models over the given variables.
+
+    Returns:
+        An integer whose ``i``-th bit is set if and only if the given variable
+        is assigned ``True`` in the ``(start+i)``-th model in the order returned
+        by `all_models`\ ``(``\ `variables`\ ``)``.
+
+    Examples:
+        >>> bin(variable_truth_table(['p', 'q'], 'p'))
+        '0b1100'
+        >>> bin(variable_truth_table(['p', 'q'], 'p', 1, 3))
+        '0b10'
+    """
+    size = 2 ** len(variables)
+    if stop is None:
+        stop = size
+    assert 0 <= start <= stop <= size
+    block = 2 ** (len(variables) - 1 - list(variables).index(variable))
+    # The table is made of alternating runs of block zeros and block ones, so
+    # it is one period of two runs, doubled until it covers the whole range
+    # and then shifted to the start of the range
+    offset = start % (2 * block)
+    length = stop - start + offset
+    table = ((1 << block) - 1) << block
+    width = 2 * block
+    while width < length:
+        table |= table << width
+        width *= 2
+    return (table >> offset) & ((1 << (stop - start)) - 1)
+
+
+def truth_table(formula: Formula, variables: Optional[Sequence[str]] = None,
+                start: int = 0, stop: Optional[int] = None) -> int:
+    """Computes the truth table of the given formula as a bitvector, by
+    evaluating each distinct subformula once, with a single bitwise operation
+    over all models at once.
+
+    Parameters:
+        formula: formula to compute the truth table of.
+        variables: variables over which to compute the truth table, which must
+            contain all the variables of the formula, or ``None`` for the
+            variables of the formula sorted alphabetically.
+        start: index of the first model over which to compute the truth
+            table, in the order returned by
+            `all_models`\ ``(``\ `variables`\ ``)``.
+        stop: index past the last model over which to compute the truth
+            table, or ``None`` for the number of models over the variables.
+
+    Returns:
+        An integer whose ``i``-th bit is set if and only if the given formula
+        evaluates to ``True`` in the ``(start+i)``-th model in the order
+        returned by `all_models`\ ``(``\ `variables`\ ``)``.
+
+    Examples:
+        >>> bin(truth_table(Formula.parse('(p->q)'), ['p', 'q']))
+        '0b1011'
+    """
+    if variables is None:
+        variables = sorted(formula.variables())
+    return next(_truth_tables([formula], variables, start, stop))
+
+
+def _truth_tables(formulae: Sequence[Formula], variables: Sequence[str],
+                  start: int = 0, stop: Optional[int] = None) -> Iterator[int]:
+    """Lazily computes the truth tables of the given formulae as bitvectors,
+    as `truth_table` does, computing the table of each subformula that is
+    shared between several of the given formulae only once.
+
+    Parameters:
+        formulae: formulae to compute the truth tables of.
+        variables: variables over which to compute the truth tables, which
+            must contain all the variables of the given formulae.
+        start: index of the first model over which to compute the truth
+            tables.
+        stop: index past the last model over which to compute the truth
+            tables, or ``None`` for the number of models over the variables.
+
+    Returns:
+        An iterator over the truth tables of the given formulae, in order. The
+        table of each formula is only computed when it is requested, so
+        tables of later formulae are never computed if the iteration is
+        stopped early.
+    """
+    if stop is None:
+        stop = 2 ** len(variables)
+    mask = (1 << (stop - start)) - 1
+    program, outputs = _shared_straight_line_program(formulae)
+    # Release the table of each subformula once its last user was computed,
+    # keeping the table of each of the given formulae until it is returned
+    last_uses = list(range(len(program)))
+    for i, (root, first, second) in enumerate(program):
+        for operand in (first, second):
+            if operand >= 0:
+                last_uses[operand] = i
+    frontier = -1
+    for output in outputs:
+        # The table is returned once all instructions up to the frontier were
+        # computed, so it may only be released by a later instruction
+        frontier = max(frontier, output)
+        last_uses[output] = max(last_uses[output], frontier + 1)
+    tables = [0] * len(program)
+    computed = 0
+    for output in outputs:
+        for i in range(computed, output + 1):
+            root, first, second = program[i]
+            if is_variable(root):
+                assert root in variables, root + ' is not in ' + \
+                                          str(variables)
+                tables[i] = variable_truth_table(variables, root, start, stop)
+                continue
+            tables[i] = _BITWISE_OPERATIONS[root](mask, tables[first],
+                                                  tables[second])
+            for operand in (first, second):
+                if operand >= 0 and last_uses[operand] == i:
+                    tables[operand] = None
+        computed = max(computed, output + 1)
+        yield tables[output]
+
+
 def all_models(variables: List[str]) -> Iterable[Model]:
     """Calculates all possible models over the given variables.
 
@@ -129,8 +410,9 @@ def truth_values(formula: Formula, models: Iterable[Model]) -> Iterable[bool]:
         each of the given models, in the order of the given models.
     """
     # Task 2.3
+    evaluator = compile_formula(formula)
     for model in models:
-        yield evaluate(formula, model)
+        yield evaluator(model)
 
 
 def print_truth_table(formula: Formula) -> None:
@@ -150,33 +432,81 @@ def print_truth_table(formula: Formula) -> None:
         | T | T   | F        |
     """
     # Task 2.4
-    __print_header(formula)
-    __print_body(formula)
+    write_truth_table(formula)
 
 
-def __print_body(formula):
-    vars = list(formula.variables())
-    vars.sort()
-    models = all_models(vars)
-    for model in models:
-        print(PIPE, end='')
-        for var in vars:
-            print(' {}{} |'.format(str(model[var])[0], ' ' * (len(var) - 1)), end='')
-        eval = evaluate(formula, model)
-        print(' {}{} |'.format(str(eval)[0], ' ' * (len(repr(formula)) - 1)))
-
-
-def __print_header(formula):
-    print(PIPE, end='')
-    vars = list(formula.variables())
-    vars.sort()
-    for var in vars:
-        print(' {} |'.format(var), end='')
-    print(' {} |'.format(repr(formula)))
-    print(PIPE, end='')
-    for var in vars:
-        print('-{}-|'.format('-' * len(var)), end='')
-    print('-{}-|'.format('-' * len(repr(formula))))
+def write_truth_table(formula: Formula, file: Optional[TextIO] = None,
+                      start: int = 0, stop: Optional[int] = None,
+                      header: bool = True) -> None:
+    """Writes the truth table of the given formula, or a range of its rows,
+    with variable-name columns sorted alphabetically, in the format of
+    `print_truth_table`.
+
+    The rows are written in chunks of `TRUTH_TABLE_CHUNK_ROWS`, with the
+    values of the formula in each chunk computed at once by `truth_table`, so
+    that tables with many rows can be written, paged, or split between
+    several writers efficiently.
+
+    Parameters:
+        formula: formula to write the truth table of.
+        file: file-like object to write to, or ``None`` for the standard
+            output.
+        start: index of the first row to write, in the order of the models
+            returned by `all_models`.
+        stop: index past the last row to write, or ``None`` for the number
+            of models over the variables of the given formula.
+        header: whether to write the header rows before the given range of
+            rows.
+
+    Examples:
+        >>> write_truth_table(Formula.parse('(p|q)'), start=1, stop=3)
+        | p | q | (p|q) |
+        |---|---|-------|
+        | F | T | T     |
+        | T | F | T     |
+    """
+    if file is None:
+        file = sys.stdout
+    variables = sorted(formula.variables())
+    if stop is None:
+        stop = 2 ** len(variables)
+    assert 0 <= start <= stop <= 2 ** len(variables)
+    name = repr(formula)
+    if header:
+        file.write(PIPE + ''.join(' ' + variable + ' |'
+                                  for variable in variables) +
+                   ' ' + name + ' |\n')
+        file.write(PIPE + ''.join('-' + '-' * len(variable) + '-|'
+                                  for variable in variables) +
+                   '-' + '-' * len(name) + '-|\n')
+    cells = [[' ' + value + ' ' * len(variable) + '|' for value in 'FT']
+             for variable in variables]
+    value_cells = [' ' + value + ' ' * len(name) + '|\n' for value in 'FT']
+    # The cells of the last variables of every row are taken from a table of
+    # all their combinations, and the cells of the other variables only
+    # change once per that many rows
+    low_count = min(len(variables), 10)
+    high_count = len(variables) - low_count
+    low_cells = ['']
+    for variable_cells in cells[high_count:]:
+        low_cells = [prefix + cell for prefix in low_cells
+                     for cell in variable_cells]
+    low_mask = len(low_cells) - 1
+    high_prefix = None
+    for chunk_start in range(start, stop, TRUTH_TABLE_CHUNK_ROWS):
+        chunk_stop = min(chunk_start + TRUTH_TABLE_CHUNK_ROWS, stop)
+        table = truth_table(formula, variables, chunk_start, chunk_stop)
+        values = bin(table)[2:].zfill(chunk_stop - chunk_start)[::-1]
+        lines = []
+        for i in range(chunk_start, chunk_stop):
+            if high_prefix is None or i & low_mask == 0:
+                high = i >> low_count
+                high_prefix = PIPE + ''.join(
+                    cells[k][(high >> (high_count - 1 - k)) & 1]
+                    for k in range(high_count))
+            lines.append(high_prefix + low_cells[i & low_mask] +
+                         value_cells[values[i - chunk_start] == '1'])
+        file.write(''.join(lines))
 
 
 def is_tautology(formula: Formula) -> bool:
@@ -189,11 +519,10 @@ def is_tautology(formula: Formula) -> bool:
         ``True`` if the given formula is a tautology, ``False`` otherwise.
     """
     # Task 2.5a
-    for val in truth_values(formula, all_models(formula.variables())):
-        if val is False:
-            return False
-    else:
-        return True
+    variables = formula.variables()
+    if len(variables) <= TRUTH_TABLE_MAX_VARIABLES:
+        return truth_table(formula) == (1 << (2 ** len(variables))) - 1
+    return satisfying_model([Formula(NOT_OP, formula)]) is None
 
 
 def is_contradiction(formula: Formula) -> bool:
@@ -206,11 +535,9 @@ def is_contradiction(formula: Formula) -> bool:
         ``True`` if the given formula is a contradiction, ``False`` otherwise.
     """
     # Task 2.5b
-    for val in truth_values(formula, all_models(formula.variables())):
-        if val is True:
-            return False
-    else:
-        return True
+    if len(formula.variables()) <= TRUTH_TABLE_MAX_VARIABLES:
+        return truth_table(formula) == 0
+    return satisfying_model([formula]) is None
 
 
 def is_satisfiable(formula: Formula) -> bool:
@@ -252,7 +579,10 @@ def __synthesize_model_helper(items, idx):
                        __synthesize_model_helper(items, idx + 1))
 
 
-def synthesize(variables: List[str], values: Iterable[bool]) -> Formula:
+def synthesize(variables: List[str], values: Iterable[bool],
+               minimize: bool = False,
+               dont_cares: Optional[Iterable[bool]] = None,
+               cnf: bool = False) -> Formula:
     """Synthesizes a propositional formula in DNF over the given variables, from
     the given specification of which value the formula should have on each
     possible model over these variables.
@@ -262,6 +592,17 @@ def synthesize(variables: List[str], values: Iterable[bool]) -> Formula:
         values: iterable over truth values for the synthesized formula in every
             possible model over the given variables, in the order returned by
             `all_models`\ ``(``\ `~synthesize.variables`\ ``)``.
+        minimize: whether to synthesize a compact two-level formula, by the
+            Quine-McCluskey method with Petrick's method for up to
+            `QUINE_MCCLUSKEY_MAX_VARIABLES` variables, and by an
+            Espresso-style heuristic for more variables, rather than a clause
+            per model in which the formula is to hold.
+        dont_cares: iterable over flags, in the same order as `values`, of
+            models in which the synthesized formula may have any value, or
+            ``None`` if there are no such models. Only allowed if `minimize`
+            is ``True``.
+        cnf: whether to synthesize a formula in CNF rather than in DNF. Only
+            allowed if `minimize` is ``True``.
 
     Returns:
         The synthesized formula.
@@ -274,8 +615,17 @@ def synthesize(variables: List[str], values: Iterable[bool]) -> Formula:
         True
         True
         False
+        >>> synthesize(['p', 'q'], [True, True, True, False], minimize=True)
+        (~p|~q)
+        >>> synthesize(['p', 'q', 'r'], [False, True, False, True,
+        ...                              False, True, True, True],
+        ...            minimize=True, cnf=True)
+        ((p|r)&(q|r))
     """
     assert len(variables) > 0
+    if minimize:
+        return _synthesize_minimized(variables, values, dont_cares, cnf)
+    assert dont_cares is None and not cnf
     # Task 2.7
     models = list(itertools.compress(all_models(variables), values))
     if len(models) == 0:
@@ -293,6 +643,226 @@ def __synthesize_helper(i, models):
         return Formula('|', formula, __synthesize_helper(i + 1, models))
 
 
+#: Truth tables over at most this many variables are minimized exactly by the
+#: Quine-McCluskey method, and truth tables over more variables heuristically
+QUINE_MCCLUSKEY_MAX_VARIABLES = 8
+
+#: Number of cheapest candidate covers kept while expanding Petrick's product,
+#: beyond which the chosen cover may not be minimal
+PETRICK_MAX_PRODUCTS = 256
+
+# A cube is a conjunction of literals over variables indexed from zero,
+# represented by a pair (mask, value) of integers whose bit n-1-i corresponds
+# to the i-th of n variables, as in the indices of models in the order
+# returned by all_models: the variable appears in the cube if its mask bit is
+# set, and it appears positively if its value bit is also set. A cube thus
+# covers the model with index i if and only if i & mask == value.
+
+
+def _synthesize_minimized(variables: List[str], values: Iterable[bool],
+                          dont_cares: Optional[Iterable[bool]], cnf: bool) \
+        -> Formula:
+    """Synthesizes a compact two-level propositional formula over the given
+    variables from its values in all models over these variables.
+
+    Parameters:
+        variables: the variables for the synthesized formula.
+        values: truth values for the synthesized formula in every model over
+            the given variables, in the order returned by `all_models`.
+        dont_cares: flags of the models in which the synthesized formula may
+            have any value, in the same order, or ``None`` if there are none.
+        cnf: whether to synthesize a formula in CNF rather than in DNF.
+
+    Returns:
+        The synthesized formula.
+    """
+    values = list(values)
+    size = 2 ** len(variables)
+    assert len(values) == size
+    dont_cares = [False] * size if dont_cares is None else list(dont_cares)
+    assert len(dont_cares) == size
+    # A CNF is the negation of a DNF of the models in which the formula is
+    # false
+    covered = [i for i in range(size) if values[i] != cnf and not dont_cares[i]]
+    free = [i for i in range(size) if dont_cares[i]]
+    if len(variables) <= QUINE_MCCLUSKEY_MAX_VARIABLES:
+        primes = _prime_implicants(len(variables), covered + free)
+        cubes = _minimum_cover(primes, covered)
+    else:
+        cubes = _expand_cover(variables, covered, free)
+    literals = []
+    # List cubes with literals of earlier variables first
+    for mask, value in sorted(cubes, key=lambda cube: (-cube[0], -cube[1])):
+        cube = []
+        for i, variable in enumerate(variables):
+            bit = 1 << (len(variables) - 1 - i)
+            if mask & bit != 0:
+                positive = (value & bit != 0) != cnf
+                cube.append(Formula(variable) if positive else
+                            Formula(NOT_OP, Formula(variable)))
+        literals.append(cube)
+    inner, outer = (OR_OP, AND_OP) if cnf else (AND_OP, OR_OP)
+    p = Formula(variables[0])
+    if len(literals) == 0:
+        # No cube is needed, so the formula is constant
+        return Formula(inner, p, Formula(NOT_OP, p))
+    if len(literals[0]) == 0:
+        # A cube without literals covers all models, so it is the only one
+        return Formula(outer, p, Formula(NOT_OP, p))
+    return _chain(outer, [_chain(inner, cube) for cube in literals])
+
+
+def _chain(operator: str, operands: List[Formula]) -> Formula:
+    """Combines the given operands with the given binary operator, nesting to
+    the right.
+
+    Parameters:
+        operator: binary operator to combine with.
+        operands: nonempty list of formulae to combine.
+
+    Returns:
+        The combined formula.
+    """
+    formula = operands[-1]
+    for operand in reversed(operands[:-1]):
+        formula = Formula(operator, operand, formula)
+    return formula
+
+
+def _prime_implicants(variable_count: int, indices: Iterable[int]) \
+        -> List[Tuple[int, int]]:
+    """Computes all prime implicants of the function that holds exactly in
+    the models with the given indices, by the Quine-McCluskey method.
+
+    Parameters:
+        variable_count: number of variables of the function.
+        indices: indices of the models in which the function holds.
+
+    Returns:
+        The cubes that are maximal among those that cover only models with
+        the given indices.
+    """
+    full = (1 << variable_count) - 1
+    cubes = {(full, index) for index in indices}
+    primes = []
+    while len(cubes) > 0:
+        merged = set()
+        combined = set()
+        for mask, value in cubes:
+            rest = mask
+            while rest != 0:
+                bit = rest & -rest
+                rest ^= bit
+                if (mask, value ^ bit) in cubes:
+                    merged.add((mask ^ bit, value & ~bit))
+                    combined.add((mask, value))
+        primes.extend(sorted(cubes - combined))
+        cubes = merged
+    return primes
+
+
+def _minimum_cover(primes: List[Tuple[int, int]], indices: Iterable[int]) \
+        -> List[Tuple[int, int]]:
+    """Chooses a cover of the models with the given indices with the fewest
+    cubes among the given ones, and with the fewest literals among those,
+    taking all essential cubes and completing them by Petrick's method
+    (see `PETRICK_MAX_PRODUCTS`).
+
+    Parameters:
+        primes: cubes to choose from.
+        indices: indices of the models to cover.
+
+    Returns:
+        The chosen cubes.
+    """
+    coverings = [frozenset(k for k, (mask, value) in enumerate(primes)
+                           if index & mask == value) for index in indices]
+    essential = {next(iter(covering)) for covering in coverings
+                 if len(covering) == 1}
+    remaining = {covering for covering in coverings
+                 if covering.isdisjoint(essential)}
+    # A model that can be covered only by cubes that all cover another model
+    # is covered whenever that other model is
+    remaining = [covering for covering in remaining
+                 if not any(other < covering for other in remaining)]
+    literal_counts = [bin(mask).count('1') for mask, value in primes]
+    # Maps each candidate cover of the models handled so far to its number of
+    # literals
+    products = {frozenset(): 0}
+    for covering in sorted(remaining, key=len):
+        expanded = {}
+        for product, literal_count in products.items():
+            if product.isdisjoint(covering):
+                for k in covering:
+                    expanded[product.union({k})] = \
+                        literal_count + literal_counts[k]
+            else:
+                expanded[product] = literal_count
+        products = expanded
+        if len(products) > PETRICK_MAX_PRODUCTS:
+            products = dict(sorted(products.items(), key=lambda item:
+                                   (len(item[0]), item[1], sorted(item[0])))
+                            [:PETRICK_MAX_PRODUCTS])
+    best = min(products, key=lambda product:
+               (len(product), products[product], sorted(product)))
+    return [primes[k] for k in sorted(essential.union(best))]
+
+
+def _expand_cover(variables: List[str], indices: Iterable[int],
+                  free: Iterable[int]) -> List[Tuple[int, int]]:
+    """Heuristically chooses a small set of cubes that together cover the
+    models with the given indices and only models with these or the given
+    free indices, in the style of the Espresso minimizer: each model that is
+    not covered yet is expanded into a cube by greedily removing literals,
+    and then cubes whose models are covered by the others are dropped.
+
+    The sets of models covered are handled as bitvectors in the form returned
+    by `truth_table`, so each step is a single bitwise operation over all
+    models.
+
+    Parameters:
+        variables: variables of the models.
+        indices: indices of the models to cover.
+        free: indices of additional models that may be covered.
+
+    Returns:
+        The chosen cubes.
+    """
+    size = 2 ** len(variables)
+    on = sum(1 << index for index in indices)
+    off = ((1 << size) - 1) & ~on & ~sum(1 << index for index in free)
+    cubes = []
+    uncovered = on
+    while uncovered != 0:
+        lowest = uncovered & -uncovered
+        mask, value = size - 1, lowest.bit_length() - 1
+        table = lowest
+        for i in range(len(variables)):
+            bit = 1 << i
+            # Removing a literal adds the models that differ from the covered
+            # ones only in its variable
+            if value & bit != 0:
+                expanded = table | (table >> bit)
+            else:
+                expanded = table | (table << bit)
+            if expanded & off == 0:
+                mask, value, table = mask ^ bit, value & ~bit, expanded
+        cubes.append((mask, value, table))
+        uncovered &= ~table
+    # Drop cubes whose models are covered by the others, trying the cubes
+    # that cover the fewest models first
+    cubes.sort(key=lambda cube: (bin(cube[2]).count('1'), cube[:2]))
+    kept = list(cubes)
+    for cube in cubes:
+        others = 0
+        for other in kept:
+            if other is not cube:
+                others |= other[2]
+        if cube[2] & on & ~others == 0:
+            kept.remove(cube)
+    return sorted((mask, value) for mask, value, table in kept)
+
+
 # Tasks for Chapter 4
 
 
@@ -327,8 +897,51 @@ def is_sound_inference(rule: InferenceRule) -> bool:
         ``True`` if the given inference rule is sound, ``False`` otherwise.
     """
     # Task 4.3
-    for model in all_models(rule.variables()):
-        if not evaluate_inference(rule, model):
-            return False
-    else:
-        return True
+    return inference_counterexample(rule) is None
+
+
+def inference_counterexample(rule: InferenceRule) -> Optional[Model]:
+    """Searches for a model in which all the assumptions of the given
+    inference rule hold but its conclusion does not.
+
+    For rules over at most `TRUTH_TABLE_MAX_VARIABLES` variables, the truth
+    tables of the conclusion and of the assumptions are computed together
+    over all models, sharing common subformulae, and the search stops as
+    soon as no model is left in which the conclusion does not hold and all
+    assumptions checked so far do. For rules over more variables, the SAT
+    solver is run on the assumptions together with the negated conclusion.
+
+    Parameters:
+        rule: inference rule to check.
+
+    Returns:
+        A model over the variables of the given rule in which its assumptions
+        hold and its conclusion does not, or ``None`` if the rule is sound.
+
+    Examples:
+        >>> inference_counterexample(InferenceRule(
+        ...     [Formula.parse('(p|q)')], Formula.parse('p')))
+        {'p': False, 'q': True}
+        >>> inference_counterexample(InferenceRule(
+        ...     [Formula.parse('(p&q)')], Formula.parse('p'))) is None
+        True
+    """
+    variables = sorted(rule.variables())
+    if len(variables) > TRUTH_TABLE_MAX_VARIABLES:
+        return satisfying_model(list(rule.assumptions) +
+                                [Formula(NOT_OP, rule.conclusion)])
+    mask = (1 << (2 ** len(variables))) - 1
+    tables = _truth_tables((rule.conclusion,) + rule.assumptions, variables)
+    # The models that are not yet ruled out as counterexamples
+    candidates = mask ^ next(tables)
+    for table in tables:
+        if candidates == 0:
+            break
+        candidates &= table
+    if candidates == 0:
+        return None
+    # The first counterexample in the order of all_models, whose bits are the
+    # values of the variables, the first variable being the most significant
+    bits = (candidates & -candidates).bit_length() - 1
+    return {variable: (bits >> (len(variables) - 1 - i)) & 1 == 1
+            for i, variable in enumerate(variables)}
@@ -63,6 +63,13 @@ def test_all_models(debug=False):
         if debug:
             print('Testing all models over', variables)
         assert list(all_models(variables)) == models
+    if debug:
+        print('Testing that models over', variables, 'are dictionaries')
+    for model in all_models(variables):
+        assert type(model) is dict
+        copy = model.copy()
+        model['z9'] = True
+        assert model != copy and len(model) == len(variables) + 1
 
 def test_truth_values(debug=False):
     for infix,variables,values in [
@@ -148,6 +155,33 @@ def __test_print_truth_table(infixes, tables, debug):
         assert re.sub('[ -]+', ' ', capturer.captured) == \
                re.sub('[ -]+', ' ', table)
 
+def test_write_truth_table(debug=False):
+    from io import StringIO
+    for infix in ['~r', '(x&(~z|y))', '((p+q12)<->(r-|T))']:
+        formula = Formula.parse(infix)
+        variables = sorted(formula.variables())
+        if debug:
+            print('Testing writing the truth table of', formula, 'in parts')
+        full = StringIO()
+        write_truth_table(formula, full)
+        lines = full.getvalue().splitlines(True)
+        assert len(lines) == 2 + 2 ** len(variables)
+        for model, line in zip(all_models(variables), lines[2:]):
+            cells = [cell.strip() for cell in line.split('|')[1:-1]]
+            assert cells == [str(model[variable])[0]
+                             for variable in variables] + \
+                            [str(evaluate(formula, model))[0]]
+        for start in range(2 ** len(variables) + 1):
+            parts = StringIO()
+            write_truth_table(formula, parts, stop=start)
+            write_truth_table(formula, parts, start=start, header=False)
+            assert parts.getvalue() == full.getvalue()
+            part = StringIO()
+            write_truth_table(formula, part, start=start,
+                              stop=min(start + 1, 2 ** len(variables)),
+                              header=False)
+            assert part.getvalue() == ''.join(lines[2 + start:3 + start])
+
 def test_is_tautology(debug=False):
     for infix,answer in [['~(p&q7)',   False], ['(x|~x)',       True],
                             ['(p->q)', False], ['(p->p)', True],
@@ -306,6 +340,57 @@ def is_DNF(formula):
            (formula.root == '|' and is_DNF(formula.first) and
             is_DNF(formula.second))
 
+def is_disjunctive_clause(f):
+    if is_variable(f.root) or (f.root == '~' and is_variable(f.first.root)):
+        return True
+    return f.root == '|' and is_disjunctive_clause(f.first) and \
+           is_disjunctive_clause(f.second)
+
+def is_CNF(formula):
+    return is_disjunctive_clause(formula) or \
+           (formula.root == '&' and is_CNF(formula.first) and
+            is_CNF(formula.second))
+
+def test_synthesize_minimized(debug=False):
+    majority = [sum(model.values()) >= 2
+                for model in all_models(['p', 'q', 'r'])]
+    parity = [sum(model.values()) % 2 == 1
+              for model in all_models(['p', 'q', 'r'])]
+    # A seven-segment display decoder's segment a, with don't-cares for the
+    # codes above 9
+    segment = [True, False, True, True, False, True, True, True, True, True] + \
+              [False] * 6
+    cases = [(['p'], [False, True], None, 1, 1),
+             (['p', 'q'], [True, True, True, True], None, 2, 1),
+             (['p', 'q'], [False, False, False, False], None, 1, 2),
+             (['p', 'q', 'r'], majority, None, 3, 3),
+             (['p', 'q', 'r'], parity, None, 4, 4),
+             (['w', 'x', 'y', 'z'], segment, [False] * 10 + [True] * 6, 4, 2)]
+    for variables, values, dont_cares, dnf_size, cnf_size in cases:
+        for cnf, size in [(False, dnf_size), (True, cnf_size)]:
+            if debug:
+                print('Testing minimized', 'CNF' if cnf else 'DNF',
+                      'synthesis for variables', variables, 'and values',
+                      values)
+            formula = synthesize(variables, values, minimize=True,
+                                 dont_cares=dont_cares, cnf=cnf)
+            assert is_CNF(formula) if cnf else is_DNF(formula)
+            clauses = 1
+            while formula.root == ('&' if cnf else '|'):
+                clauses += 1
+                formula = formula.second
+            assert clauses == size, str(clauses) + ' != ' + str(size)
+    if debug:
+        print('Testing heuristic minimized synthesis for 12 variables')
+    variables = ['x' + str(i) for i in range(12)]
+    formula = Formula.parse('((x0&x3)|(~x5&(x7|x11)))')
+    table = truth_table(formula, variables)
+    values = [(table >> i) & 1 == 1 for i in range(2 ** 12)]
+    for cnf in [False, True]:
+        synthesized = synthesize(variables, values, minimize=True, cnf=cnf)
+        assert truth_table(synthesized, variables) == table
+        assert len(str(synthesized)) < 80
+
 def test_evaluate_inference(debug=False):
     from propositions.proofs import InferenceRule
 
@@ -370,6 +455,36 @@ def test_is_sound_inference(debug=False):
             print('Testing that', rule, 'is sound')
         assert is_sound_inference(rule)
 
+def test_inference_counterexample(debug=False):
+    from propositions.proofs import InferenceRule
+
+    for assumptions, conclusion in [
+            [[], '(~p|p)'], [[], '(p|p)'], [['(~p|q)', 'p'], 'q'],
+            [['(p|q)', 'p'], 'q'], [['(p->q)', '(q->r)'], 'r'],
+            [['(p->q)', '(q->r)', 'p'], 'r'], [['(x&~x)', 'y'], 'z'],
+            [['(p+q)', '(q+r)'], '~(p+r)'], [['q', '(p&q)'], '(p&q)']]:
+        rule = InferenceRule(
+            [Formula.parse(assumption) for assumption in assumptions],
+            Formula.parse(conclusion))
+        if debug:
+            print('Testing counterexample search for', rule)
+        model = inference_counterexample(rule)
+        if model is None:
+            assert is_sound_inference(rule)
+        else:
+            assert set(model) == rule.variables()
+            assert not evaluate_inference(rule, model)
+    if debug:
+        print('Testing counterexample search over 20 variables')
+    chain = [Formula('->', Formula('x' + str(i)), Formula('x' + str(i + 1)))
+             for i in range(19)]
+    rule = InferenceRule(chain + [Formula('x0')], Formula('x19'))
+    assert inference_counterexample(rule) is None
+    rule = InferenceRule(chain, Formula('x19'))
+    model = inference_counterexample(rule)
+    assert set(model) == rule.variables()
+    assert not evaluate_inference(rule, model)
+
 def test_evaluate_all_operators(debug=False):
     infix1 = '(p+q7)'
     models_values1 = [
@@ -408,16 +523,110 @@ def test_is_tautology_all_operators(debug=False):
             print('Testing whether', formula, 'is a tautology')
         assert is_tautology(formula) == tautology
 
+def test_compile_formula(debug=False):
+    for infix in ['p', 'T', '~F', '(x&~x)', '(p->(q7|~p))', '~((x-&x)-|(y-&y))',
+                  '((p+q)<->((p->r)&(r|~q)))', '((p-&q)|(p-&q))']:
+        formula = Formula.parse(infix)
+        variables = sorted(formula.variables().union({'z'}))
+        if debug:
+            print('Testing compilation of formula', formula, 'over variables',
+                  variables)
+        from_model = compile_formula(formula)
+        from_sequence = compile_formula(formula, variables)
+        from_bitmask = compile_formula(formula, variables, True)
+        for i, model in enumerate(all_models(variables)):
+            value = evaluate(formula, model)
+            assert from_model(frozendict(model)) == value
+            assert from_sequence(tuple(model[v] for v in variables)) == value
+            assert from_bitmask(i) == value
+    if debug:
+        print('Testing compilation of a deeply nested formula')
+    formula = Formula.parse('~' * 10001 + '(p&q)')
+    assert compile_formula(formula, ['p', 'q'], True)(3) is False
+
+def test_truth_table(debug=False):
+    for infix in ['p', 'T', '~F', '(x&~x)', '(p->(q7|~p))', '~((x-&x)-|(y-&y))',
+                  '((p+q)<->((p->r)&(r|~q)))', '((p-&q)|(p-&q))']:
+        formula = Formula.parse(infix)
+        for variables in [sorted(formula.variables()),
+                          sorted(formula.variables().union({'z', 'p1'}))]:
+            if debug:
+                print('Testing truth table of formula', formula,
+                      'over variables', variables)
+            table = truth_table(formula, variables)
+            for i, model in enumerate(all_models(variables)):
+                assert ((table >> i) & 1 == 1) == evaluate(formula, model)
+            assert table >> (2 ** len(variables)) == 0
+    if debug:
+        print('Testing tautology of a formula with 22 variables')
+    disjunction = Formula('x1')
+    for i in range(2, 23):
+        disjunction = Formula('|', disjunction, Formula('x' + str(i)))
+    assert is_tautology(Formula('|', disjunction, Formula('~', disjunction)))
+    assert is_satisfiable(disjunction)
+    assert not is_tautology(disjunction)
+    assert is_contradiction(Formula('&', disjunction,
+                                    Formula('~', disjunction)))
+
+def test_satisfying_model(debug=False):
+    for infixes in [['p'], ['F'], ['(p&~p)'], ['(p->q)', 'p', '~q'],
+                    ['(p->q)', 'p'], ['((p+q)<->~(r-|s))', '(r-&s)'],
+                    ['~((x-&x)-|(y-&y))', '(x->F)'], ['(T&(p1|~p2))']]:
+        formulae = [Formula.parse(infix) for infix in infixes]
+        if debug:
+            print('Testing satisfying model of formulae', infixes)
+        model = satisfying_model(formulae)
+        variables = set()
+        for formula in formulae:
+            variables.update(formula.variables())
+        satisfiable = any(all(evaluate(formula, model)
+                              for formula in formulae)
+                          for model in all_models(sorted(variables)))
+        if model is None:
+            assert not satisfiable
+        else:
+            assert model.keys() == variables
+            assert all(evaluate(formula, model) for formula in formulae)
+    if debug:
+        print('Testing satisfiability of a pigeonhole formula with 30',
+              'variables')
+    # Six pigeons in five holes: x<i>_<j> means pigeon i is in hole j
+    formulae = []
+    for i in range(6):
+        disjunction = Formula('x' + str(i) + '0')
+        for j in range(1, 5):
+            disjunction = Formula('|', disjunction,
+                                  Formula('x' + str(i) + str(j)))
+        formulae.append(disjunction)
+    for j in range(5):
+        for i in range(6):
+            for k in range(i + 1, 6):
+                formulae.append(Formula('-&', Formula('x' + str(i) + str(j)),
+                                        Formula('x' + str(k) + str(j))))
+    assert satisfying_model(formulae) is None
+    assert satisfying_model(formulae[1:]) is not None
+    conjunction = formulae[0]
+    for formula in formulae[1:]:
+        conjunction = Formula('&', conjunction, formula)
+    assert is_contradiction(conjunction)
+    assert is_tautology(Formula('~', conjunction))
+
+
 def test_ex2(debug=False):
     test_evaluate(debug)
+    test_compile_formula(debug)
     test_all_models(debug)
     test_truth_values(debug)
+    test_truth_table(debug)
     test_print_truth_table(debug)
+    test_write_truth_table(debug)
     test_is_tautology(debug)
     test_is_contradiction(debug)
     test_is_satisfiable(debug)
+    test_satisfying_model(debug)
     test_synthesize_for_model(debug)
     test_synthesize(debug)
+    test_synthesize_minimized(debug)
 
 def test_ex3(debug=False):
     assert is_binary('+'), 'Change is_binary() before testing Chapter 3 tasks.'
@@ -427,6 +636,7 @@ def test_ex3(debug=False):
 def test_ex4(debug=False):
     test_evaluate_inference(debug)
     test_is_sound_inference(debug)
+    test_inference_counterexample(debug)
     
 def test_all(debug=False):
     test_ex2(debug)
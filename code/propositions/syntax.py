@@ -6,9 +6,11 @@
 """Syntactic handling of propositional formulae."""
 
 from __future__ import annotations
-from typing import Mapping, Optional, Set, Tuple, Union
 
-from logic_utils import frozen
+import re
+from typing import Iterable, List, Mapping, Optional, Set, Tuple, Union
+
+from logic_utils import InternTable, frozen, is_interning
 
 PREFIX_ERR_MSG = 'Not a valid prefix of a formula'
 
@@ -74,6 +76,30 @@ def is_binary(s: str) -> bool:
     return s in {'&', '|', '->', '+', '<->', '-&', '-|'}
 
 
+def _structural_hash(root: str, first: Optional[Formula],
+                     second: Optional[Formula]) -> int:
+    """Computes the hash of a formula from its root and the (already computed)
+    hashes of its root operands.
+
+    Parameters:
+        root: the root of the formula.
+        first: the first operand to the root, if any.
+        second: the second operand to the root, if any.
+
+    Returns:
+        A hash value that is equal for structurally equal formulae.
+    """
+    if first is None:
+        return hash(root)
+    elif second is None:
+        return hash((root, first._hash))
+    else:
+        return hash((root, first._hash, second._hash))
+
+
+_interned_formulae = InternTable()
+
+
 @frozen
 class Formula:
     """An immutable propositional formula in tree representation.
@@ -90,6 +116,30 @@ class Formula:
     first: Optional[Formula]
     second: Optional[Formula]
 
+    def __new__(cls, root: Optional[str] = None,
+                first: Optional[Formula] = None,
+                second: Optional[Formula] = None) -> Formula:
+        """Allocates a `Formula`, or returns the canonical formula with the
+        given root and root operands if hash-consing is enabled (see
+        `~logic_utils.set_interning`).
+
+        Parameters:
+            root: the root for the formula tree.
+            first: the first operand to the root, if any.
+            second: the second operand to the root, if any.
+
+        Returns:
+            A new formula, or an already initialized canonical one.
+        """
+        if root is None or not is_interning():
+            return super().__new__(cls)
+        key = (root, first, second)
+        formula = _interned_formulae.get(key)
+        if formula is None:
+            formula = super().__new__(cls)
+            _interned_formulae.add(key, formula)
+        return formula
+
     def __init__(self, root: str, first: Optional[Formula] = None,
                  second: Optional[Formula] = None) -> None:
         """Initializes a `Formula` from its root and root operands.
@@ -101,6 +151,9 @@ class Formula:
             second: the second operand to the root, if the root is a binary
                 operator.
         """
+        if getattr(self, '_hash', None) is not None:
+            # A canonical formula returned by __new__ is already initialized
+            return
         if is_variable(root) or is_constant(root):
             assert first is None and second is None
             self.root = root
@@ -111,6 +164,8 @@ class Formula:
             assert is_binary(root) and type(first) is Formula and \
                    type(second) is Formula
             self.root, self.first, self.second = root, first, second
+        self._hash = _structural_hash(root, first, second)
+        self._repr = None
 
     def __eq__(self, other: object) -> bool:
         """Compares the current formula with the given one.
@@ -122,7 +177,26 @@ class Formula:
             ``True`` if the given object is a `Formula` object that equals the
             current formula, ``False`` otherwise.
         """
-        return isinstance(other, Formula) and str(self) == str(other)
+        if self is other:
+            return True
+        if not isinstance(other, Formula):
+            return False
+        pairs = [(self, other)]
+        # Pairs of shared subformulae are compared only once
+        compared = set()
+        while len(pairs) > 0:
+            first, second = pairs.pop()
+            if first is second or (id(first), id(second)) in compared:
+                continue
+            compared.add((id(first), id(second)))
+            if first._hash != second._hash or first.root != second.root:
+                return False
+            if is_unary(first.root):
+                pairs.append((first.first, second.first))
+            elif is_binary(first.root):
+                pairs.append((first.second, second.second))
+                pairs.append((first.first, second.first))
+        return True
 
     def __ne__(self, other: object) -> bool:
         """Compares the current formula with the given one.
@@ -137,7 +211,18 @@ class Formula:
         return not self == other
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self._hash
+
+    def __reduce__(self) -> Tuple[type, Tuple[str, Optional[Formula],
+                                              Optional[Formula]]]:
+        # Rebuild through the constructor, so that the hash is recomputed in
+        # the unpickling process and the formula is interned there if enabled
+        if is_unary(self.root):
+            return Formula, (self.root, self.first)
+        elif is_binary(self.root):
+            return Formula, (self.root, self.first, self.second)
+        else:
+            return Formula, (self.root,)
 
     def __repr__(self) -> str:
         """Computes the string representation of the current formula.
@@ -146,14 +231,71 @@ class Formula:
             The standard string representation of the current formula.
         """
         # Task 1.1
-        if is_variable(self.root):
-            return self.root
-        elif is_constant(self.root):
-            return self.root
-        elif is_unary(self.root):
-            return NEG + str(self.first)
-        elif is_binary(self.root):
-            return L_BRACK + str(self.first) + self.root + str(self.second) + R_BRACK
+        if self._repr is None:
+            # The formula is immutable, so the string is computed only once
+            object.__setattr__(self, '_repr', ''.join(self._repr_tokens()))
+        return self._repr
+
+    def _repr_tokens(self) -> List[str]:
+        """Computes the tokens of the standard string representation of the
+        current formula, without recursion, reusing the cached representations
+        of subformulae that were already computed.
+
+        Returns:
+            A list of strings whose concatenation is the standard string
+            representation of the current formula.
+        """
+        tokens = []
+        pending = [self]
+        while len(pending) > 0:
+            node = pending.pop()
+            if type(node) is str:
+                tokens.append(node)
+            elif node._repr is not None:
+                tokens.append(node._repr)
+            elif is_unary(node.root):
+                tokens.append(NEG)
+                pending.append(node.first)
+            elif is_binary(node.root):
+                tokens.append(L_BRACK)
+                pending.extend((R_BRACK, node.second, node.root, node.first))
+            else:
+                tokens.append(node.root)
+        return tokens
+
+    def subformulae(self) -> List[Formula]:
+        """Lists the distinct subformula objects of the current formula,
+        without recursion, visiting a subformula object that is shared by
+        several parents only once.
+
+        Returns:
+            The subformula objects of the current formula, each appearing once
+            and after all of its own subformulae, ending with the current
+            formula.
+
+        Examples:
+            >>> p = Formula('p')
+            >>> Formula('&', p, p).subformulae()
+            [p, (p&p)]
+        """
+        subformulae = []
+        visited = set()
+        pending = [self]
+        while len(pending) > 0:
+            node = pending[-1]
+            if id(node) in visited:
+                pending.pop()
+                continue
+            if (is_unary(node.root) or is_binary(node.root)) and \
+                    id(node.first) not in visited:
+                pending.append(node.first)
+            elif is_binary(node.root) and id(node.second) not in visited:
+                pending.append(node.second)
+            else:
+                pending.pop()
+                visited.add(id(node))
+                subformulae.append(node)
+        return subformulae
 
     def variables(self) -> Set[str]:
         """Finds all atomic propositions (variables) in the current formula.
@@ -162,14 +304,8 @@ class Formula:
             A set of all atomic propositions used in the current formula.
         """
         # Task 1.2
-        if is_variable(self.root):
-            return {self.root}
-        elif is_constant(self.root):
-            return set()
-        elif is_unary(self.root):
-            return self.first.variables()
-        elif is_binary(self.root):
-            return set.union(self.first.variables(), self.second.variables())
+        return {node.root for node in self.subformulae()
+                if is_variable(node.root)}
 
     def operators(self) -> Set[str]:
         """Finds all operators in the current formula.
@@ -179,14 +315,8 @@ class Formula:
             current formula.
         """
         # Task 1.3
-        if is_variable(self.root):
-            return set()
-        elif is_constant(self.root):
-            return {self.root}
-        elif is_unary(self.root):
-            return set.union({self.root}, self.first.operators())
-        elif is_binary(self.root):
-            return set.union({self.root}, self.first.operators(), self.second.operators())
+        return {node.root for node in self.subformulae()
+                if not is_variable(node.root)}
 
     @staticmethod
     def parse_prefix(s: str) -> Tuple[Union[Formula, None], str]:
@@ -205,55 +335,10 @@ class Formula:
             the error message is a string with some human-readable content.
         """
         # Task 1.4
-
-        # Base case
-        if s == '':
-            return None, PREFIX_ERR_MSG
-        elif len(s) == 1:
-            return (Formula(s), '') if ('p' <= s <= 'z' or is_constant(s)) else (None, PREFIX_ERR_MSG)
-        elif 'p' <= s[0] <= 'z':
-            i = 1
-            while (i < len(s)) and ('0' <= s[i] <= '9'):
-                i += 1
-            return Formula(s[:i]), s[i:]
-        elif is_constant(s[0]):
-            return Formula(s[0]), s[1:]
-
-        # Induction
-        elif is_unary(s[0]):
-            ff, rr = Formula.parse_prefix(s[1:])
-            if ff is None:
-                return None, PREFIX_ERR_MSG
-            else:
-                return Formula(s[0], ff), rr
-        elif s[0] == L_BRACK:
-            # ff and ff2 are the left and right hand sides of the formula, respectively
-            ff, rr = Formula.parse_prefix(s[1:])
-            if len(rr) < 1:
-                return None, PREFIX_ERR_MSG
-            else:
-                if is_binary(rr[0]):
-                    end_len = 1
-                elif len(rr) >= 2:
-                    if is_binary(rr[0:2]):
-                        end_len = 2
-                    elif is_binary(rr[0:3]):
-                        end_len = 3
-                    else:
-                        return None, PREFIX_ERR_MSG
-                else:
-                    return None, PREFIX_ERR_MSG
-                ff2, rr2 = Formula.parse_prefix(rr[end_len:])
-                if ff2 is None:
-                    return None, PREFIX_ERR_MSG
-                else:
-                    if len(rr2) > 0 and rr2[0] == R_BRACK:
-                        rr2 = rr2[1:]
-                    else:
-                        return None, PREFIX_ERR_MSG
-                    return Formula(rr[0:end_len], ff, ff2), rr2
-        else:
-            return None, PREFIX_ERR_MSG
+        formula, end = _parse_from(s, 0)
+        if formula is None:
+            return None, end
+        return formula, s[end:]
 
     @staticmethod
     def is_formula(s: str) -> bool:
@@ -267,8 +352,8 @@ class Formula:
             representation of a formula, ``False`` otherwise.
         """
         # Task 1.5
-        ff, rr = Formula.parse_prefix(s)
-        return rr == ''
+        formula, end = _parse_from(s, 0)
+        return formula is not None and end == len(s)
 
     @staticmethod
     def parse(s: str) -> Formula:
@@ -280,10 +365,13 @@ class Formula:
         Returns:
             A formula whose standard string representation is the given string.
         """
-        assert Formula.is_formula(s)
         # Task 1.6
-        ff, rr = Formula.parse_prefix(s)
-        return ff
+        formula, end = _parse_from(s, 0)
+        assert formula is not None, end
+        assert end == len(s), \
+            PREFIX_ERR_MSG + ': unexpected ' + repr(s[end]) + ' at offset ' + \
+            str(end)
+        return formula
 
     # Optional tasks for Chapter 1
 
@@ -294,6 +382,17 @@ class Formula:
             The polish notation representation of the current formula.
         """
         # Optional Task 1.7
+        tokens = []
+        pending = [self]
+        while len(pending) > 0:
+            node = pending.pop()
+            tokens.append(node.root)
+            if is_unary(node.root):
+                pending.append(node.first)
+            elif is_binary(node.root):
+                pending.append(node.second)
+                pending.append(node.first)
+        return ''.join(tokens)
 
     @staticmethod
     def parse_polish(s: str) -> Formula:
@@ -306,6 +405,56 @@ class Formula:
             A formula whose polish notation representation is the given string.
         """
         # Optional Task 1.8
+        formulae = Formula.parse_polish_sequence(s)
+        assert len(formulae) == 1
+        return formulae[0]
+
+    @staticmethod
+    def polish_sequence(formulae: Iterable[Formula]) -> str:
+        """Computes a single polish notation representation of all the given
+        formulae, by concatenating their polish notation representations. As
+        polish notation is prefix-free, no separators are needed.
+
+        Parameters:
+            formulae: formulae to represent.
+
+        Returns:
+            The concatenated polish notation representations of the given
+            formulae, in order.
+        """
+        return ''.join(formula.polish() for formula in formulae)
+
+    @staticmethod
+    def parse_polish_sequence(s: str) -> List[Formula]:
+        """Parses the given concatenation of polish notation representations
+        into the formulae that it represents.
+
+        Parameters:
+            s: string to parse, as returned by `polish_sequence`.
+
+        Returns:
+            The formulae whose polish notation representations are concatenated
+            in the given string, in order.
+        """
+        tokens = _POLISH_TOKEN_PATTERN.findall(s)
+        assert sum(len(token) for token in tokens) == len(s), \
+            'Not a valid polish notation representation'
+        # Operands follow their operator, so build the formulae from the last
+        # token backwards, keeping the formulae built so far on a stack
+        operands = []
+        for token in reversed(tokens):
+            if is_unary(token):
+                assert len(operands) >= 1, 'Missing operand for ' + token
+                operands.append(Formula(token, operands.pop()))
+            elif is_binary(token):
+                assert len(operands) >= 2, 'Missing operand for ' + token
+                first = operands.pop()
+                second = operands.pop()
+                operands.append(Formula(token, first, second))
+            else:
+                operands.append(Formula(token))
+        operands.reverse()
+        return operands
 
     # Tasks for Chapter 3
 
@@ -329,19 +478,21 @@ class Formula:
         for variable in substitution_map:
             assert is_variable(variable)
         # Task 3.3
-        if is_variable(self.root):
-            if self.root in substitution_map.keys():
-                return substitution_map[self.root]
+        # Each distinct subformula object is substituted in only once, so that
+        # subformulae shared by several parents stay shared in the result
+        results = {}
+        for node in self.subformulae():
+            if is_variable(node.root):
+                result = substitution_map.get(node.root, node)
+            elif is_unary(node.root):
+                result = Formula(node.root, results[id(node.first)])
+            elif is_binary(node.root):
+                result = Formula(node.root, results[id(node.first)],
+                                 results[id(node.second)])
             else:
-                return self
-        elif is_unary(self.root):
-            return Formula(self.root, self.first.substitute_variables(substitution_map))
-        elif is_binary(self.root):
-            l_formula = self.first.substitute_variables(substitution_map)
-            r_formula = self.second.substitute_variables(substitution_map)
-            return Formula(self.root, l_formula, r_formula)
-        else:
-            return self
+                result = node
+            results[id(node)] = result
+        return results[id(self)]
 
     def substitute_operators(
             self, substitution_map: Mapping[str, Formula]) -> Formula:
@@ -368,18 +519,111 @@ class Formula:
                    is_constant(operator)
             assert substitution_map[operator].variables().issubset({'p', 'q'})
         # Task 3.4
-        if is_variable(self.root):
-            return self
-        elif is_constant(self.root):
-            if self.root in substitution_map.keys():
-                return substitution_map[self.root]
+        # Each distinct subformula object is substituted in only once, and the
+        # substitutions of its operands are shared by all their occurrences in
+        # the result, so the result is at most linearly larger when counted
+        # by distinct subformula objects
+        results = {}
+        for node in self.subformulae():
+            if is_variable(node.root):
+                result = node
+            elif node.root in substitution_map:
+                operands = {}
+                if is_unary(node.root) or is_binary(node.root):
+                    operands['p'] = results[id(node.first)]
+                if is_binary(node.root):
+                    operands['q'] = results[id(node.second)]
+                result = substitution_map[node.root]
+                if len(operands) > 0:
+                    result = result.substitute_variables(operands)
+            elif is_constant(node.root):
+                result = node
+            elif is_unary(node.root):
+                result = Formula(node.root, results[id(node.first)])
             else:
-                return self
+                result = Formula(node.root, results[id(node.first)],
+                                 results[id(node.second)])
+            results[id(node)] = result
+        return results[id(self)]
+
+
+_VARIABLE_PATTERN = re.compile('[p-z][0-9]*')
+
+_POLISH_TOKEN_PATTERN = re.compile(r'[p-z][0-9]*|[TF~&|+]|->|-&|-\||<->')
+
+
+def _parse_error(s: str, position: int, expected: str) -> str:
+    """Formats a human-readable parsing error message.
+
+    Parameters:
+        s: string that was being parsed.
+        position: offset in the given string at which parsing failed.
+        expected: description of what was expected at that offset.
+
+    Returns:
+        An error message stating the offset and what was expected there.
+    """
+    found = 'end of string' if position >= len(s) else repr(s[position])
+    return PREFIX_ERR_MSG + ': expected ' + expected + ' at offset ' + \
+           str(position) + ', found ' + found
+
+
+def _parse_from(s: str, position: int) -> Tuple[Union[Formula, None],
+                                                 Union[int, str]]:
+    """Parses the longest formula starting at the given offset of the given
+    string, in a single left-to-right pass and without recursion.
+
+    Parameters:
+        s: string to parse.
+        position: offset in the given string at which to start parsing.
+
+    Returns:
+        A pair of the parsed formula and the offset just past it in the given
+        string, or of ``None`` and an error message stating the offset at which
+        no formula could be parsed.
+    """
+    # Each pending entry is either NEG, waiting for its operand, L_BRACK,
+    # waiting for the first operand of a binary operator, or a pair of the
+    # first operand and the binary operator, waiting for the second operand
+    pending = []
+    length = len(s)
+    while True:
+        # Skip over prefix operators until reaching an atomic formula
+        while position < length and (s[position] == NEG or
+                                     s[position] == L_BRACK):
+            pending.append(s[position])
+            position += 1
+        if position < length and is_constant(s[position]):
+            formula = Formula(s[position])
+            position += 1
         else:
-            l_formula = self.first.substitute_operators(substitution_map)
-            r_formula = None if is_unary(self.root) else self.second.substitute_operators(substitution_map)
-            if self.root in substitution_map.keys():
-                sub_dict = {'p': l_formula, 'q': r_formula}
-                return substitution_map[self.root].substitute_variables(sub_dict)
+            match = _VARIABLE_PATTERN.match(s, position)
+            if match is None:
+                return None, _parse_error(s, position, 'a formula')
+            formula = Formula(match.group())
+            position = match.end()
+
+        # Complete every pending operator whose operands are now all parsed
+        while len(pending) > 0:
+            top = pending[-1]
+            if top == NEG:
+                pending.pop()
+                formula = Formula(NEG, formula)
+            elif top == L_BRACK:
+                for operator_length in (3, 2, 1):
+                    operator = s[position:position + operator_length]
+                    if is_binary(operator):
+                        break
+                else:
+                    return None, _parse_error(s, position, 'a binary operator')
+                pending[-1] = (formula, operator)
+                position += len(operator)
+                break
+            elif position < length and s[position] == R_BRACK:
+                pending.pop()
+                formula = Formula(top[1], top[0], formula)
+                position += 1
             else:
-                return Formula(self.root, l_formula, r_formula)
+                return None, _parse_error(s, position, repr(R_BRACK))
+        else:
+            return formula, position
@@ -5,7 +5,9 @@
 
 """Tests for the propositions.syntax module."""
 
-from logic_utils import frozendict
+import pickle
+
+from logic_utils import frozendict, set_interning
 
 from propositions.syntax import *
 
@@ -159,6 +161,23 @@ def test_parse_polish(debug=False):
         assert Formula.parse_polish(polish).polish() == polish
 
 
+def test_polish_sequence(debug=False):
+    infixes = ['p', '~x12', '(x&y)', '~~(x|~T)', '((x1&~x2)|F)', '(p<->(q-|r))',
+               '((p+q)->(p-&q))', 'x1']
+    formulae = [Formula.parse(infix) for infix in infixes]
+    if debug:
+        print("Testing polish sequence of", infixes)
+    polish = Formula.polish_sequence(formulae)
+    assert polish == ''.join(formula.polish() for formula in formulae)
+    assert Formula.parse_polish_sequence(polish) == formulae
+    assert Formula.parse_polish_sequence('') == []
+    if debug:
+        print("Testing polish of a deeply nested formula")
+    f = Formula.parse('~' * 100000 + '(p->q)')
+    assert f.polish() == '~' * 100000 + '->pq'
+    assert Formula.parse_polish(f.polish()) == f
+
+
 # Tests for Chapter 3
 
 def test_repr_all_operators(debug=False):
@@ -334,18 +353,161 @@ def test_substitute_operators(debug=False):
         assert a == r, "Incorrect answer:" + a
 
 
+def _substitute_variables_in_tree(formula, substitution_map):
+    # The original substitution, which copies the formula tree
+    if is_variable(formula.root):
+        return substitution_map.get(formula.root, formula)
+    elif is_unary(formula.root):
+        return Formula(formula.root, _substitute_variables_in_tree(
+            formula.first, substitution_map))
+    elif is_binary(formula.root):
+        return Formula(formula.root,
+                       _substitute_variables_in_tree(formula.first,
+                                                     substitution_map),
+                       _substitute_variables_in_tree(formula.second,
+                                                     substitution_map))
+    return formula
+
+def _substitute_operators_in_tree(formula, substitution_map):
+    # The original substitution, which copies the formula tree
+    if is_variable(formula.root):
+        return formula
+    elif is_constant(formula.root):
+        return substitution_map.get(formula.root, formula)
+    first = _substitute_operators_in_tree(formula.first, substitution_map)
+    second = None if is_unary(formula.root) else \
+        _substitute_operators_in_tree(formula.second, substitution_map)
+    if formula.root in substitution_map:
+        operands = {'p': first} if second is None else \
+            {'p': first, 'q': second}
+        return _substitute_variables_in_tree(substitution_map[formula.root],
+                                             operands)
+    return Formula(formula.root, first, second)
+
+def test_substitute_shares_subformulae(debug=False):
+    p, q = Formula('p'), Formula('q')
+    shared = Formula('->', Formula('&', p, q), Formula('~', p))
+    for i in range(4):
+        shared = Formula('|' if i % 2 == 0 else '->', shared,
+                         Formula('~', shared))
+    formulae = [Formula.parse(s) for s in
+                ['v', '~(x->~x)', '((p1|~p2)&(p3|T))', '(x-|~F)',
+                 '((~v&w)|(v->u))', '((p->q)<->(q+~p))']] + [shared]
+    variable_maps = [{}, {'p': Formula.parse('(q|q)')},
+                     {'p': q, 'q': Formula.parse('(p->~p)'),
+                      'x': Formula.parse('~(p&q)')}]
+    operator_maps = [{}, {'|': Formula.parse('(~p->q)')},
+                     {'~': Formula.parse('(p-|p)'),
+                      '->': Formula.parse('(~p|q)'),
+                      '&': Formula.parse('~(~p|~q)')},
+                     {'F': Formula.parse('(p&~p)'), 'T': Formula.parse('~F'),
+                      '-|': Formula.parse('~(p|q)'),
+                      '|': Formula.parse('((p&q)|(p->q))')}]
+    for f in formulae:
+        if debug:
+            print('Testing that substituting in', f,
+                  'shares subformulae and matches substituting in its tree')
+        for d in variable_maps:
+            a = f.substitute_variables(frozendict(d))
+            b = _substitute_variables_in_tree(f, d)
+            assert a == b and str(a) == str(b)
+            assert len(a.subformulae()) <= len(b.subformulae())
+        for d in operator_maps:
+            a = f.substitute_operators(frozendict(d))
+            b = _substitute_operators_in_tree(f, d)
+            assert a == b and str(a) == str(b)
+            assert len(a.subformulae()) <= len(b.subformulae())
+    assert len(shared.substitute_operators(
+        frozendict(operator_maps[2])).subformulae()) < \
+        len(_substitute_operators_in_tree(shared,
+                                          operator_maps[2]).subformulae())
+
+
+def test_equality_and_hash(debug=False):
+    for s1, s2, equal in [('p', 'p', True),
+                          ('p', 'q', False),
+                          ('~(p&q7)', '~(p&q7)', True),
+                          ('~(p&q7)', '~(p|q7)', False),
+                          ('((p->q)->(~q->~p))', '((p->q)->(~q->~p))', True),
+                          ('((p->q)->(~q->~p))', '((p->q)->(~p->~q))', False),
+                          ('(T-&F)', '(T-&F)', True)]:
+        if debug:
+            print("Testing equality and hash of", s1, "and", s2)
+        f1, f2 = Formula.parse(s1), Formula.parse(s2)
+        assert (f1 == f2) == equal
+        assert (f1 != f2) != equal
+        if equal:
+            assert hash(f1) == hash(f2)
+            assert len({f1, f2}) == 1
+    assert Formula('p') != 'p'
+    if debug:
+        print("Testing representation of a deeply nested formula")
+    f = Formula('p')
+    for i in range(10000):
+        f = Formula('~', f)
+    assert str(f) == '~' * 10000 + 'p'
+    assert f == Formula('~', f.first)
+
+
+def test_parse_error_offset(debug=False):
+    for s, offset in [('', 0), ('(x&y', 4), ('(x|y|z)', 4), ('(T)', 2),
+                      ('~(p&q7', 6), ('(p->q)~', None)]:
+        if debug:
+            print("Testing error offset of parsing prefix of", s)
+        ff, rr = Formula.parse_prefix(s)
+        if offset is None:
+            assert ff is not None
+            continue
+        assert ff is None
+        assert rr.startswith(PREFIX_ERR_MSG)
+        assert 'offset ' + str(offset) + ',' in rr, rr
+
+
+def test_parse_deeply_nested(debug=False):
+    n = 100000
+    for s in ['~' * n + 'p', '(p->' * n + 'q' + ')' * n]:
+        if debug:
+            print("Testing parsing of a formula of length", len(s))
+        assert Formula.is_formula(s)
+        assert str(Formula.parse(s)) == s
+        assert not Formula.is_formula(s[:-1] + '~')
+
+def test_interning(debug=False):
+    previous = set_interning(True)
+    try:
+        for s in ['p', '~(p&q7)', '((p->q)->(~q->~p))']:
+            if debug:
+                print("Testing interning of", s)
+            f = Formula.parse(s)
+            assert Formula.parse(s) is f
+            assert pickle.loads(pickle.dumps(f)) is f
+        f = Formula.parse('((p->q)->~(p->q))')
+        assert f.first is f.second.first
+    finally:
+        set_interning(previous)
+    if debug:
+        print("Testing that formulae are not interned by default")
+    f = Formula.parse('(p->q)')
+    assert Formula.parse('(p->q)') is not f
+    assert Formula.parse('(p->q)') == f
+
 def test_ex1(debug=False):
     test_repr(debug)
+    test_equality_and_hash(debug)
     test_variables(debug)
     test_operators(debug)
     test_parse_prefix(debug)
+    test_parse_error_offset(debug)
     test_is_formula(debug)
     test_parse(debug)
+    test_interning(debug)
+    test_parse_deeply_nested(debug)
 
 
 def test_ex1_opt(debug=False):
     test_polish(debug)
     test_parse_polish(debug)
+    test_polish_sequence(debug)
 
 
 def test_ex3(debug=False):
@@ -358,6 +520,7 @@ def test_ex3(debug=False):
     test_parse_all_operators(debug)
     test_substitute_variables(debug)
     test_substitute_operators(debug)
+    test_substitute_shares_subformulae(debug)
 
 
 def test_all(debug=False):
@@ -5,17 +5,27 @@
 
 """The Tautology Theorem and its implications."""
 
-from typing import List, Union
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from logic_utils import frozendict
 
 from propositions.syntax import *
 from propositions.proofs import *
 from propositions.deduction import *
+from propositions.deduction import _combine_proofs, _remove_assumption
 from propositions.semantics import *
+from propositions.sat import satisfying_model
+from propositions.proof_cache import ProofCache, canonical_form, \
+    get_proof_cache
 # from propositions.operators import *
 from propositions.axiomatic_systems import *
 
+#: Default number of variables on whose values `prove_tautology_in_parallel`
+#: splits the proof into parallel tasks
+PARALLEL_SPLIT_DEPTH = 3
+
 
 def formulae_capturing_model(model: Model) -> List[Formula]:
     """Computes the formulae that capture the given model: ``'``\ `x`\ ``'``
@@ -60,78 +70,155 @@ def prove_in_model(formula: Formula, model: Model) -> Proof:
     assert formula.operators().issubset({'->', '~'})
     assert is_model(model)
     # Task 6.1b
+    lines = []
+    append_proof_in_model(formula, model, lines, {})
+    conclusion = lines[-1].formula
+    return Proof(InferenceRule(formulae_capturing_model(model), conclusion),
+                 AXIOMATIC_SYSTEM, lines)
 
-    if is_variable(formula.root):
-        return _prove_var(formula, model)
-    elif is_unary(formula.root):
-        return _prove_neg(formula, model)
-    elif is_binary(formula.root) and formula.root == IMPLIES:
-        return _prove_implies(formula, model)
 
+def append_proof_in_model(formula: Formula, model: Model,
+                          lines: List[Proof.Line], memo: Dict[Formula, int]) \
+        -> int:
+    """Appends to the given proof lines a proof of either the given formula or
+    its negation, from the formulae that capture the given model, reusing the
+    given lines that already prove subformulae of it.
 
-def _get_proof_elements(formula, model):
-    eval = evaluate(formula, model)
-    conclusion = formula if eval else Formula(NEG, formula)
-    assumptions = formulae_capturing_model(model)
-    statement = InferenceRule(assumptions, conclusion)
-    rules = AXIOMATIC_SYSTEM
-    return eval, conclusion, statement, rules
+    Parameters:
+        formula: formula that contains no constants or operators beyond ``'->'``
+            and ``'~'``, whose affirmation or negation is to prove.
+        model: model from whose formulae to prove. The model may be partial,
+            i.e., lack some variables of the given formula, as long as it
+            determines the value of the given formula (see
+            `_values_in_model`).
+        lines: lines of a proof from the formulae that capture the given model
+            via `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`, to append
+            the new lines to.
+        memo: map from formulae to the indices of the lines of `lines` that
+            prove them (if they evaluate to ``True`` in the given model) or
+            their negations (otherwise), to which all formulae proven by the
+            new lines are added.
 
+    Returns:
+        The index of the line of `lines` that proves the given formula, if it
+        evaluates to ``True`` in the given model, or ``'~``\ `formula`\ ``'``
+        otherwise.
+    """
+    values = _values_in_model(formula, model)
+    assert values[formula] is not None
+    pending = [formula]
+    while len(pending) > 0:
+        current = pending[-1]
+        if current in memo:
+            pending.pop()
+            continue
+        root = current.root
+        if is_variable(root):
+            lines.append(Proof.Line(current if values[current]
+                                    else Formula(NEG, current)))
+        elif is_unary(root):
+            first = current.first
+            if first not in memo:
+                pending.append(first)
+                continue
+            if values[current]:
+                # The line that proves the negation of the operand proves the
+                # current formula
+                memo[current] = memo[first]
+                pending.pop()
+                continue
+            conclusion = Formula(NEG, current)
+            lines.append(Proof.Line(Formula(IMPLIES, first, conclusion), NN,
+                                    []))
+            lines.append(Proof.Line(conclusion, MP,
+                                    [memo[first], len(lines) - 1]))
+        else:
+            first, second = current.first, current.second
+            if values[current]:
+                if values[first] is False:
+                    if first not in memo:
+                        pending.append(first)
+                        continue
+                    premise = memo[first]
+                    lines.append(Proof.Line(
+                        Formula(IMPLIES, Formula(NEG, first), current), I2,
+                        []))
+                else:
+                    if second not in memo:
+                        pending.append(second)
+                        continue
+                    premise = memo[second]
+                    lines.append(Proof.Line(Formula(IMPLIES, second, current),
+                                            I1, []))
+                lines.append(Proof.Line(current, MP,
+                                        [premise, len(lines) - 1]))
+            else:
+                if first not in memo:
+                    pending.append(first)
+                    continue
+                if second not in memo:
+                    pending.append(second)
+                    continue
+                conclusion = Formula(NEG, current)
+                negated_second = Formula(NEG, second)
+                implication = Formula(IMPLIES, negated_second, conclusion)
+                lines.append(Proof.Line(Formula(IMPLIES, first, implication),
+                                        NI, []))
+                lines.append(Proof.Line(implication, MP,
+                                        [memo[first], len(lines) - 1]))
+                lines.append(Proof.Line(conclusion, MP,
+                                        [memo[second], len(lines) - 1]))
+        memo[current] = len(lines) - 1
+        pending.pop()
+    return memo[formula]
+
+
+def _values_in_model(formula: Formula, model: Model) -> \
+        Dict[Formula, Optional[bool]]:
+    """Evaluates all subformulae of the given formula in the given possibly
+    partial model.
 
-def _prove_var(formula, model):
-    eval, conclusion, statement, rules = _get_proof_elements(formula, model)
-    f = conclusion
-    lines = []
-    l = Proof.Line(f)
-    lines.append(l)
-    p = Proof(statement, rules, lines)
-    return p
-
-
-def _prove_neg(formula, model):
-    eval, conclusion, statement, rules = _get_proof_elements(formula, model)
-    f = formula.first
-    p = prove_in_model(f, model)
-    if eval:
-        return p
-    else:
-        lines = p.lines
-        f0 = Formula(IMPLIES, f, conclusion)
-        l0 = Proof.Line(f0, NN, [])
-        lines += (l0,)
-        f1 = conclusion
-        l1 = Proof.Line(f1, MP, [len(lines) - 2, len(lines) - 1])
-        lines += (l1,)
-        return Proof(statement, rules, lines)
-
-
-def _prove_implies(formula, model):
-    eval, conclusion, statement, rules = _get_proof_elements(formula, model)
-    precedent, consequent = formula.first, formula.second
-    if eval:
-        if not evaluate(precedent, model):
-            p = prove_in_model(precedent, model)
-            lines = p.lines
-            f0 = Formula.parse(f'(~{precedent}->{conclusion})')
-            l0 = Proof.Line(f0, I2, [])
+    Parameters:
+        formula: formula that contains no constants or operators beyond ``'->'``
+            and ``'~'``, whose subformulae to evaluate.
+        model: model in which to evaluate, which may lack some variables of the
+            given formula.
 
+    Returns:
+        A map from each subformula of the given formula to its value in the
+        given model, or to ``None`` if that value depends on variables that the
+        model lacks: an implication is ``True`` if its antecedent is ``False``
+        or its consequent is ``True`` even if the other operand is ``None``.
+    """
+    values = {}
+    pending = [formula]
+    while len(pending) > 0:
+        current = pending[-1]
+        if current in values:
+            pending.pop()
+            continue
+        root = current.root
+        if is_variable(root):
+            values[current] = model.get(root)
+        elif current.first not in values:
+            pending.append(current.first)
+            continue
+        elif is_unary(root):
+            value = values[current.first]
+            values[current] = None if value is None else not value
+        elif current.second not in values:
+            pending.append(current.second)
+            continue
         else:
-            p = prove_in_model(consequent, model)
-            lines = p.lines
-            f0 = Formula.parse(f'({consequent}->{conclusion})')
-            l0 = Proof.Line(f0, I1, [])
-        lines += (l0,)
-        f1 = conclusion
-        l1 = Proof.Line(f1, MP, [len(lines) - 2, len(lines) - 1])
-        lines += (l1,)
-        return Proof(statement, rules, lines)
-
-    else:
-        p_prec = prove_in_model(precedent, model)
-        neg_cons = Formula(NEG, consequent)
-        p_cons = prove_in_model(neg_cons, model)
-        proof = combine_proofs(p_prec, p_cons, conclusion, NI)
-        return proof
+            first, second = values[current.first], values[current.second]
+            if first is False or second is True:
+                values[current] = True
+            elif first is True and second is False:
+                values[current] = False
+            else:
+                values[current] = None
+        pending.pop()
+    return values
 
 
 def reduce_assumption(proof_from_affirmation: Proof,
@@ -175,11 +262,33 @@ def reduce_assumption(proof_from_affirmation: Proof,
            proof_from_negation.statement.assumptions[-1]
     assert proof_from_affirmation.rules == proof_from_negation.rules
     # Task 6.2
-    affirmation_p = remove_assumption(proof_from_affirmation)
+    return _reduce_assumption(proof_from_affirmation, proof_from_negation)
+
+
+def _reduce_assumption(proof_from_affirmation: Proof,
+                       proof_from_negation: Proof) -> Proof:
+    """Combines the given proofs like `reduce_assumption`, without checking
+    them.
+
+    Parameters:
+        proof_from_affirmation: proof of `conclusion` from one or more
+            assumptions, the last of which is an assumption `assumption`, that
+            is known to be valid.
+        proof_of_negation: proof of `conclusion` from the same assumptions and
+            inference rules of `proof_from_affirmation`, but with the last
+            assumption being ``'~``\ `assumption` ``'`` instead of
+            `assumption`, that is known to be valid.
+
+    Returns:
+        The proof returned by `reduce_assumption` for the given proofs.
+    """
+    affirmation_p = _remove_assumption(proof_from_affirmation)
     statement = proof_from_negation.statement
-    negation_p = remove_assumption(proof_from_negation)
-    p = combine_proofs(affirmation_p, negation_p, statement.conclusion, R)
-    return p
+    negation_p = _remove_assumption(proof_from_negation)
+    p = _combine_proofs(affirmation_p, negation_p, statement.conclusion, R)
+    # Both halves re-derive the same formulae, e.g., for their shared
+    # assumptions, so keep only the first derivation of each
+    return compress_proof(p)
 
 
 def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
@@ -208,35 +317,345 @@ def prove_tautology(tautology: Formula, model: Model = frozendict()) -> Proof:
     assert is_model(model)
     assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
     # Task 6.3a
-    len_model, len_formula = len(model), len(tautology.variables())
-    if len_model == len_formula:
-        return _prove_full_model(tautology, model)
-    elif len_model == len_formula - 1:
-        return _prove_one_less(tautology, model)
-    elif len_model < len_formula - 1:
-        return _prove_missing_model(tautology, model)
+    # The checks above are made once, and the recursion over the models that
+    # extend the given one trusts that the proofs it constructs are valid
+    variables = sorted(tautology.variables())
+    return _prove_tautology(tautology, variables, dict(model),
+                            formulae_capturing_model(model))
+
+
+def _prove_tautology(tautology: Formula, variables: List[str],
+                     model: Dict[str, bool],
+                     assumptions: List[Formula]) -> Proof:
+    """Proves the given tautology from the formulae that capture the given
+    model like `prove_tautology`, without checking the given arguments or the
+    constructed proofs.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        variables: the variables of `tautology`, in alphabetical order.
+        model: model over a (possibly empty) prefix of `variables`, from whose
+            formulae to prove. The model is restored to its original state
+            before returning.
+        assumptions: the formulae that capture `model`, in the order returned
+            by `formulae_capturing_model`\ ``(``\ `model`\ ``)``.
+
+    Returns:
+        The proof returned by `prove_tautology` for the given tautology and
+        model.
+    """
+    if len(model) == len(variables):
+        lines = []
+        append_proof_in_model(tautology, model, lines, {})
+        return Proof(InferenceRule(assumptions, tautology), AXIOMATIC_SYSTEM,
+                     lines)
+    variable = variables[len(model)]
+    proofs = []
+    for value in (True, False):
+        model[variable] = value
+        assumption = Formula(variable) if value else \
+            Formula(NEG, Formula(variable))
+        proofs.append(_prove_tautology(tautology, variables, model,
+                                       assumptions + [assumption]))
+    del model[variable]
+    return _reduce_assumption(proofs[0], proofs[1])
+
+
+def prove_tautology_lazily(tautology: Formula,
+                           model: Model = frozendict()) -> LazyProof:
+    """Constructs a lazy proof of the given tautology from the formulae that
+    capture the given model, whose lines are generated on demand.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        model: model over a (possibly empty) prefix (with respect to the
+            alphabetical order) of the variables of `tautology`, from whose
+            formulae to prove.
 
+    Returns:
+        A valid proof of the given tautology from the formulae that capture the
+        given model, in the order returned by
+        `formulae_capturing_model`\ ``(``\ `model`\ ``)``, via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`, which has the lines
+        of the proof returned by `prove_tautology` before compressing them (see
+        `~propositions.proofs.compress_proof`). Generating the lines only stores
+        the lines of a single proof in a model at a time, and, at each level of
+        the recursion, the formulae and new line indices of the lines from
+        which the current assumption is being removed that are still used by
+        later lines. The lines are generated with their use counts, so the
+        proof is checked by `~propositions.proofs.LazyProof.is_valid` in a
+        single pass over them.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    variables = sorted(tautology.variables())
+    assumptions = formulae_capturing_model(model)
+    model = dict(model)
+    return LazyProof(InferenceRule(assumptions, tautology), AXIOMATIC_SYSTEM,
+                     lambda: _tautology_lines(tautology, variables, model),
+                     True)
 
-def _prove_missing_model(tautology, model):
-    var = sorted(tautology.variables())[len(model)]
-    m_affirmation, m_negation = dict(model), dict(model)
-    m_affirmation[var], m_negation[var] = True, False
-    p_affirmation = prove_tautology(tautology, m_affirmation)
-    p_negation = prove_tautology(tautology, m_negation)
-    return reduce_assumption(p_affirmation, p_negation)
 
+def _tautology_lines(tautology: Formula, variables: List[str], model: Model,
+                     conclusion_uses: int = 0) -> \
+        Iterator[Tuple[Proof.Line, int]]:
+    """Generates the lines of the proof returned by `prove_tautology_lazily`
+    for the given tautology and model, with their use counts.
 
-def _prove_one_less(tautology, model):
-    var = sorted(tautology.variables())[len(model)]
-    m_affirmation, m_negation = dict(model), dict(model)
-    m_affirmation[var], m_negation[var] = True, False
-    p_affirmation = prove_in_model(tautology, m_affirmation)
-    p_negation = prove_in_model(tautology, m_negation)
-    return reduce_assumption(p_affirmation, p_negation)
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        variables: the variables of `tautology`, in alphabetical order.
+        model: model over a (possibly empty) prefix of `variables`, from whose
+            formulae to prove.
+        conclusion_uses: the number of times that the last line of the proof
+            is used by lines that follow it.
 
+    Returns:
+        An iterator over pairs of the lines of the proof and of the number of
+        times that each of them is used by later lines, as returned by
+        `~propositions.proofs.line_use_counts`.
+    """
+    if len(model) == len(variables):
+        lines = []
+        append_proof_in_model(tautology, model, lines, {})
+        counts = line_use_counts(lines)
+        counts[-1] += conclusion_uses
+        yield from zip(lines, counts)
+        return
+    variable = variables[len(model)]
+    affirmation = Formula(variable)
+    negation = Formula(NEG, affirmation)
+    # The proofs of the implications from the affirmation and from the
+    # negation of the variable to the tautology are combined by R, as in
+    # combine_proofs, each of whose conclusions is used once more by MP
+    count = 0
+    for line, uses in lines_without_assumption(
+            _tautology_lines(tautology, variables, {**model, variable: True},
+                             1),
+            affirmation):
+        yield line, uses
+        count += 1
+    yield Proof.Line(Formula(IMPLIES, Formula(IMPLIES, affirmation, tautology),
+                             Formula(IMPLIES,
+                                     Formula(IMPLIES, negation, tautology),
+                                     tautology)), R, []), 1
+    offset = count + 1
+    for line, uses in lines_without_assumption(
+            _tautology_lines(tautology, variables, {**model, variable: False},
+                             1),
+            negation):
+        yield (line if line.is_assumption() else
+               Proof.Line(line.formula, line.rule,
+                          [i + offset for i in line.assumptions])), uses
+        count += 1
+    yield Proof.Line(Formula(IMPLIES, Formula(IMPLIES, negation, tautology),
+                             tautology), MP, [offset - 2, offset - 1]), 1
+    yield Proof.Line(tautology, MP, [count, count + 1]), conclusion_uses
+
+
+def prove_tautology_adaptively(tautology: Formula) -> Proof:
+    """Proves the given tautology from no assumptions, splitting on the values
+    of only as many variables as needed to determine its value.
+
+    Unlike `prove_tautology`, which splits on all variables in alphabetical
+    order, at each partial model this chooses the variable to split on next by
+    its number of occurrences in the subformulae whose values the partial model
+    does not determine, and stops splitting as soon as the partial model
+    determines the value of the tautology (see `_values_in_model`). The proof
+    of each such partial model is constructed by `append_proof_in_model`.
 
-def _prove_full_model(tautology, model):
-    return prove_in_model(tautology, model)
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+
+    Returns:
+        A valid assumptionless proof of the given tautology via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+
+    Examples:
+        >>> proof = prove_tautology_adaptively(
+        ...     Formula.parse('(p->(q->(r->p)))'))
+        >>> len(proof.lines) < len(prove_tautology(
+        ...     Formula.parse('(p->(q->(r->p)))')).lines)
+        True
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    return _prove_tautology_adaptively(tautology, {}, [])
+
+
+def _prove_tautology_adaptively(tautology: Formula, model: Dict[str, bool],
+                                assumptions: List[Formula]) -> Proof:
+    """Proves the given tautology from the formulae that capture the given
+    partial model like `prove_tautology_adaptively`, without checking the
+    given arguments or the constructed proofs.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        model: partial model over some of the variables of `tautology`, from
+            whose formulae to prove. The model is restored to its original
+            state before returning.
+        assumptions: the formulae that capture `model`, in the order in which
+            its variables were assigned.
+
+    Returns:
+        A valid proof of the given tautology from the given assumptions, via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+    """
+    values = _values_in_model(tautology, model)
+    if values[tautology] is not None:
+        lines = []
+        append_proof_in_model(tautology, model, lines, {})
+        return Proof(InferenceRule(assumptions, tautology), AXIOMATIC_SYSTEM,
+                     lines)
+    variable = _split_variable(tautology, values)
+    proofs = []
+    for value in (True, False):
+        model[variable] = value
+        assumption = Formula(variable) if value else \
+            Formula(NEG, Formula(variable))
+        proofs.append(_prove_tautology_adaptively(tautology, model,
+                                                  assumptions + [assumption]))
+    del model[variable]
+    return _reduce_assumption(proofs[0], proofs[1])
+
+
+def _split_variable(formula: Formula,
+                    values: Dict[Formula, Optional[bool]]) -> str:
+    """Chooses the variable to split on in order to determine the value of the
+    given formula.
+
+    Parameters:
+        formula: formula whose value is not determined by the given values.
+        values: the values of the subformulae of the given formula in some
+            partial model, as returned by `_values_in_model`.
+
+    Returns:
+        The variable with the most occurrences in the subformulae of the given
+        formula whose values are not determined and are not operands of
+        subformulae whose values are determined, breaking ties alphabetically.
+    """
+    counts = {}
+    pending = [formula]
+    while len(pending) > 0:
+        current = pending.pop()
+        if values[current] is not None:
+            continue
+        root = current.root
+        if is_variable(root):
+            counts[root] = counts.get(root, 0) + 1
+        elif is_unary(root):
+            pending.append(current.first)
+        else:
+            pending.append(current.second)
+            pending.append(current.first)
+    return min(counts, key=lambda variable: (-counts[variable], variable))
+
+
+def prove_tautology_in_parallel(tautology: Formula,
+                                model: Model = frozendict(),
+                                split_depth: int = PARALLEL_SPLIT_DEPTH,
+                                max_workers: Optional[int] = None) -> Proof:
+    """Proves the given tautology from the formulae that capture the given
+    model like `prove_tautology`, proving the cases of the next few variables
+    in parallel processes.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        model: model over a (possibly empty) prefix (with respect to the
+            alphabetical order) of the variables of `tautology`, from whose
+            formulae to prove.
+        split_depth: number of variables after those of the given model, in
+            alphabetical order, on each of whose ``2**split_depth`` models
+            (together with the given model) the tautology is proven in a
+            separate task.
+        max_workers: maximum number of processes to run the tasks in, or
+            ``None`` for the number of processors.
+
+    Returns:
+        The proof returned by `prove_tautology` for the given tautology and
+        model.
+    """
+    assert is_tautology(tautology)
+    assert tautology.operators().issubset({'->', '~'})
+    assert is_model(model)
+    assert sorted(tautology.variables())[:len(model)] == sorted(model.keys())
+    variables = sorted(tautology.variables())
+    split_variables = variables[len(model):len(model) + split_depth]
+    # The models of the tasks, in the order in which _prove_tautology visits
+    # them, so that adjacent proofs differ only in their last assumption
+    models = []
+    for values in product((True, False), repeat=len(split_variables)):
+        extended = dict(model)
+        extended.update(zip(split_variables, values))
+        models.append(extended)
+    with ProcessPoolExecutor(max_workers) as executor:
+        encoded_proofs = executor.map(_encoded_proof_of_tautology,
+                                      [str(tautology)] * len(models), models)
+        proofs = [decode_proof(encoded) for encoded in encoded_proofs]
+    while len(proofs) > 1:
+        proofs = [_reduce_assumption(proofs[i], proofs[i + 1])
+                  for i in range(0, len(proofs), 2)]
+    return proofs[0]
+
+
+def _encoded_proof_of_tautology(tautology: str, model: Dict[str, bool]) -> \
+        EncodedProof:
+    """Proves the given tautology from the formulae that capture the given
+    model, in a task of `prove_tautology_in_parallel`.
+
+    Parameters:
+        tautology: string representation of a tautology that contains no
+            constants or operators beyond ``'->'`` and ``'~'``, to prove.
+        model: model over a (possibly empty) prefix (with respect to the
+            alphabetical order) of the variables of `tautology`, from whose
+            formulae to prove.
+
+    Returns:
+        The encoding of the proof returned by `prove_tautology` for the given
+        tautology and model.
+    """
+    tautology = Formula.parse(tautology)
+    return encode_proof(_prove_tautology(tautology,
+                                         sorted(tautology.variables()), model,
+                                         formulae_capturing_model(model)))
+
+
+def prove_tautology_cached(tautology: Formula,
+                           cache: Optional[ProofCache] = None) -> Proof:
+    """Proves the given tautology from no assumptions, reusing a cached proof
+    of its canonical form (see `~propositions.proof_cache.canonical_form`) if
+    there is one.
+
+    Parameters:
+        tautology: tautology that contains no constants or operators beyond
+            ``'->'`` and ``'~'``, to prove.
+        cache: cache of proofs to use, or ``None`` to use the cache returned by
+            `~propositions.proof_cache.get_proof_cache`.
+
+    Returns:
+        A valid assumptionless proof of the given tautology via
+        `~propositions.axiomatic_systems.AXIOMATIC_SYSTEM`.
+    """
+    if cache is None:
+        cache = get_proof_cache()
+    canonical = canonical_form(tautology)[0]
+    proof = cache.get(canonical)
+    if proof is None or not proof.rules.issubset(AXIOMATIC_SYSTEM):
+        # A cached proof via other rules is replaced by one via the axiomatic
+        # system
+        proof = prove_tautology(canonical)
+        cache.put(proof)
+    if canonical == tautology:
+        return proof
+    return prove_specialization(proof, InferenceRule([], tautology))
 
 
 def proof_or_counterexample(formula: Formula) -> Union[Proof, Model]:
@@ -261,9 +680,7 @@ def proof_or_counterexample(formula: Formula) -> Union[Proof, Model]:
 
 
 def _find_counter_example(formula):
-    for model in all_models(formula.variables()):
-        if not evaluate(formula, model):
-            return model
+    return satisfying_model([Formula(NEG, formula)])
 
 
 def encode_as_formula(rule: InferenceRule) -> Formula:
@@ -318,7 +735,7 @@ def prove_sound_inference(rule: InferenceRule) -> Proof:
         lines.append(Proof.Line(assump))
 
     encoded_formula = encode_as_formula(rule)
-    p = prove_tautology(encoded_formula)
+    p = prove_tautology_cached(encoded_formula)
     lines += [Proof.Line(line.formula, line.rule, [i + len(lines) for i in line.assumptions]) for line in p.lines]
     curr_formula = encoded_formula
     for i, assump in enumerate(rule.assumptions):
@@ -346,18 +763,11 @@ def model_or_inconsistency(formulae: List[Formula]) -> Union[Model, Proof]:
     for formula in formulae:
         assert formula.operators().issubset({'->', '~'})
     # Task 6.5
-    vars = []
-    for formula in formulae:
-        vars += formula.variables()
-    for model in all_models(vars):
-        for formula in formulae:
-            if not evaluate(formula, model):
-                break
-        else:
-            return model
-    else:
-        rule = InferenceRule(formulae, Formula.parse('~(p->p)'))
-        return prove_sound_inference(rule)
+    model = satisfying_model(formulae)
+    if model is not None:
+        return model
+    rule = InferenceRule(formulae, Formula.parse('~(p->p)'))
+    return prove_sound_inference(rule)
 
 
 
@@ -5,6 +5,13 @@
 
 """Tests for the propositions.tautology module."""
 
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+
 from logic_utils import frozendict
 
 from propositions.syntax import *
@@ -12,6 +19,7 @@ from propositions.semantics import *
 from propositions.proofs import *
 from propositions.deduction import *
 from propositions.tautology import *
+from propositions.proof_cache import *
 
 from propositions.proofs_test import offending_line
 
@@ -67,6 +75,43 @@ def test_prove_in_model(debug=False):
         assert p.is_valid(), offending_line(p)
 
 
+def test_append_proof_in_model(debug=False):
+    model = frozendict({'p': True, 'q': False, 'r': True})
+    assumptions = formulae_capturing_model(model)
+    lines = []
+    memo = {}
+    for f, c in [('(p->q)', '~(p->q)'),
+                 ('~(p->q)', '~(p->q)'),
+                 ('((p->q)->r)', '((p->q)->r)'),
+                 ('~~(p->q)', '~~~(p->q)'),
+                 ('(~(p->q)->((p->q)->r))', '(~(p->q)->((p->q)->r))')]:
+        f = Formula.parse(f)
+        if debug:
+            print('Testing append_proof_in_model on formula', f, 'in model',
+                  model)
+        index = append_proof_in_model(f, model, lines, memo)
+        assert lines[index].formula == Formula.parse(c)
+        assert memo[f] == index
+        p = Proof(InferenceRule(assumptions, lines[index].formula),
+                  AXIOMATIC_SYSTEM, lines[:index + 1])
+        assert p.is_valid(), offending_line(p)
+        # Proving a formula again reuses its lines
+        size = len(lines)
+        assert append_proof_in_model(f, model, lines, memo) == index
+        assert len(lines) == size
+
+    # A subformula that occurs many times is proven once
+    f = Formula.parse('(~p->q)')
+    for i in range(200):
+        f = Formula('->', f, f) if i % 2 == 0 else Formula('~', Formula('~', f))
+    if debug:
+        print('Testing prove_in_model on a formula with shared subformulae')
+    p = prove_in_model(f, model)
+    assert p.statement.conclusion == f
+    assert len(p.lines) < 1000
+    assert p.is_valid(), offending_line(p)
+
+
 def test_reduce_assumption(debug=False):
     for f, m, v in [('(y->x)', {'x': True}, 'y'),
                     ('(p->p)', {}, 'p'),
@@ -124,6 +169,179 @@ def test_prove_tautology(debug=False):
         assert p.is_valid(), offending_line(p)
 
 
+def test_prove_tautology_many_variables(debug=False):
+    # The proofs that are constructed along the recursion are not validated,
+    # so Proof.is_valid is never called while proving
+    is_valid = Proof.is_valid
+    calls = []
+
+    def counting_is_valid(proof: Proof) -> bool:
+        calls.append(proof)
+        return is_valid(proof)
+
+    for t, m in [('((p1->(p2->(p3->p4)))->(p3->(p2->(p1->p4))))', {}),
+                 ('(((((p->q)->(~r->~s))->r)->t)->((t->p)->(s->p)))', {}),
+                 ('(((((p->q)->(~r->~s))->r)->t)->((t->p)->(s->p)))',
+                  {'p': False, 'q': True})]:
+        t = Formula.parse(t)
+        m = frozendict(m)
+        if debug:
+            print("Testing prove_tautology on formula", t, "and model", m)
+        Proof.is_valid = counting_is_valid
+        try:
+            p = prove_tautology(t, m)
+        finally:
+            Proof.is_valid = is_valid
+        if debug:
+            print("Proof has", len(p.lines), "lines, and Proof.is_valid was "
+                  "called", len(calls), "times while proving.")
+        assert len(calls) == 0, calls
+        assert p.statement.conclusion == t
+        assert p.statement.assumptions == tuple(formulae_capturing_model(m))
+        assert p.rules == AXIOMATIC_SYSTEM
+        assert p.is_valid(), offending_line(p)
+
+
+def test_prove_tautology_lazily(debug=False):
+    for t, m in [('(p->p)', {}),
+                 ('((~q->~p)->(p->q))', {'p': False}),
+                 ('((~q->~p)->(p->q))', {}),
+                 ('((p2->(p3->p4))->(p3->(p2->p4)))', {})]:
+        t = Formula.parse(t)
+        m = frozendict(m)
+        if debug:
+            print("Testing prove_tautology_lazily on formula", t, "and model",
+                  m)
+        p = prove_tautology_lazily(t, m)
+        assert p.statement == prove_tautology(t, m).statement
+        assert p.rules == AXIOMATIC_SYSTEM
+        # Counting and validating the lines does not store them
+        count = p.line_count()
+        assert p.is_valid()
+        assert p._materialized_lines is None
+        lines = list(p.iter_lines())
+        assert len(lines) == count
+        assert lines[-1].formula == t
+        assert [uses for _, uses in p._generate_lines()] == \
+               line_use_counts(lines)
+        eager = Proof(p.statement, p.rules, lines)
+        assert eager.is_valid(), offending_line(eager)
+        # Writing and validating the lines as a file does not store them
+        file = io.StringIO()
+        write_proof(p, file)
+        assert p._materialized_lines is None
+        file.seek(0)
+        assert is_valid_proof_file(file)
+        assert len(p.lines) == count
+        assert all(p.is_line_valid(i) for i in range(count))
+
+
+def test_prove_tautology_adaptively(debug=False):
+    for t in ['(p->p)', '((~q->~p)->(p->q))', '(~~p->p)', '(p->~~p)',
+              '((~p->~q)->((p->~q)->~q))',
+              '((p2->(p3->p4))->(p3->(p2->p4)))',
+              '((p1->(p2->(p3->p4)))->(p3->(p2->(p1->p4))))',
+              '(((((p->q)->(~r->~s))->r)->t)->((t->p)->(s->p)))',
+              '(~~~~x13->~~x13)']:
+        t = Formula.parse(t)
+        if debug:
+            print("Testing prove_tautology_adaptively on formula", t)
+        p = prove_tautology_adaptively(t)
+        assert p.statement == InferenceRule([], t)
+        assert p.rules == AXIOMATIC_SYSTEM
+        assert p.is_valid(), offending_line(p)
+
+    # A tautology that is determined by a single variable of many
+    t = Formula.parse('p')
+    for i in range(16):
+        t = Formula('->', Formula('q' + str(i)), t)
+    t = Formula('->', Formula.parse('p'), t)
+    if debug:
+        print("Testing prove_tautology_adaptively on formula", t)
+    p = prove_tautology_adaptively(t)
+    assert p.statement == InferenceRule([], t)
+    assert len(p.lines) < 100
+    assert p.is_valid(), offending_line(p)
+
+
+def test_prove_tautology_in_parallel(debug=False):
+    for t, m, d in [('((~q->~p)->(p->q))', {}, 1),
+                    ('((p2->(p3->p4))->(p3->(p2->p4)))', {}, 2),
+                    ('((p2->(p3->p4))->(p3->(p2->p4)))', {'p2': False}, 5),
+                    ('(~~~~x13->~~x13)', {'x13': True}, 2)]:
+        t = Formula.parse(t)
+        m = frozendict(m)
+        if debug:
+            print("Testing prove_tautology_in_parallel on formula", t,
+                  "and model", m, "splitting on", d, "variables")
+        p = prove_tautology_in_parallel(t, m, d, 2)
+        assert p.statement == prove_tautology(t, m).statement
+        assert p.rules == AXIOMATIC_SYSTEM
+        assert p.is_valid(), offending_line(p)
+
+
+def test_prove_tautology_cached(debug=False):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'proofs.sqlite')
+        cache = ProofCache(path, 2)
+        for t, c in [('(z7->z7)', '(z1->z1)'),
+                     ('(p->p)', '(z1->z1)'),
+                     ('((~q->~p)->(p->q))', '((~z1->~z2)->(z2->z1))'),
+                     ('((~p->~q)->(q->p))', '((~z1->~z2)->(z2->z1))'),
+                     ('((~z2->~z1)->(z1->z2))', '((~z1->~z2)->(z2->z1))'),
+                     ('(~~~~x13->~~x13)', '(~~~~z1->~~z1)')]:
+            t = Formula.parse(t)
+            if debug:
+                print("Testing prove_tautology_cached on formula", t)
+            assert canonical_form(t)[0] == Formula.parse(c)
+            p = prove_tautology_cached(t, cache)
+            assert p.statement == InferenceRule([], t)
+            assert p.rules == AXIOMATIC_SYSTEM
+            assert p.is_valid(), offending_line(p)
+            assert cache.get(Formula.parse(c)) is not None
+            assert len(cache) <= 2
+        cache.close()
+        # The proofs are stored as plain JSON data
+        database = sqlite3.connect(path)
+        for row in database.execute('SELECT proof FROM proofs'):
+            assert type(row[0]) is str
+            decode_proof(json.loads(row[0]))
+        database.close()
+        # The proofs persist in the database
+        cache = ProofCache(path)
+        assert len(cache) == 0
+        for c in ['(z1->z1)', '((~z1->~z2)->(z2->z1))', '(~~~~z1->~~z1)']:
+            p = cache.get(Formula.parse(c))
+            assert p.statement == InferenceRule([], Formula.parse(c))
+            assert p.is_valid(), offending_line(p)
+        assert cache.get(Formula.parse('(z1->~~z1)')) is None
+        cache.close()
+        # Stale or tampered proofs in the database are not used
+        c = Formula.parse('(z1->z1)')
+        shortcut = InferenceRule([], c)
+        invalid = Proof(shortcut, AXIOMATIC_SYSTEM, [Proof.Line(c, MP, [])])
+        unsound = Proof(shortcut, {shortcut}, [Proof.Line(c, shortcut, [])])
+        for row in [json.dumps(encode_proof(invalid)), '[[', '[1, 2]',
+                    json.dumps(encode_proof(unsound))]:
+            if debug:
+                print('Testing prove_tautology_cached on formula', c,
+                      'with a tampered cached proof')
+            database = sqlite3.connect(path)
+            database.execute('UPDATE proofs SET proof = ? WHERE key = ?',
+                             (row, hashlib.sha256(str(c).encode()).hexdigest()))
+            database.commit()
+            database.close()
+            cache = ProofCache(path)
+            p = prove_tautology_cached(c, cache)
+            assert p.statement == InferenceRule([], c)
+            assert p.rules == AXIOMATIC_SYSTEM
+            assert p.is_valid(), offending_line(p)
+            cache.close()
+            cache = ProofCache(path)
+            assert cache.get(c).rules == AXIOMATIC_SYSTEM
+            cache.close()
+
+
 def test_proof_or_counterexample(debug=False):
     for f in ['x', '(y->y)', '((x->y)->(x->y))', '((x->y)->z)',
               '((~p->~q)->((p->~q)->~q))', '((~p->~r)->((p->~q)->~q))',
@@ -261,11 +479,17 @@ def test_prove_in_model_full(debug=False):
 def test_ex6(debug=False):
     test_formulae_capturing_model(debug)
     test_prove_in_model(debug)
+    test_append_proof_in_model(debug)
     test_reduce_assumption(debug)
     test_prove_tautology(debug)
+    test_prove_tautology_many_variables(debug)
+    test_prove_tautology_in_parallel(debug)
+    test_prove_tautology_adaptively(debug)
+    test_prove_tautology_lazily(debug)
     test_proof_or_counterexample(debug)
     test_encode_as_formula(debug)
     test_prove_sound_inference(debug)
+    test_prove_tautology_cached(debug)
     test_model_or_inconsistency(debug)
 
 
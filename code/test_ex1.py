@@ -10,6 +10,7 @@ from propositions.syntax_test import *
 
 def test_task1(debug=False):
     test_repr(debug)
+    test_equality_and_hash(debug)
 
 
 def test_task2(debug=False):
@@ -22,6 +23,7 @@ def test_task3(debug=False):
 
 def test_task4(debug=False):
     test_parse_prefix(debug)
+    test_parse_error_offset(debug)
 
 
 def test_task5(debug=False):
@@ -30,6 +32,8 @@ def test_task5(debug=False):
 
 def test_task6(debug=False):
     test_parse(debug)
+    test_interning(debug)
+    test_parse_deeply_nested(debug)
 
 
 def test_task7(debug=False):
@@ -38,6 +42,7 @@ def test_task7(debug=False):
 
 def test_task8(debug=False):
     test_parse_polish()
+    test_polish_sequence()
 
 
 test_task1(True)
@@ -46,7 +51,5 @@ test_task3(True)
 test_task4(True)
 test_task5(True)
 test_task6(True)
-"""
-#test_task7(True) # Optional
-#test_task8(True) # Optional
-"""
+test_task7(True)
+test_task8(True)
@@ -9,26 +9,31 @@ from propositions.semantics_test import *
 
 def test_task1(debug=False):
     test_evaluate(debug)
+    test_compile_formula(debug)
 
 def test_task2(debug=False):
     test_all_models(debug)
 
 def test_task3(debug=False):
     test_truth_values(debug)
+    test_truth_table(debug)
 
 def test_task4(debug=False):
     test_print_truth_table(debug)   
+    test_write_truth_table(debug)
 
 def test_task5(debug=False):
     test_is_tautology(debug)
     test_is_contradiction(debug)
     test_is_satisfiable(debug)
+    test_satisfying_model(debug)
 
 def test_task6(debug=False):
     test_synthesize_for_model(debug)
 
 def test_task7(debug=False):
     test_synthesize(debug)
+    test_synthesize_minimized(debug)
 
 test_task1(True)
 test_task2(True)
@@ -8,6 +8,7 @@
 from propositions.syntax_test import *
 from propositions.semantics_test import *
 from propositions.operators_test import *
+from propositions.bdd_test import *
 
 def test_before_tasks(debug=False):
     assert is_binary('+'), 'Change is_binary() before testing Chapter 3 tasks.'
@@ -42,6 +43,7 @@ def test_task3(debug=False):
 
 def test_task4(debug=False):
     test_substitute_operators(debug)
+    test_substitute_shares_subformulae(debug)
 
 def test_task5(debug=False):
     test_to_not_and_or(debug)
@@ -57,6 +59,8 @@ def test_task6c(debug=False):
 
 def test_task6d(debug=False):
     test_to_implies_false(debug)
+    test_dag_translation(debug)
+    test_bdd(debug)
 
 test_before_tasks(True)    
 test_task1(True)
@@ -17,6 +17,7 @@ def test_task2(debug=False):
 
 def test_task3(debug=False):
     test_is_sound_inference(debug)
+    test_inference_counterexample(debug)
 
 def test_task4(debug=False):
     test_specialize(debug)
@@ -31,6 +32,10 @@ def test_task6(debug=False):
     test_rule_for_line(debug)
     test_is_line_valid(debug)
     test_is_valid(debug)
+    test_extended(debug)
+    test_encode_proof(debug)
+    test_lazy_proof(debug)
+    test_write_proof(debug)
     
 def test_task7(debug=False):
     test_prove_and_commutativity(debug)
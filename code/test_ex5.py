@@ -18,6 +18,8 @@ def test_task1(debug=False):
 def test_task2(debug=False):
     test_inline_proof_once(debug)
     test_inline_proof(debug)
+    test_inline_proof_many_uses(debug)
+    test_compress_proof(debug)
 
 def test_task3(debug=False):
     test_prove_corollary(debug)
@@ -25,6 +27,7 @@ def test_task3(debug=False):
 
 def test_task4(debug=False):
     test_remove_assumption(debug)
+    test_lines_without_assumption(debug)
 
 def test_task5(debug=False):
     test_prove_hypothetical_syllogism(debug)
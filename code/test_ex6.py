@@ -15,17 +15,23 @@ def pretest_validity(debug=False):
 def test_task1(debug=False):
     test_formulae_capturing_model(debug)
     test_prove_in_model(debug)
+    test_append_proof_in_model(debug)
     
 def test_task2(debug=False):
     test_reduce_assumption(debug)
 
 def test_task3(debug=False):
     test_prove_tautology(debug)
+    test_prove_tautology_many_variables(debug)
+    test_prove_tautology_in_parallel(debug)
+    test_prove_tautology_adaptively(debug)
+    test_prove_tautology_lazily(debug)
     test_proof_or_counterexample(debug)
 
 def test_task4(debug=False):
     test_encode_as_formula(debug)
     test_prove_sound_inference(debug)
+    test_prove_tautology_cached(debug)
 
 def test_task5(debug=False):
     test_model_or_inconsistency(debug)
@@ -20,7 +20,10 @@ def test_task3(debug=False):
 
 def test_task4(debug=False):
     test_formula_parse_prefix(debug)
+    test_parse_error_offset(debug)
     test_formula_parse(debug)
+    test_interning(debug)
+    test_parse_deeply_nested(debug)
 
 def test_task5(debug=False):
     test_term_constants(debug)